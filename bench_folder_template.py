@@ -0,0 +1,57 @@
+import sys
+import time
+import argparse
+
+from folder_template import FolderTemplate
+
+DEPARTMENTS = ["plates", "layout", "anim", "fx", "lgt", "comp", "roto", "matchmove"]
+SUBFOLDERS = ["work", "renders", "cache", "publish"]
+
+
+def shot_tree(departments, subfolders):
+    # One folder per department plus its subfolders: 8 x (1 + 4) = 40 per shot.
+    # fx only exists for shots that have it, to exercise a conditional branch.
+    shot = {}
+    for department in departments:
+        children = {name: None for name in subfolders}
+        if department == "fx":
+            children["$if"] = "fx"
+        shot[department] = children
+    return {"{sequence}": {"{shot}": shot}}
+
+
+def records(shots, shots_per_sequence=100):
+    for index in range(shots):
+        yield {
+            "sequence": f"sq{index // shots_per_sequence:03d}",
+            "shot": f"sh{index % shots_per_sequence * 10:04d}",
+            "fx": "yes",
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time template compilation and expansion (no filesystem I/O).")
+    parser.add_argument("--shots", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    template = FolderTemplate(shot_tree(DEPARTMENTS, SUBFOLDERS))
+    compiled = time.perf_counter() - start
+    print(f"compiled {len(template)} template folders in {compiled * 1000:.2f} ms")
+
+    best = None
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        count = 0
+        for _ in template.expand(records(args.shots)):
+            count += 1
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    per_shot = (len(template) - 2)
+    print(f"expanded {args.shots} shots x {per_shot} subfolders = {count} paths in {best:.3f}s "
+          f"(best of {args.repeat}, {count / best / 1e6:.2f}M paths/s)")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
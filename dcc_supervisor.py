@@ -0,0 +1,238 @@
+import os
+import sys
+import time
+import argparse
+import itertools
+import threading
+import subprocess
+
+import proc_stats
+from render_queue import safe_filename
+
+LOG_DIR = "dcc_logs"
+LAUNCH_LOG = "launches.log"
+REAP_SECONDS = 1.0
+EARLY_EXIT_SECONDS = 10.0
+
+STARTING = "starting"
+RUNNING = "running"
+EXITED = "exited"
+CRASHED = "crashed"
+
+
+class LaunchError(Exception):
+    pass
+
+
+def dcc_command(path, args=()):
+    # .app bundles are folders: open -W stays alive as long as the app does
+    if sys.platform == "darwin" and path.rstrip("/").endswith(".app"):
+        return ["open", "-n", "-W", "-a", path, "--args"] + list(args)
+    return [path] + list(args)
+
+
+def format_duration(seconds):
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+    return f"{seconds // 60}m{seconds % 60:02d}s"
+
+
+class Session:
+    def __init__(self, session_id, name, argv, heavy):
+        self.session_id = session_id
+        self.name = name
+        self.argv = argv
+        self.heavy = heavy
+        self.state = STARTING
+        self.process = None
+        self.pid = None
+        self.started = time.time()
+        self.launch_seconds = None
+        self.ended = None
+        self.exit_code = None
+        self.log_path = None
+        self.rss = None
+        self.cpu_seconds = None
+        self.cpu_percent = None
+        self.sampled = None
+
+    @property
+    def uptime(self):
+        return (self.ended or time.time()) - self.started
+
+    @property
+    def alive(self):
+        return self.state in (STARTING, RUNNING)
+
+
+class DccSupervisor:
+    # Starts Houdini, Nuke, ... without a shell and keeps their Popen objects:
+    # a reaper thread polls them for exits (so none are left as zombies),
+    # sample() reads CPU and RSS of each session's process tree from /proc
+    # when someone is looking, and every launch and exit is appended to
+    # dcc_logs/launches.log with its launch latency.
+    def __init__(self, max_heavy=0, log_dir=LOG_DIR, interval=REAP_SECONDS):
+        self.max_heavy = max_heavy
+        self.log_dir = log_dir
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.sessions = []
+        self.listeners = []
+        self.ids = itertools.count(1)
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def add_listener(self, listener):
+        # listener(session) on launch and exit, from the launching or reaper thread
+        self.listeners.append(listener)
+
+    def _notify(self, session):
+        for listener in self.listeners:
+            listener(session)
+
+    def _log(self, text):
+        text = text.replace("\n", " ")
+        os.makedirs(self.log_dir, exist_ok=True)
+        with open(os.path.join(self.log_dir, LAUNCH_LOG), "a", encoding="utf-8") as f:
+            f.write(f"{time.strftime('%Y-%m-%d %H:%M:%S')}\t{text}\n")
+
+    def heavy_running(self):
+        with self.lock:
+            return sum(1 for session in self.sessions if session.heavy and session.alive)
+
+    def launch(self, name, argv, cwd=None, env=None, heavy=True):
+        with self.lock:
+            heavy_count = sum(1 for session in self.sessions if session.heavy and session.alive)
+            if heavy and self.max_heavy and heavy_count >= self.max_heavy:
+                raise LaunchError(f"{heavy_count} heavy sessions are already running (limit {self.max_heavy})")
+            session = Session(next(self.ids), name, argv, heavy)
+        os.makedirs(self.log_dir, exist_ok=True)
+        stamp = time.strftime("%Y%m%d_%H%M%S", time.localtime(session.started))
+        session.log_path = os.path.abspath(os.path.join(self.log_dir, f"{stamp}_{safe_filename(name)}.log"))
+        if sys.platform == "win32":
+            options = {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+        else:
+            # Its own session: Ctrl+C in the launcher's terminal does not reach it
+            options = {"start_new_session": True}
+        start = time.perf_counter()
+        try:
+            with open(session.log_path, "wb") as log:
+                session.process = subprocess.Popen(argv, cwd=cwd, env=env, stdin=subprocess.DEVNULL,
+                                                   stdout=log, stderr=subprocess.STDOUT, **options)
+        except OSError as e:
+            self._log(f"failed\t{name}\t{subprocess.list2cmdline(argv)}\t{e}")
+            raise LaunchError(f"Could not start {argv[0]}: {e}") from e
+        session.launch_seconds = time.perf_counter() - start
+        session.pid = session.process.pid
+        session.state = RUNNING
+        with self.lock:
+            self.sessions.append(session)
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._reap_loop, daemon=True)
+                self.thread.start()
+        self._log(f"launch\t{name}\tpid {session.pid}\t{session.launch_seconds * 1000:.1f}ms\t{subprocess.list2cmdline(argv)}")
+        self._notify(session)
+        return session
+
+    def reap(self):
+        # Sessions that exited since the last call
+        with self.lock:
+            alive = [session for session in self.sessions if session.alive]
+        exited = []
+        for session in alive:
+            exit_code = session.process.poll()
+            if exit_code is None:
+                continue
+            session.ended = time.time()
+            session.exit_code = exit_code
+            # A DCC that dies within seconds did not really start (licence, missing library, ...)
+            early = session.ended - session.started < EARLY_EXIT_SECONDS
+            session.state = CRASHED if exit_code != 0 or early else EXITED
+            self._log(f"exit\t{session.name}\tpid {session.pid}\tcode {exit_code}\tafter {format_duration(session.uptime)}")
+            exited.append(session)
+            self._notify(session)
+        return exited
+
+    def _reap_loop(self):
+        while not self.stopped.wait(self.interval):
+            self.reap()
+
+    def sample(self):
+        # One /proc pass for all sessions; CPU is a percentage of one core
+        # since the previous sample, like top
+        with self.lock:
+            alive = [session for session in self.sessions if session.alive]
+        if not alive or not proc_stats.available():
+            return
+        stats = proc_stats.tree_stats([session.pid for session in alive])
+        now = time.time()
+        for session in alive:
+            if session.pid not in stats:
+                continue
+            rss, cpu_seconds = stats[session.pid]
+            if session.cpu_seconds is not None and now > session.sampled:
+                session.cpu_percent = max(0.0, (cpu_seconds - session.cpu_seconds) / (now - session.sampled) * 100)
+            session.rss = rss
+            session.cpu_seconds = cpu_seconds
+            session.sampled = now
+
+    def snapshot(self):
+        with self.lock:
+            return list(self.sessions)
+
+    def clear_exited(self):
+        with self.lock:
+            self.sessions = [session for session in self.sessions if session.alive]
+
+    def stop(self):
+        # Running DCCs are left open
+        self.stopped.set()
+
+
+def describe(session):
+    parts = [f"{session.name} pid {session.pid} {session.state}", format_duration(session.uptime)]
+    if session.cpu_percent is not None:
+        parts.append(f"cpu {session.cpu_percent:.0f}%")
+    if session.rss is not None:
+        parts.append(proc_stats.format_bytes(session.rss))
+    if session.exit_code is not None:
+        parts.append(f"exit {session.exit_code}")
+    return ", ".join(parts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Launch a DCC and follow its CPU and memory until it exits.")
+    parser.add_argument("command", nargs=argparse.REMAINDER, help="Executable and arguments, e.g. /opt/hfs19.5/bin/houdini scene.hip")
+    parser.add_argument("--name", default=None, help="Session name (default: executable name)")
+    parser.add_argument("--every", type=float, default=5.0, help="Seconds between readings (default: 5)")
+    args = parser.parse_args()
+    if args.command[:1] == ["--"]:
+        args.command = args.command[1:]
+    if not args.command:
+        parser.error("no command given")
+
+    supervisor = DccSupervisor()
+    name = args.name or os.path.splitext(os.path.basename(args.command[0].rstrip("/")))[0]
+    try:
+        session = supervisor.launch(name, dcc_command(args.command[0], args.command[1:]))
+    except LaunchError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    print(f"Started {name} (pid {session.pid}) in {session.launch_seconds * 1000:.1f}ms, log {session.log_path}")
+    try:
+        while True:
+            time.sleep(args.every)
+            if not session.alive:
+                break
+            supervisor.sample()
+            print(describe(session), flush=True)
+    except KeyboardInterrupt:
+        print(f"Stopped following {name}; it keeps running (pid {session.pid})")
+        return 0
+    print(describe(session))
+    return session.exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,259 @@
+import os
+import sys
+import time
+import argparse
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import folder_spec
+
+WORKERS = 16
+BATCH = 2000
+KNOWN_DIRS = 50000
+MAX_LISTED = 1000
+
+CREATED = "created"
+EXISTING = "existing"
+FAILED = "failed"
+
+
+def relative_dir(path):
+    # CSV paths are relative to the target; anything that would land outside
+    # of it (absolute paths, "..") is rejected rather than created.
+    path = path.strip().replace("\\", "/")
+    if not path:
+        return ""
+    if path.startswith("/") or os.path.isabs(path) or os.path.splitdrive(path)[0]:
+        raise ValueError("absolute path")
+    path = os.path.normpath(path)
+    if path == os.curdir:
+        return ""
+    if path == os.pardir or path.startswith(os.pardir + os.sep):
+        raise ValueError("outside the target directory")
+    return path
+
+
+def make_dir(path, dry_run):
+    try:
+        if dry_run:
+            if os.path.isdir(path):
+                return EXISTING, None
+            if os.path.exists(path):
+                return FAILED, "exists and is not a directory"
+            return CREATED, None
+        os.mkdir(path)
+        return CREATED, None
+    except FileExistsError:
+        if os.path.isdir(path):
+            return EXISTING, None
+        return FAILED, "exists and is not a directory"
+    except OSError as e:
+        return FAILED, e.strerror or str(e)
+
+
+def scan_dirs(target, progress=None, cancelled=None):
+    # One os.scandir walk of the target: every directory below it, relative
+    # to it. Symlinks are not followed.
+    found = set()
+    stack = [""]
+    visited = 0
+    while stack:
+        relative = stack.pop()
+        visited += 1
+        try:
+            with os.scandir(os.path.join(target, relative) if relative else target) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        child = os.path.join(relative, entry.name) if relative else entry.name
+                        found.add(child)
+                        stack.append(child)
+        except FileNotFoundError:
+            if not relative:
+                return found
+        except OSError:
+            continue
+        if visited % 1000 == 0 and progress is not None:
+            progress(len(found), 0, f"Scanning {relative or target}")
+        if cancelled is not None and cancelled():
+            break
+    return found
+
+
+class FolderBuilder:
+    # Paths are taken in batches. Each batch is reduced to the directories
+    # not already known to exist (leaves plus any missing parents, each once)
+    # and created one depth level at a time, every level in parallel, so a
+    # parent always exists before its children are attempted. Only a bounded
+    # LRU of known directories is kept, so memory stays flat on huge inputs.
+    #
+    # Given the set of directories already on disk (sync mode) nothing is
+    # probed: spec directories found in the set are moved out of it, only
+    # the missing ones are created, and whatever is left over at the end is
+    # on disk but not in the spec.
+    def __init__(self, target, workers=WORKERS, dry_run=False, existing=None):
+        self.target = os.path.abspath(target)
+        self.workers = workers
+        self.dry_run = dry_run
+        self.existing = existing
+        self.known = OrderedDict()
+        self.summary = {"paths": 0, CREATED: 0, EXISTING: 0, FAILED: 0, "failures": [], "planned": [], "seconds": 0.0}
+
+    def run(self, paths, total=0, progress=None, cancelled=None):
+        start = time.perf_counter()
+        if not self.dry_run:
+            os.makedirs(self.target, exist_ok=True)
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            batch = []
+            for path in paths:
+                batch.append(path)
+                if len(batch) >= BATCH:
+                    self._build(pool, batch)
+                    batch = []
+                    if progress is not None:
+                        progress(self.summary["paths"], total, path)
+                    if cancelled is not None and cancelled():
+                        break
+            else:
+                if batch:
+                    self._build(pool, batch)
+                if progress is not None:
+                    progress(self.summary["paths"], total, batch[-1] if batch else "")
+        self.summary["seconds"] = time.perf_counter() - start
+        return self.summary
+
+    def _fail(self, path, error):
+        self.summary[FAILED] += 1
+        if len(self.summary["failures"]) < MAX_LISTED:
+            self.summary["failures"].append((path, error))
+
+    def _build(self, pool, batch):
+        levels = {}
+        for path in batch:
+            self.summary["paths"] += 1
+            try:
+                rel = relative_dir(path)
+            except ValueError as e:
+                self._fail(path, str(e))
+                continue
+            if not rel:
+                continue
+            parts = rel.split(os.sep)
+            # Walk up from the leaf until a directory this run already knows
+            for depth in range(len(parts), 0, -1):
+                directory = os.sep.join(parts[:depth])
+                if directory in self.known:
+                    self.known.move_to_end(directory)
+                    break
+                if self.existing is not None and directory in self.existing:
+                    self.existing.remove(directory)
+                    self.known[directory] = None
+                    self.summary[EXISTING] += 1
+                    continue
+                level = levels.setdefault(depth, set())
+                if directory in level:
+                    break
+                level.add(directory)
+
+        statuses = {}
+        for depth in sorted(levels):
+            pending = []
+            for directory in levels[depth]:
+                parent_status = statuses.get(os.path.dirname(directory))
+                if parent_status == FAILED:
+                    statuses[directory] = FAILED
+                    self._fail(directory, "parent could not be created")
+                elif self.dry_run and parent_status == CREATED:
+                    # Below a folder that would be created nothing can be in the way
+                    self._record(directory, CREATED, None, statuses)
+                else:
+                    pending.append(directory)
+            full_paths = [os.path.join(self.target, directory) for directory in pending]
+            results = pool.map(make_dir, full_paths, [self.dry_run] * len(full_paths))
+            for directory, (status, error) in zip(pending, results):
+                self._record(directory, status, error, statuses)
+
+        # Sync mode already holds the whole tree, so it keeps every known
+        # directory rather than probing evicted ones again
+        while self.existing is None and len(self.known) > KNOWN_DIRS:
+            self.known.popitem(last=False)
+
+    def _record(self, directory, status, error, statuses):
+        statuses[directory] = status
+        if status == FAILED:
+            self._fail(directory, error)
+            return
+        self.summary[status] += 1
+        self.known[directory] = None
+        if status == CREATED and self.dry_run and len(self.summary["planned"]) < MAX_LISTED:
+            self.summary["planned"].append(directory)
+
+
+def create_folders(target, paths, workers=WORKERS, dry_run=False, progress=None, cancelled=None, total=None):
+    if total is None:
+        total = len(paths) if hasattr(paths, "__len__") else 0
+    return FolderBuilder(target, workers, dry_run).run(paths, total, progress, cancelled)
+
+
+def sync_folders(target, paths, workers=WORKERS, dry_run=False, report_extra=False, progress=None, cancelled=None,
+                 total=None):
+    # Desired-state version of create_folders: one scan of the target, then
+    # mkdir only for what is missing. Optionally lists the folders on disk
+    # that are not in the spec (only the topmost of each extra subtree).
+    if total is None:
+        total = len(paths) if hasattr(paths, "__len__") else 0
+    start = time.perf_counter()
+    existing = scan_dirs(os.path.abspath(target), progress, cancelled)
+    scanned = len(existing)
+    scan_seconds = time.perf_counter() - start
+    summary = FolderBuilder(target, workers, dry_run, existing).run(paths, total, progress, cancelled)
+    summary["scanned"] = scanned
+    summary["scan_seconds"] = scan_seconds
+    summary["seconds"] += scan_seconds
+    summary["extra"] = len(existing)
+    summary["extras"] = []
+    if report_extra:
+        top = sorted(directory for directory in existing if os.path.dirname(directory) not in existing)
+        summary["extras"] = top[:MAX_LISTED]
+    return summary
+
+
+def format_summary(summary, dry_run=False):
+    verb = "would be created" if dry_run else "created"
+    text = (f"{summary['paths']} paths: {summary[CREATED]} folders {verb}, {summary[EXISTING]} already existed, "
+            f"{summary[FAILED]} failed in {summary['seconds']:.2f}s")
+    if "scanned" in summary:
+        text += f" ({summary['scanned']} folders scanned in {summary['scan_seconds']:.2f}s, {summary['extra']} not in the spec)"
+    return text
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Create the folders listed in a CSV under a target directory.")
+    parser.add_argument("target", help="Directory the CSV paths are relative to")
+    parser.add_argument("csv", help="CSV of relative folder paths or patterns (see folder_spec.py)")
+    parser.add_argument("-j", "--workers", type=int, default=WORKERS, help=f"Parallel mkdir calls (default: {WORKERS})")
+    parser.add_argument("-n", "--dry-run", action="store_true", help="Only report what would be created")
+    parser.add_argument("--sync", action="store_true", help="Scan the target once and only create what is missing")
+    parser.add_argument("--extra", action="store_true", help="With --sync, list folders that are not in the spec")
+    args = parser.parse_args()
+
+    def progress(done, total, path):
+        print(f"[{done}/{total}] {path}")
+
+    total = folder_spec.count_csv_paths(args.csv)
+    paths = folder_spec.iter_csv_paths(args.csv)
+    if args.sync:
+        summary = sync_folders(args.target, paths, args.workers, args.dry_run, args.extra, progress, total=total)
+    else:
+        summary = create_folders(args.target, paths, args.workers, args.dry_run, progress, total=total)
+    for directory in summary["planned"]:
+        print(f"would create {directory}")
+    for directory in summary.get("extras", []):
+        print(f"not in spec {directory}")
+    for path, error in summary["failures"]:
+        print(f"failed {path}: {error}")
+    print(format_summary(summary, args.dry_run))
+    return 1 if summary[FAILED] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,174 @@
+import re
+import sys
+import csv
+import argparse
+from functools import lru_cache
+
+# "sq010/sh[0010-0500:10]/{comp,fx,lgt}": [start-end:step] is a zero padded
+# number range (width taken from start), {a,b,c} is a list of alternatives.
+# Alternatives may also be separated with "|", which survives unquoted CSV.
+PATTERN_GROUP = re.compile(r"\[(\d+)-(\d+)(?::(\d+))?\]|\{([^{}\[\]]*)\}")
+PATTERN_CHARS = set("[]{}")
+
+# Folder levels built from a CSV with a header row, outermost first
+COLUMNS = ["sequence", "shot", "department", "task"]
+# Joins a row's cells into one pattern so they expand together
+CELL_SEPARATOR = "\x1f"
+
+
+class FolderPattern:
+    # Compiled once into (literal, values, width) groups plus a trailing
+    # literal. Nothing is materialized on expansion, so a spec expanding to
+    # millions of paths is generated in constant memory.
+    def __init__(self, pattern):
+        self.pattern = pattern
+        self.groups = []
+        pos = 0
+        for match in PATTERN_GROUP.finditer(pattern):
+            literal = self._literal(pattern[pos:match.start()])
+            if match.group(4) is not None:
+                self.groups.append((literal, tuple(re.split(r"[,|]", match.group(4))), None))
+            else:
+                start, end, step = match.group(1), match.group(2), match.group(3)
+                step = int(step) if step else 1
+                if step < 1 or int(end) < int(start):
+                    raise ValueError(f"Bad range [{match.group(0)[1:-1]}] in {pattern}")
+                self.groups.append((literal, range(int(start), int(end) + 1, step), len(start)))
+            pos = match.end()
+        self.tail = self._literal(pattern[pos:])
+
+    def _literal(self, text):
+        if PATTERN_CHARS & set(text):
+            raise ValueError(f"Malformed pattern: {self.pattern}")
+        return text
+
+    def __len__(self):
+        size = 1
+        for _, values, _ in self.groups:
+            size *= len(values)
+        return size
+
+    def __iter__(self):
+        if not self.groups:
+            return iter((self.tail,))
+        return self._expand(0, "")
+
+    def _expand(self, level, prefix):
+        literal, values, width = self.groups[level]
+        prefix += literal
+        if level == len(self.groups) - 1:
+            # Innermost group: one str.format per path, run from C by map.
+            # Literals never contain braces, so they are safe in the format.
+            field = "{}" if width is None else f"{{:0{width}d}}"
+            yield from map(f"{prefix}{field}{self.tail}".format, values)
+            return
+        texts = values if width is None else map(f"{{:0{width}d}}".format, values)
+        for text in texts:
+            yield from self._expand(level + 1, prefix + text)
+
+
+@lru_cache(maxsize=4096)
+def compile_pattern(pattern):
+    return FolderPattern(pattern)
+
+
+def expand(pattern):
+    return iter(compile_pattern(pattern))
+
+
+def iter_csv_patterns(csv_path):
+    # Streams (line number, pattern) per row. With a header naming any of
+    # path/sequence/shot/department/task the row's cells are joined into one
+    # path; without one, the first column holds the whole path as before.
+    # A one-column file is only headed when its first cell is exactly
+    # "path", so a folder list starting with e.g. "shot" keeps that folder.
+    with open(csv_path, newline="", encoding="utf-8") as csvfile:
+        csv_reader = csv.reader(csvfile)
+        first = next(csv_reader, None)
+        if first is None:
+            return
+        header = [cell.strip().lower() for cell in first]
+        if len(first) >= 2 or header == ["path"]:
+            names = [name for name in ["path"] + COLUMNS if name in header]
+        else:
+            names = []
+        rows = csv_reader
+        if names:
+            columns = [header.index(name) for name in names]
+        else:
+            columns = [0]
+            rows = _chain_first(first, csv_reader)
+        for row in rows:
+            cells = [row[column].strip() for column in columns if column < len(row)]
+            pattern = "/".join(cell for cell in cells if cell)
+            if pattern:
+                yield csv_reader.line_num, pattern
+
+
+def _chain_first(first, reader):
+    yield first
+    yield from reader
+
+
+def iter_csv_paths(csv_path):
+    for _, pattern in iter_csv_patterns(csv_path):
+        yield from expand(pattern)
+
+
+def iter_csv_records(csv_path):
+    # Rows of a CSV with a header as {column: value} dicts (lowered column
+    # names), for templates. Patterns in any cell expand to one record each.
+    with open(csv_path, newline="", encoding="utf-8") as csvfile:
+        csv_reader = csv.reader(csvfile)
+        header = next(csv_reader, None)
+        if header is None:
+            return
+        names = [cell.strip().lower() for cell in header]
+        for row in csv_reader:
+            cells = [cell.strip() for cell in row[:len(names)]]
+            if not any(cells):
+                continue
+            try:
+                pattern = compile_pattern(CELL_SEPARATOR.join(cells))
+            except ValueError as e:
+                raise ValueError(f"{csv_path} line {csv_reader.line_num}: {e}")
+            for joined in pattern:
+                yield dict(zip(names, joined.split(CELL_SEPARATOR)))
+
+
+def count_csv_paths(csv_path):
+    # Validates every row and sizes the expansion without generating it
+    total = 0
+    for line, pattern in iter_csv_patterns(csv_path):
+        try:
+            total += len(compile_pattern(pattern))
+        except ValueError as e:
+            raise ValueError(f"{csv_path} line {line}: {e}")
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Expand folder patterns such as sq010/sh[0010-0500:10]/{comp,fx,lgt}.")
+    parser.add_argument("pattern", nargs="?", help="Pattern to expand")
+    parser.add_argument("--csv", default=None, help="Expand every row of a Folder Generator CSV instead")
+    parser.add_argument("--count", action="store_true", help="Only print how many paths the spec expands to")
+    args = parser.parse_args()
+
+    if args.csv:
+        if args.count:
+            print(count_csv_paths(args.csv))
+            return
+        paths = iter_csv_paths(args.csv)
+    elif args.pattern:
+        if args.count:
+            print(len(compile_pattern(args.pattern)))
+            return
+        paths = expand(args.pattern)
+    else:
+        parser.error("give a pattern or --csv")
+    for path in paths:
+        print(path)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,153 @@
+import re
+import sys
+import json
+import string
+import argparse
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+import folder_spec
+import folder_builder
+
+IF_KEY = "$if"
+CONDITION = re.compile(r"^\s*(\w+)\s*(?:(==|!=|\bin\b)\s*(.*?))?\s*$")
+FALSE_VALUES = ("", "0", "false", "no", "off")
+
+
+class TemplateError(Exception):
+    pass
+
+
+def parse_condition(text):
+    # "fx" (set and not false/0/no), "department == fx", "department != fx",
+    # "department in comp,fx,lgt"
+    match = CONDITION.match(str(text))
+    if not match:
+        raise TemplateError(f"Bad condition: {text}")
+    name, op, value = match.groups()
+    if op is None:
+        return name, "set", None
+    if op == "in":
+        return name, "in", frozenset(item.strip() for item in value.split(","))
+    return name, op, value.strip().strip("'\"")
+
+
+def check_condition(condition, values):
+    name, op, expected = condition
+    value = str(values.get(name, ""))
+    if op == "set":
+        return value.lower() not in FALSE_VALUES
+    if op == "==":
+        return value == expected
+    if op == "!=":
+        return value != expected
+    return value in expected
+
+
+class FolderTemplate:
+    # The nested tree is compiled once into blocks of path format strings
+    # that share the same conditions. Expanding a shot then costs one
+    # format_map per block (the block's paths are joined with newlines and
+    # split afterwards) instead of one per folder.
+    def __init__(self, tree, variables=None):
+        self.variables = dict(variables or {})
+        self.fields = set()
+        entries = []
+        self._compile(tree, "", (), entries)
+        blocks = []
+        for conditions, path in entries:
+            if blocks and blocks[-1][0] == conditions:
+                blocks[-1][1].append(path)
+            else:
+                blocks.append((conditions, [path]))
+        self.blocks = [(conditions, "\n".join(paths)) for conditions, paths in blocks]
+        self.size = len(entries)
+
+    def __len__(self):
+        return self.size
+
+    def _compile(self, node, prefix, conditions, entries):
+        if node is None:
+            return
+        if isinstance(node, list):
+            node = {name: None for name in node}
+        if not isinstance(node, dict):
+            raise TemplateError(f"Expected folders under {prefix or 'the root'}, got {node!r}")
+        for name, child in node.items():
+            if name == IF_KEY:
+                continue
+            name = str(name).strip("/\\")
+            if not name or "\n" in name:
+                raise TemplateError(f"Bad folder name under {prefix or 'the root'}: {name!r}")
+            try:
+                self.fields.update(field for _, field, _, _ in string.Formatter().parse(name) if field)
+            except ValueError as e:
+                raise TemplateError(f"Bad folder name {name!r}: {e}")
+            child_conditions = conditions
+            if isinstance(child, dict) and IF_KEY in child:
+                child_conditions = conditions + (parse_condition(child[IF_KEY]),)
+            path = f"{prefix}/{name}" if prefix else name
+            entries.append((child_conditions, path))
+            self._compile(child, path, child_conditions, entries)
+
+    def expand(self, records):
+        defaults = self.variables
+        blocks = self.blocks
+        for record in records:
+            values = dict(defaults)
+            values.update(record)
+            try:
+                for conditions, block in blocks:
+                    if all(check_condition(condition, values) for condition in conditions):
+                        yield from block.format_map(values).split("\n")
+            except KeyError as e:
+                raise TemplateError(f"Template variable {e} is not set for {record}")
+
+
+def load_template(path, variables=None):
+    # {"variables": {...}, "tree": {...}}, or just the tree. YAML needs PyYAML.
+    with open(path, encoding="utf-8") as f:
+        if path.lower().endswith((".yaml", ".yml")):
+            if yaml is None:
+                raise TemplateError("PyYAML is not installed; use a .json template or pip install pyyaml")
+            data = yaml.safe_load(f)
+        else:
+            data = json.load(f)
+    if isinstance(data, dict) and "tree" in data:
+        tree = data["tree"]
+        defaults = dict(data.get("variables") or {})
+    else:
+        tree = data
+        defaults = {}
+    defaults.update(variables or {})
+    return FolderTemplate(tree, defaults)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Create a folder template for every shot listed in a CSV.")
+    parser.add_argument("template", help="Template .json/.yaml, e.g. templates/shot.json")
+    parser.add_argument("csv", help="CSV with a header row; columns become template variables")
+    parser.add_argument("--target", default=None, help="Create the folders here (otherwise just print them)")
+    parser.add_argument("--set", action="append", default=[], metavar="NAME=VALUE", help="Override a template variable")
+    parser.add_argument("-n", "--dry-run", action="store_true", help="With --target, only report what would be created")
+    args = parser.parse_args()
+
+    variables = dict(item.split("=", 1) for item in args.set)
+    template = load_template(args.template, variables)
+    paths = template.expand(folder_spec.iter_csv_records(args.csv))
+    if args.target is None:
+        for path in paths:
+            print(path)
+        return
+    summary = folder_builder.create_folders(args.target, paths, dry_run=args.dry_run)
+    for path, error in summary["failures"]:
+        print(f"failed {path}: {error}")
+    print(folder_builder.format_summary(summary, args.dry_run))
+    return 1 if summary[folder_builder.FAILED] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,185 @@
+import os
+import re
+import sys
+import mmap
+import hashlib
+from collections import namedtuple
+
+# .hip files are ASCII (odc) cpio archives: a 76 byte octal header, the
+# NUL terminated entry name, then the entry data.
+MAGIC = b"070707"
+HEADER_SIZE = 76
+TRAILER = "TRAILER!!!"
+
+PARM_LINE = re.compile(r"^(\S+)\s+\[[^\]]*\]\s+\((.*)\)\s*$")
+
+HipEntry = namedtuple("HipEntry", "name offset size header")
+
+
+class HipArchiveError(Exception):
+    pass
+
+
+def parse_parm_block(text):
+    parms = {}
+    for line in text.splitlines():
+        match = PARM_LINE.match(line.strip())
+        if match:
+            parms[match.group(1)] = match.group(2).strip()
+    return parms
+
+
+def parse_init_block(text):
+    values = {}
+    for line in text.splitlines():
+        key, sep, value = line.partition("=")
+        if sep:
+            values[key.strip()] = value.strip()
+    return values
+
+
+class HipArchive:
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "rb")
+        try:
+            if os.fstat(self.file.fileno()).st_size == 0:
+                raise HipArchiveError(f"Empty file: {path}")
+            self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self.file.close()
+            raise
+        self.entries = {}
+        self.order = []
+        self._nodes = None
+        try:
+            self._build_index()
+        except Exception:
+            self.close()
+            raise
+
+    def _build_index(self):
+        data = self.data
+        size = len(data)
+        pos = 0
+        while pos + HEADER_SIZE <= size:
+            header = data[pos:pos + HEADER_SIZE]
+            if header[:6] != MAGIC:
+                raise HipArchiveError(f"Not a cpio hip archive (bad header at offset {pos}): {self.path}")
+            try:
+                name_size = int(header[59:65], 8)
+                data_size = int(header[65:76], 8)
+            except ValueError:
+                raise HipArchiveError(f"Corrupt cpio header at offset {pos}: {self.path}")
+            name_start = pos + HEADER_SIZE
+            data_start = name_start + name_size
+            name = data[name_start:data_start - 1].decode("utf-8", "replace")
+            if name == TRAILER:
+                return
+            entry = HipEntry(name, data_start, data_size, pos)
+            self.entries[name] = entry
+            self.order.append(entry)
+            pos = data_start + data_size
+        raise HipArchiveError(f"Truncated hip archive (no trailer): {self.path}")
+
+    def close(self):
+        if getattr(self, "data", None) is not None:
+            self.data.close()
+            self.data = None
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def read(self, name):
+        entry = self.entries.get(name)
+        if entry is None:
+            return None
+        return self.data[entry.offset:entry.offset + entry.size]
+
+    def text(self, name):
+        raw = self.read(name)
+        return None if raw is None else raw.decode("utf-8", "replace")
+
+    def digest(self, name):
+        # Hash an entry straight from the mapping without copying it
+        entry = self.entries.get(name)
+        if entry is None:
+            return None
+        view = memoryview(self.data)
+        try:
+            chunk = view[entry.offset:entry.offset + entry.size]
+            try:
+                return hashlib.blake2b(chunk, digest_size=16).digest()
+            finally:
+                chunk.release()
+        finally:
+            view.release()
+
+    def _index_nodes(self):
+        nodes = {}
+        for entry in self.order:
+            name = entry.name
+            if name.startswith("."):
+                continue
+            base, ext = os.path.splitext(name)
+            path = "/" + base
+            if ext in (".init", ".def") and path not in nodes:
+                nodes[path] = None
+        for path in nodes:
+            init = self.text(path[1:] + ".init")
+            if init is not None:
+                nodes[path] = parse_init_block(init).get("type")
+            elif path.count("/") == 1:
+                # Network managers (/obj, /out, ...) are saved without an .init.
+                nodes[path] = path[1:]
+        self._nodes = nodes
+
+    def node_paths(self):
+        if self._nodes is None:
+            self._index_nodes()
+        return list(self._nodes)
+
+    def node_types(self):
+        if self._nodes is None:
+            self._index_nodes()
+        return dict(self._nodes)
+
+    def node_type(self, node_path):
+        if self._nodes is None:
+            self._index_nodes()
+        return self._nodes.get(node_path)
+
+    def parm_block(self, node_path):
+        return self.text(node_path.lstrip("/") + ".parm")
+
+    def parms(self, node_path):
+        block = self.parm_block(node_path)
+        return parse_parm_block(block) if block else {}
+
+    def frame_range(self):
+        for line in (self.text(".start") or "").splitlines():
+            parts = line.split()
+            if len(parts) == 3 and parts[0] == "frange":
+                return [float(parts[1]), float(parts[2])]
+        return None
+
+    def variables(self):
+        values = {}
+        for line in (self.text(".variables") or "").splitlines():
+            match = re.match(r"set -g (\S+) = '(.*)'$", line.strip())
+            if match:
+                values[match.group(1)] = match.group(2)
+        return values
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python hip_archive.py <file.hip>")
+        sys.exit(1)
+    with HipArchive(sys.argv[1]) as archive:
+        for node_path, node_type in archive.node_types().items():
+            print(f"{node_path}\t{node_type or ''}")
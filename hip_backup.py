@@ -0,0 +1,275 @@
+import os
+import sys
+import gzip
+import json
+import time
+import zlib
+import hashlib
+import argparse
+
+from hip_archive import HipArchive, HipArchiveError
+
+STORE_DIR = ".hipstore"
+COMPRESS_LEVEL = 6
+
+
+class HipBackupError(Exception):
+    pass
+
+
+def default_store(hip_path):
+    return os.path.join(os.path.dirname(os.path.abspath(hip_path)), "backup", STORE_DIR)
+
+
+def scene_name(hip_path):
+    return os.path.splitext(os.path.basename(hip_path))[0]
+
+
+def version_number(version):
+    # v0001, v0002, ... past v9999 the names get longer, so compare numbers
+    return int(version[1:])
+
+
+def write_atomic(path, data):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+class HipBackupStore:
+    # Every cpio entry body is stored once under its blake2b digest,
+    # zlib compressed. A version is a small manifest listing the raw entry
+    # headers (they carry the save time, so they differ on every save) and
+    # the digest of each body, which is enough to rebuild the file byte for
+    # byte. Saving only writes the bodies the store has not seen yet.
+    def __init__(self, root):
+        self.root = root
+        self.objects_dir = os.path.join(root, "objects")
+        self.manifests_dir = os.path.join(root, "manifests")
+
+    def object_path(self, digest):
+        return os.path.join(self.objects_dir, digest[:2], digest[2:])
+
+    def has_object(self, digest):
+        return os.path.exists(self.object_path(digest))
+
+    def put_object(self, digest, data):
+        path = self.object_path(digest)
+        if os.path.exists(path):
+            return 0
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        compressed = zlib.compress(data, COMPRESS_LEVEL)
+        write_atomic(path, compressed)
+        return len(compressed)
+
+    def get_object(self, digest):
+        try:
+            with open(self.object_path(digest), "rb") as f:
+                data = zlib.decompress(f.read())
+        except (OSError, zlib.error) as e:
+            raise HipBackupError(f"Missing or corrupt chunk {digest}: {e}")
+        if hashlib.blake2b(data, digest_size=16).hexdigest() != digest:
+            raise HipBackupError(f"Chunk {digest} does not match its digest")
+        return data
+
+    def versions(self, scene):
+        folder = os.path.join(self.manifests_dir, scene)
+        if not os.path.isdir(folder):
+            return []
+        names = [name[:-len(".json.gz")] for name in os.listdir(folder) if name.endswith(".json.gz")]
+        return sorted((name for name in names if name[:1] == "v" and name[1:].isdigit()), key=version_number)
+
+    def scenes(self):
+        if not os.path.isdir(self.manifests_dir):
+            return []
+        return sorted(os.listdir(self.manifests_dir))
+
+    def manifest_path(self, scene, version):
+        return os.path.join(self.manifests_dir, scene, f"{version}.json.gz")
+
+    def load_manifest(self, scene, version):
+        try:
+            with gzip.open(self.manifest_path(scene, version), "rt", encoding="utf-8") as f:
+                return json.load(f)
+        except OSError as e:
+            raise HipBackupError(f"No version {version} of {scene}: {e}")
+
+    def save(self, hip_path, scene=None):
+        scene = scene or scene_name(hip_path)
+        start = time.perf_counter()
+        entries = []
+        written = 0
+        new_chunks = 0
+        with HipArchive(hip_path) as archive:
+            view = memoryview(archive.data)
+            try:
+                for entry in archive.order:
+                    digest = archive.digest(entry.name).hex()
+                    if not self.has_object(digest):
+                        body = view[entry.offset:entry.offset + entry.size]
+                        try:
+                            written += self.put_object(digest, body)
+                        finally:
+                            body.release()
+                        new_chunks += 1
+                    head = archive.data[entry.header:entry.offset].decode("latin-1")
+                    entries.append([head, digest])
+                last = archive.order[-1] if archive.order else None
+                tail_start = last.offset + last.size if last else 0
+                tail = archive.data[tail_start:]
+            finally:
+                view.release()
+            size = len(archive.data)
+        tail_digest = hashlib.blake2b(tail, digest_size=16).hexdigest()
+        if not self.has_object(tail_digest):
+            written += self.put_object(tail_digest, tail)
+            new_chunks += 1
+
+        versions = self.versions(scene)
+        if versions:
+            latest = self.load_manifest(scene, versions[-1])
+            if latest["entries"] == entries and latest["tail"] == tail_digest:
+                return {"scene": scene, "version": versions[-1], "unchanged": True, "size": size,
+                        "written": 0, "new_chunks": 0, "seconds": time.perf_counter() - start}
+        version = f"v{version_number(versions[-1]) + 1 if versions else 1:04d}"
+        manifest = {
+            "source": os.path.abspath(hip_path),
+            "saved": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "size": size,
+            "entries": entries,
+            "tail": tail_digest,
+        }
+        os.makedirs(os.path.join(self.manifests_dir, scene), exist_ok=True)
+        write_atomic(self.manifest_path(scene, version),
+                     gzip.compress(json.dumps(manifest).encode("utf-8"), COMPRESS_LEVEL))
+        return {"scene": scene, "version": version, "unchanged": False, "size": size,
+                "written": written, "new_chunks": new_chunks, "seconds": time.perf_counter() - start}
+
+    def restore(self, scene, version, output):
+        manifest = self.load_manifest(scene, version)
+        tmp_path = f"{output}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                for head, digest in manifest["entries"]:
+                    f.write(head.encode("latin-1"))
+                    f.write(self.get_object(digest))
+                f.write(self.get_object(manifest["tail"]))
+                size = f.tell()
+            if size != manifest["size"]:
+                raise HipBackupError(f"Rebuilt {size} bytes, expected {manifest['size']}")
+            os.replace(tmp_path, output)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return size
+
+    def referenced(self):
+        digests = set()
+        for scene in self.scenes():
+            for version in self.versions(scene):
+                manifest = self.load_manifest(scene, version)
+                digests.update(digest for _, digest in manifest["entries"])
+                digests.add(manifest["tail"])
+        return digests
+
+    def stats(self):
+        logical = 0
+        versions = 0
+        for scene in self.scenes():
+            for version in self.versions(scene):
+                logical += self.load_manifest(scene, version)["size"]
+                versions += 1
+        stored = 0
+        chunks = 0
+        for dirpath, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                stored += os.path.getsize(os.path.join(dirpath, filename))
+                chunks += dirpath.startswith(self.objects_dir)
+        return {"versions": versions, "chunks": chunks, "logical": logical, "stored": stored}
+
+    def prune(self, scene, keep):
+        # Drop all but the newest keep versions, then any chunk nothing uses
+        if keep < 1:
+            raise HipBackupError(f"keep must be at least 1, got {keep}")
+        removed = 0
+        for version in self.versions(scene)[:-keep]:
+            os.remove(self.manifest_path(scene, version))
+            removed += 1
+        return removed, self.collect_garbage()
+
+    def collect_garbage(self):
+        used = self.referenced()
+        freed = 0
+        if not os.path.isdir(self.objects_dir):
+            return freed
+        for prefix in os.listdir(self.objects_dir):
+            folder = os.path.join(self.objects_dir, prefix)
+            for name in os.listdir(folder):
+                if prefix + name not in used:
+                    path = os.path.join(folder, name)
+                    freed += os.path.getsize(path)
+                    os.remove(path)
+        return freed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Deduplicated, compressed backups of .hip files.")
+    parser.add_argument("--store", default=None, help="Store directory (default: backup/.hipstore next to the hip)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    save_parser = commands.add_parser("save", help="Back up one or more .hip files")
+    save_parser.add_argument("hips", nargs="+")
+    save_parser.add_argument("--scene", default=None, help="Store under this scene name, e.g. to import hip/backup/test_bak*.hip as test")
+
+    list_parser = commands.add_parser("list", help="List the stored versions of a scene")
+    list_parser.add_argument("scene", nargs="?")
+
+    restore_parser = commands.add_parser("restore", help="Rebuild a stored version")
+    restore_parser.add_argument("scene")
+    restore_parser.add_argument("version")
+    restore_parser.add_argument("output")
+
+    prune_parser = commands.add_parser("prune", help="Keep only the newest versions of a scene")
+    prune_parser.add_argument("scene")
+    prune_parser.add_argument("--keep", type=int, default=10)
+
+    commands.add_parser("stats", help="Show logical vs stored size")
+    args = parser.parse_args()
+
+    store_root = args.store
+    if store_root is None:
+        store_root = default_store(args.hips[0]) if args.command == "save" else os.path.join("hip", "backup", STORE_DIR)
+    store = HipBackupStore(store_root)
+
+    try:
+        if args.command == "save":
+            for hip in args.hips:
+                result = store.save(hip, args.scene)
+                if result["unchanged"]:
+                    print(f"{hip}: unchanged, same as {result['scene']} {result['version']}")
+                else:
+                    print(f"{hip}: {result['scene']} {result['version']}, {result['new_chunks']} new chunks, "
+                          f"{result['written']} of {result['size']} bytes written in {result['seconds']:.3f}s")
+        elif args.command == "list":
+            for scene in [args.scene] if args.scene else store.scenes():
+                for version in store.versions(scene):
+                    manifest = store.load_manifest(scene, version)
+                    print(f"{scene}\t{version}\t{manifest['saved']}\t{manifest['size']}\t{manifest['source']}")
+        elif args.command == "restore":
+            size = store.restore(args.scene, args.version, args.output)
+            print(f"Restored {args.scene} {args.version} to {args.output} ({size} bytes)")
+        elif args.command == "prune":
+            removed, freed = store.prune(args.scene, args.keep)
+            print(f"Removed {removed} versions, freed {freed} bytes")
+        elif args.command == "stats":
+            stats = store.stats()
+            print(f"{stats['versions']} versions, {stats['chunks']} chunks: "
+                  f"{stats['logical']} bytes of hips stored in {stats['stored']} bytes")
+    except (OSError, HipArchiveError, HipBackupError) as e:
+        print(f"Error: {e}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
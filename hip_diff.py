@@ -0,0 +1,171 @@
+import os
+import sys
+import time
+import json
+import argparse
+
+from hip_archive import HipArchive, parse_parm_block, parse_init_block
+
+
+def split_entry(name):
+    # "obj/geo/null.parm" -> ("/obj/geo/null", "parm"); scene level entries
+    # such as ".variables" have no node.
+    if name.startswith("."):
+        return None, name
+    base, ext = os.path.splitext(name)
+    return "/" + base, ext[1:]
+
+
+def def_block(text, block):
+    lines = text.splitlines()
+    try:
+        start = lines.index(block) + 2
+    except ValueError:
+        return []
+    end = lines.index("}", start) if "}" in lines[start:] else len(lines)
+    return [line.strip() for line in lines[start:end] if line.strip()]
+
+
+def parse_inputs(text):
+    inputs = {}
+    for line in def_block(text, "inputs"):
+        parts = line.split()
+        if len(parts) >= 2:
+            inputs[parts[0]] = " ".join(parts[1:])
+    return inputs
+
+
+def parse_flags(text):
+    for line in text.splitlines():
+        if line.startswith("flags ="):
+            words = line.split("=", 1)[1].split()
+            return dict(zip(words[::2], words[1::2]))
+    return {}
+
+
+def changed_keys(old, new):
+    return [(key, old.get(key), new.get(key)) for key in sorted(set(old) | set(new)) if old.get(key) != new.get(key)]
+
+
+def entry_changed(old, new, name):
+    a = old.entries.get(name)
+    b = new.entries.get(name)
+    if a is None or b is None:
+        return a is not b
+    if a.size != b.size:
+        return True
+    return old.digest(name) != new.digest(name)
+
+
+def diff_archives(old, new):
+    start = time.perf_counter()
+    old_nodes = old.node_types()
+    new_nodes = new.node_types()
+    result = {
+        "added": [path for path in new_nodes if path not in old_nodes],
+        "removed": [path for path in old_nodes if path not in new_nodes],
+        "type_changed": [],
+        "parms": {},
+        "channels": [],
+        "wiring": {},
+        "flags": {},
+        "sections": [],
+        "entries": 0,
+        "unchanged": 0,
+    }
+    names = list(old.entries) + [name for name in new.entries if name not in old.entries]
+    for name in names:
+        result["entries"] += 1
+        if not entry_changed(old, new, name):
+            result["unchanged"] += 1
+            continue
+        node, section = split_entry(name)
+        if node is None:
+            result["sections"].append(name)
+            continue
+        if node not in old_nodes or node not in new_nodes:
+            continue
+        old_text = old.text(name) or ""
+        new_text = new.text(name) or ""
+        if section == "init":
+            old_type = parse_init_block(old_text).get("type")
+            new_type = parse_init_block(new_text).get("type")
+            if old_type != new_type:
+                result["type_changed"].append((node, old_type, new_type))
+        elif section == "parm":
+            changes = changed_keys(parse_parm_block(old_text), parse_parm_block(new_text))
+            if changes:
+                result["parms"][node] = changes
+        elif section == "chn":
+            result["channels"].append(node)
+        elif section == "def":
+            # Only wiring and flags; position and the stat block change on
+            # every save and are not interesting
+            wiring = changed_keys(parse_inputs(old_text), parse_inputs(new_text))
+            if wiring:
+                result["wiring"][node] = wiring
+            flags = changed_keys(parse_flags(old_text), parse_flags(new_text))
+            if flags:
+                result["flags"][node] = flags
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
+def diff_files(old_path, new_path):
+    with HipArchive(old_path) as old, HipArchive(new_path) as new:
+        return diff_archives(old, new)
+
+
+def format_diff(result):
+    lines = []
+    if result["added"]:
+        lines.append(f"Nodes added ({len(result['added'])}):")
+        lines.extend(f"  + {path}" for path in result["added"])
+    if result["removed"]:
+        lines.append(f"Nodes removed ({len(result['removed'])}):")
+        lines.extend(f"  - {path}" for path in result["removed"])
+    if result["type_changed"]:
+        lines.append("Node types changed:")
+        lines.extend(f"  ~ {path}: {old} -> {new}" for path, old, new in result["type_changed"])
+    if result["parms"]:
+        lines.append("Parameters changed:")
+        for path, changes in result["parms"].items():
+            lines.append(f"  {path}")
+            lines.extend(f"    {name}: {old} -> {new}" for name, old, new in changes)
+    if result["channels"]:
+        lines.append("Animation channels changed:")
+        lines.extend(f"  {path}" for path in result["channels"])
+    if result["wiring"]:
+        lines.append("Wiring changed:")
+        for path, changes in result["wiring"].items():
+            lines.extend(f"  {path} input {index}: {old or '(none)'} -> {new or '(none)'}" for index, old, new in changes)
+    if result["flags"]:
+        lines.append("Flags changed:")
+        for path, changes in result["flags"].items():
+            lines.extend(f"  {path} {flag}: {old} -> {new}" for flag, old, new in changes)
+    if result["sections"]:
+        lines.append("Scene sections changed: " + ", ".join(result["sections"]))
+    if len(lines) == 0:
+        lines.append("No node changes.")
+    lines.append(
+        f"Compared {result['entries']} sections, {result['unchanged']} unchanged, in {result['seconds']:.2f}s"
+    )
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Node and parameter level diff of two .hip files.")
+    parser.add_argument("old", help="Older .hip, e.g. hip/backup/test_bak1.hip")
+    parser.add_argument("new", help="Newer .hip, e.g. hip/test.hip")
+    parser.add_argument("--json", action="store_true", help="Print the diff as JSON")
+    args = parser.parse_args()
+
+    result = diff_files(args.old, args.new)
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print(format_diff(result))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,168 @@
+import os
+import sys
+import csv
+import json
+import time
+import fnmatch
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from hython_client import HythonWorker, HythonError
+from hip_archive import HipArchive, HipArchiveError
+
+HIP_EXTENSIONS = (".hip", ".hipnc", ".hiplc")
+REPORT_COLUMNS = ["hip", "status", "frame_range", "node", "type", "parm", "value", "seconds", "error"]
+
+
+def find_hips(root):
+    for dirpath, dirnames, filenames in os.walk(root):
+        # Rolling backups are copies of the scene next to it, not shots
+        dirnames[:] = sorted(name for name in dirnames if name != "backup")
+        for filename in sorted(filenames):
+            if filename.lower().endswith(HIP_EXTENSIONS):
+                yield os.path.join(dirpath, filename)
+
+
+def query_archive(hip, nodes, parms):
+    # Same result shape as the hython "query" command, but from the raw
+    # archive: parm values are unevaluated and keyed by parm tuple name.
+    with HipArchive(hip) as archive:
+        patterns = nodes or ["*"]
+        rows = []
+        for node_path, node_type in archive.node_types().items():
+            if not any(fnmatch.fnmatchcase(node_path, pattern) for pattern in patterns):
+                continue
+            raw = archive.parms(node_path) if parms else {}
+            rows.append({"node": node_path, "type": node_type, "parms": {name: raw.get(name) for name in parms}})
+        return {"frame_range": archive.frame_range(), "nodes": rows}
+
+
+def result_rows(hip, result, seconds, error=""):
+    if error:
+        return [dict(hip=hip, status="error", seconds=f"{seconds:.3f}", error=error)]
+    frame_range = result["frame_range"]
+    frame_range = "" if frame_range is None else "-".join(f"{frame:g}" for frame in frame_range)
+    if not result["nodes"]:
+        return [dict(hip=hip, status="missing", frame_range=frame_range, seconds=f"{seconds:.3f}")]
+    rows = []
+    for node in result["nodes"]:
+        base = dict(hip=hip, status="ok", frame_range=frame_range, node=node["node"],
+                    type=node["type"] or "", seconds=f"{seconds:.3f}")
+        if not node["parms"]:
+            rows.append(base)
+        for name, value in node["parms"].items():
+            rows.append(dict(base, parm=name, value="" if value is None else value,
+                             status="ok" if value is not None else "no parm"))
+    return rows
+
+
+class CsvReport:
+    def __init__(self, path):
+        self.file = open(path, "w", newline="", encoding="utf-8")
+        self.writer = csv.DictWriter(self.file, fieldnames=REPORT_COLUMNS, restval="")
+        self.writer.writeheader()
+
+    def write(self, rows):
+        self.writer.writerows(rows)
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class JsonLinesReport:
+    def __init__(self, path):
+        self.file = open(path, "w", encoding="utf-8")
+
+    def write(self, rows):
+        for row in rows:
+            self.file.write(json.dumps({column: row.get(column, "") for column in REPORT_COLUMNS}) + "\n")
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+def open_report(path):
+    if path.lower().endswith((".json", ".jsonl")):
+        return JsonLinesReport(path)
+    return CsvReport(path)
+
+
+def scan(root, output, nodes=None, parms=None, hython_path=None, workers=None, progress=None, cancelled=None):
+    # Runs the query over every hip under root on a pool of hython workers
+    # (one process per thread), or straight from the archives when no hython
+    # path is given. Rows are written as each file finishes; a failing file
+    # only produces an error row.
+    nodes = nodes or []
+    parms = parms or []
+    workers = workers or os.cpu_count() or 1
+    local = threading.local()
+    hython_workers = []
+    lock = threading.Lock()
+
+    def query(hip):
+        start = time.perf_counter()
+        try:
+            if hython_path:
+                worker = getattr(local, "worker", None)
+                if worker is None:
+                    worker = local.worker = HythonWorker(hython_path)
+                    with lock:
+                        hython_workers.append(worker)
+                result = worker.request("query", hip=os.path.abspath(hip), nodes=nodes, parms=parms)
+            else:
+                result = query_archive(hip, nodes, parms)
+            return result_rows(hip, result, time.perf_counter() - start)
+        except (OSError, HipArchiveError, HythonError) as e:
+            return result_rows(hip, None, time.perf_counter() - start, str(e))
+        except Exception as e:
+            # A malformed file or reply only fails its own row, never the scan
+            return result_rows(hip, None, time.perf_counter() - start, f"{type(e).__name__}: {e}")
+
+    report = open_report(output)
+    summary = {"files": 0, "ok": 0, "missing": 0, "error": 0}
+    try:
+        hips = list(find_hips(root))
+        pool = ThreadPoolExecutor(max_workers=workers)
+        try:
+            futures = [pool.submit(query, hip) for hip in hips]
+            for future in as_completed(futures):
+                if cancelled is not None and cancelled():
+                    break
+                rows = future.result()
+                report.write(rows)
+                summary["files"] += 1
+                status = rows[0]["status"]
+                summary[status if status in summary else "ok"] += 1
+                if progress is not None:
+                    progress(summary["files"], len(hips), rows[0]["hip"])
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+    finally:
+        report.close()
+        for worker in hython_workers:
+            worker.stop()
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query nodes and parms across every .hip under a directory.")
+    parser.add_argument("root", help="Directory to scan for .hip/.hipnc files")
+    parser.add_argument("-n", "--node", action="append", default=[], help="Node path or glob, e.g. /obj/*/rop_geometry1 (repeatable)")
+    parser.add_argument("-p", "--parm", action="append", default=[], help="Parameter to report for each node (repeatable)")
+    parser.add_argument("-o", "--output", default="hip_scan.csv", help="Report path, .csv or .jsonl")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="Parallel workers (default: CPU count)")
+    parser.add_argument("--hython", default=None, help="Evaluate with this hython; without it values are read raw from the archives")
+    args = parser.parse_args()
+
+    def progress(done, total, hip):
+        print(f"[{done}/{total}] {hip}")
+
+    summary = scan(args.root, args.output, args.node, args.parm, args.hython, args.workers, progress)
+    print(f"{summary['files']} files: {summary['ok']} ok, {summary['missing']} missing, {summary['error']} failed -> {args.output}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
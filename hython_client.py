@@ -0,0 +1,115 @@
+import os
+import sys
+import json
+import threading
+import subprocess
+from collections import deque
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "hython_worker.py")
+
+
+class HythonError(Exception):
+    pass
+
+
+def hython_from_houdini(houdini_path):
+    houdini_bin_dir = os.path.dirname(houdini_path)
+    name = "hython.exe" if houdini_path.lower().endswith(".exe") else "hython"
+    return os.path.join(houdini_bin_dir, name)
+
+
+class HythonWorker:
+    def __init__(self, hython_path):
+        self.hython_path = hython_path
+        self.proc = None
+        self.lock = threading.Lock()
+        self.next_id = 0
+        self.stderr_tail = deque(maxlen=50)
+
+    def is_running(self):
+        return self.proc is not None and self.proc.poll() is None
+
+    def start(self):
+        if self.is_running():
+            return
+        if not os.path.isfile(self.hython_path):
+            raise HythonError(f"hython not found: {self.hython_path}")
+        creationflags = subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0
+        self.proc = subprocess.Popen(
+            [self.hython_path, WORKER_SCRIPT],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            encoding="utf-8",
+            bufsize=1,
+            creationflags=creationflags,
+        )
+        self.stderr_tail.clear()
+        threading.Thread(target=self._drain_stderr, args=(self.proc,), daemon=True).start()
+
+    def _drain_stderr(self, proc):
+        for line in proc.stderr:
+            self.stderr_tail.append(line.rstrip())
+
+    def request(self, cmd, on_partial=None, **args):
+        # Commands that stream (e.g. "nodes" with a chunk size) send partial
+        # replies before the final one; each is handed to on_partial.
+        with self.lock:
+            self.start()
+            self.next_id += 1
+            request = dict(args, cmd=cmd, id=self.next_id)
+            try:
+                self.proc.stdin.write(json.dumps(request) + "\n")
+                self.proc.stdin.flush()
+            except OSError:
+                pass
+            # Keep reading to the final reply even if on_partial raises, so
+            # the next request does not pick up this one's leftovers.
+            partial_error = None
+            while True:
+                reply = self._read_reply()
+                if not reply.get("partial"):
+                    break
+                if on_partial is not None and partial_error is None:
+                    try:
+                        on_partial(reply["result"])
+                    except Exception as e:
+                        partial_error = e
+        if partial_error is not None:
+            raise partial_error
+        if not reply["ok"]:
+            raise HythonError(reply["error"])
+        return reply["result"]
+
+    def _read_reply(self):
+        try:
+            line = self.proc.stdout.readline()
+        except OSError:
+            line = ""
+        if not line:
+            self.proc.wait()
+            self.proc = None
+            raise HythonError("hython worker exited:\n" + "\n".join(self.stderr_tail))
+        return json.loads(line)
+
+    def stop(self):
+        if not self.lock.acquire(timeout=1):
+            # A request is still running; killing the process unblocks it
+            proc = self.proc
+            if proc is not None:
+                proc.kill()
+            return
+        try:
+            if not self.is_running():
+                self.proc = None
+                return
+            try:
+                self.proc.stdin.write(json.dumps({"cmd": "quit"}) + "\n")
+                self.proc.stdin.close()
+                self.proc.wait(timeout=5)
+            except (OSError, subprocess.TimeoutExpired):
+                self.proc.kill()
+            self.proc = None
+        finally:
+            self.lock.release()
@@ -0,0 +1,40 @@
+import sys
+import time
+import hou
+
+from render_frames import parse_frames
+
+# Renders one chunk of a ROP inside hython:
+#   hython hython_render.py <file.hip> <rop path> <frames>
+# where frames is a spec like "1-24" or "5,9,12-14". Frames are rendered one
+# at a time and each one is reported on stdout as "FRAME <frame> <seconds>",
+# so the render queue can follow progress while the chunk runs.
+
+
+def main():
+    if len(sys.argv) != 4:
+        print("Usage: hython hython_render.py <file.hip> <rop path> <frames>")
+        return 2
+    hip_path, rop_path, spec = sys.argv[1:]
+    frames = parse_frames(spec)
+    hou.hipFile.load(hip_path, suppress_save_prompt=True, ignore_load_warnings=True)
+    rop = hou.node(rop_path)
+    if rop is None:
+        print(f"ERROR ROP not found: {rop_path}", flush=True)
+        return 1
+    print(f"CHUNK {rop_path} {spec} {len(frames)} frames", flush=True)
+    start = time.perf_counter()
+    for frame in frames:
+        frame_start = time.perf_counter()
+        try:
+            rop.render(frame_range=(frame, frame), verbose=False)
+        except hou.OperationFailed as e:
+            print(f"ERROR frame {frame}: {e}", flush=True)
+            return 1
+        print(f"FRAME {frame} {time.perf_counter() - frame_start:.3f}", flush=True)
+    print(f"CHUNK DONE {time.perf_counter() - start:.3f}", flush=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
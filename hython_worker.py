@@ -0,0 +1,223 @@
+import os
+import sys
+import json
+import time
+import fnmatch
+import hou
+
+# Long-lived hython process driven by hython_client.HythonWorker.
+# One JSON request per line on stdin, one JSON reply per line on stdout.
+
+current_hip = {"path": None, "mtime": None}
+protocol = None
+PARTIAL_INTERVAL = 0.2
+
+
+def ensure_hip(path):
+    mtime = os.path.getmtime(path)
+    if current_hip["path"] != path or current_hip["mtime"] != mtime:
+        hou.hipFile.load(path, suppress_save_prompt=True, ignore_load_warnings=True)
+        current_hip["path"] = path
+        current_hip["mtime"] = mtime
+
+
+def get_node(path):
+    node = hou.node(path)
+    if node is None:
+        raise ValueError(f"Node not found: {path}")
+    return node
+
+
+def get_parm(node, name):
+    parm = node.parm(name)
+    if parm is None:
+        raise ValueError(f"Parameter not found: {node.path()}/{name}")
+    return parm
+
+
+def coerce_value(parm, value):
+    data_type = parm.parmTemplate().dataType()
+    if data_type == hou.parmData.Float:
+        return float(value)
+    if data_type == hou.parmData.Int:
+        return int(value)
+    return value
+
+
+def cmd_ping(request):
+    return hou.applicationVersionString()
+
+
+def cmd_load(request):
+    ensure_hip(request["hip"])
+    return hou.hipFile.path()
+
+
+def write_reply(reply):
+    protocol.write(json.dumps(reply) + "\n")
+    protocol.flush()
+
+
+def send_partial(request, result):
+    write_reply({"id": request.get("id"), "ok": True, "partial": True, "result": result})
+
+
+def cmd_nodes(request):
+    # Depth-first walk that sends [path, type] pairs as partial replies every
+    # "chunk" nodes (or PARTIAL_INTERVAL seconds) instead of one final list.
+    ensure_hip(request["hip"])
+    chunk_size = request.get("chunk", 0)
+    nodes = []
+    last_sent = time.monotonic()
+    stack = list(reversed(hou.node("/").children()))
+    while stack:
+        node = stack.pop()
+        nodes.append([node.path(), node.type().name()])
+        stack.extend(reversed(node.children()))
+        if chunk_size and (len(nodes) >= chunk_size or time.monotonic() - last_sent > PARTIAL_INTERVAL):
+            send_partial(request, nodes)
+            nodes = []
+            last_sent = time.monotonic()
+    return nodes
+
+
+def cmd_parms(request):
+    ensure_hip(request["hip"])
+    return [parm.name() for parm in get_node(request["node"]).parms()]
+
+
+def cmd_parm_value(request):
+    ensure_hip(request["hip"])
+    value = get_parm(get_node(request["node"]), request["parm"]).eval()
+    return str(value)
+
+
+def parm_default(parm):
+    template = parm.parmTemplate()
+    try:
+        default = template.defaultValue()
+    except AttributeError:
+        return ""
+    if isinstance(default, tuple):
+        index = parm.componentIndex()
+        return default[index] if index < len(default) else ""
+    return default
+
+
+def parm_expression(parm):
+    try:
+        return parm.expression()
+    except hou.OperationFailed:
+        return ""
+
+
+def parm_row(parm):
+    try:
+        value = parm.eval()
+    except hou.Error as e:
+        value = f"<{e}>"
+    return {
+        "name": parm.name(),
+        "type": parm.parmTemplate().type().name(),
+        "value": str(value),
+        "expression": parm_expression(parm),
+        "default": str(parm_default(parm)),
+        "animated": len(parm.keyframes()) > 0,
+    }
+
+
+def cmd_parm_table(request):
+    ensure_hip(request["hip"])
+    return [parm_row(parm) for parm in get_node(request["node"]).parms()]
+
+
+def cmd_query(request):
+    # Nodes matching any of the path patterns, with the requested parms
+    # evaluated; used by hip_scan to report on many files.
+    ensure_hip(request["hip"])
+    patterns = request.get("nodes") or ["*"]
+    parm_names = request.get("parms", [])
+    if all(not set("*?[") & set(pattern) for pattern in patterns):
+        nodes = [node for node in map(hou.node, patterns) if node is not None]
+    else:
+        nodes = [node for node in hou.node("/").allSubChildren()
+                 if any(fnmatch.fnmatchcase(node.path(), pattern) for pattern in patterns)]
+    rows = []
+    for node in nodes:
+        values = {}
+        for name in parm_names:
+            parm = node.parm(name)
+            values[name] = None if parm is None else str(parm.eval())
+        rows.append({"node": node.path(), "type": node.type().name(), "parms": values})
+    return {"frame_range": list(hou.playbar.frameRange()), "nodes": rows}
+
+
+def cmd_apply_edits(request):
+    ensure_hip(request["hip"])
+    # Resolve and convert everything first so bad input fails before the
+    # scene is touched.
+    edits = []
+    for edit in request["edits"]:
+        parm = get_parm(get_node(edit["node"]), edit["parm"])
+        edits.append((parm, coerce_value(parm, edit["value"])))
+    try:
+        for parm, value in edits:
+            parm.set(value)
+        hou.hipFile.save()
+    except Exception:
+        # Nothing was written to disk; drop the in-memory changes so the next
+        # request reloads the saved scene.
+        current_hip["mtime"] = None
+        raise
+    current_hip["mtime"] = os.path.getmtime(request["hip"])
+    return len(edits)
+
+
+def cmd_set_parm(request):
+    edit = {"node": request["node"], "parm": request["parm"], "value": request["value"]}
+    return cmd_apply_edits({"hip": request["hip"], "edits": [edit]})
+
+
+COMMANDS = {
+    "ping": cmd_ping,
+    "load": cmd_load,
+    "nodes": cmd_nodes,
+    "parms": cmd_parms,
+    "parm_value": cmd_parm_value,
+    "parm_table": cmd_parm_table,
+    "set_parm": cmd_set_parm,
+    "apply_edits": cmd_apply_edits,
+    "query": cmd_query,
+}
+
+
+def main():
+    # Keep the protocol on a private copy of stdout; anything Houdini or user
+    # scripts print afterwards goes to stderr instead.
+    global protocol
+    protocol = os.fdopen(os.dup(1), "w", encoding="utf-8")
+    os.dup2(2, 1)
+    sys.stdout = sys.stderr
+
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        request = {}
+        try:
+            # A malformed line gets an error reply instead of ending the worker
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                request = {}
+                raise ValueError("request is not a JSON object")
+            if request.get("cmd") == "quit":
+                break
+            result = COMMANDS[request["cmd"]](request)
+            reply = {"id": request.get("id"), "ok": True, "result": result}
+        except Exception as e:
+            reply = {"id": request.get("id"), "ok": False, "error": f"{type(e).__name__}: {e}"}
+        write_reply(reply)
+
+
+if __name__ == "__main__":
+    main()
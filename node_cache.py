@@ -0,0 +1,180 @@
+import os
+import time
+import json
+import sqlite3
+import hashlib
+import threading
+
+CACHE_FILE = "node_cache.db"
+MAX_CACHE_BYTES = 256 * 1024 * 1024
+HASH_BLOCK = 1024 * 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS hips (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    digest TEXT NOT NULL,
+    last_used REAL NOT NULL,
+    bytes INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS nodes (
+    hip_id INTEGER NOT NULL,
+    idx INTEGER NOT NULL,
+    path TEXT NOT NULL,
+    type TEXT,
+    PRIMARY KEY (hip_id, idx)
+);
+CREATE TABLE IF NOT EXISTS parm_tables (
+    hip_id INTEGER NOT NULL,
+    node TEXT NOT NULL,
+    rows TEXT NOT NULL,
+    PRIMARY KEY (hip_id, node)
+);
+"""
+SCHEMA_VERSION = 2
+TABLES = ("hips", "nodes", "parms", "parm_values", "parm_tables")
+
+
+def file_digest(path):
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class NodeCache:
+    def __init__(self, db_path=CACHE_FILE, max_bytes=MAX_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(db_path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        if self.db.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            for table in TABLES:
+                self.db.execute(f"DROP TABLE IF EXISTS {table}")
+            self.db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+    def _lookup(self, hip_path, create=False):
+        # Returns the hip id when the cached entry still matches the file.
+        # A changed size/mtime only invalidates the entry if the content hash
+        # changed too, so touching or copying a file keeps its cache.
+        hip_path = os.path.abspath(hip_path)
+        try:
+            stat = os.stat(hip_path)
+        except OSError:
+            return None
+        row = self.db.execute(
+            "SELECT id, size, mtime, digest FROM hips WHERE path = ?", (hip_path,)
+        ).fetchone()
+        now = time.time()
+        if row and row[1] == stat.st_size and row[2] == stat.st_mtime:
+            self.db.execute("UPDATE hips SET last_used = ? WHERE id = ?", (now, row[0]))
+            return row[0]
+        if row is None and not create:
+            return None
+        digest = file_digest(hip_path)
+        if row:
+            if row[3] != digest:
+                self._drop(row[0])
+                if not create:
+                    self.db.execute("DELETE FROM hips WHERE id = ?", (row[0],))
+                    return None
+                self.db.execute("UPDATE hips SET bytes = 0 WHERE id = ?", (row[0],))
+            self.db.execute(
+                "UPDATE hips SET size = ?, mtime = ?, digest = ?, last_used = ? WHERE id = ?",
+                (stat.st_size, stat.st_mtime, digest, now, row[0]),
+            )
+            return row[0]
+        cursor = self.db.execute(
+            "INSERT INTO hips (path, size, mtime, digest, last_used) VALUES (?, ?, ?, ?, ?)",
+            (hip_path, stat.st_size, stat.st_mtime, digest, now),
+        )
+        return cursor.lastrowid
+
+    def _drop(self, hip_id):
+        for table in ("nodes", "parm_tables"):
+            self.db.execute(f"DELETE FROM {table} WHERE hip_id = ?", (hip_id,))
+
+    def _grow(self, hip_id, nbytes):
+        self.db.execute("UPDATE hips SET bytes = bytes + ? WHERE id = ?", (nbytes, hip_id))
+        total = self.db.execute("SELECT COALESCE(SUM(bytes), 0) FROM hips").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for old_id, old_bytes in self.db.execute(
+            "SELECT id, bytes FROM hips WHERE id != ? ORDER BY last_used", (hip_id,)
+        ).fetchall():
+            self._drop(old_id)
+            self.db.execute("DELETE FROM hips WHERE id = ?", (old_id,))
+            total -= old_bytes
+            if total <= self.max_bytes:
+                break
+
+    def get_nodes(self, hip_path):
+        with self.lock, self.db:
+            hip_id = self._lookup(hip_path)
+            if hip_id is None:
+                return None
+            rows = self.db.execute(
+                "SELECT path, type FROM nodes WHERE hip_id = ? ORDER BY idx", (hip_id,)
+            ).fetchall()
+        if not rows:
+            return None
+        return dict(rows)
+
+    def put_nodes(self, hip_path, node_types):
+        with self.lock, self.db:
+            hip_id = self._lookup(hip_path, create=True)
+            if hip_id is None:
+                return
+            # Replacing the list must not count the old one twice
+            old_bytes = self.db.execute(
+                "SELECT COALESCE(SUM(LENGTH(path) + LENGTH(COALESCE(type, '')) + 16), 0) FROM nodes WHERE hip_id = ?",
+                (hip_id,),
+            ).fetchone()[0]
+            self.db.execute("DELETE FROM nodes WHERE hip_id = ?", (hip_id,))
+            self.db.executemany(
+                "INSERT INTO nodes (hip_id, idx, path, type) VALUES (?, ?, ?, ?)",
+                ((hip_id, idx, path, node_type) for idx, (path, node_type) in enumerate(node_types.items())),
+            )
+            self._grow(hip_id, sum(len(path) + len(node_type or "") + 16 for path, node_type in node_types.items()) - old_bytes)
+
+    def get_parm_table(self, hip_path, node_path):
+        with self.lock, self.db:
+            hip_id = self._lookup(hip_path)
+            if hip_id is None:
+                return None
+            row = self.db.execute(
+                "SELECT rows FROM parm_tables WHERE hip_id = ? AND node = ?", (hip_id, node_path)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put_parm_table(self, hip_path, node_path, rows):
+        rows = json.dumps(rows)
+        with self.lock, self.db:
+            hip_id = self._lookup(hip_path, create=True)
+            if hip_id is None:
+                return
+            old = self.db.execute(
+                "SELECT LENGTH(rows) + LENGTH(node) FROM parm_tables WHERE hip_id = ? AND node = ?", (hip_id, node_path)
+            ).fetchone()
+            self.db.execute(
+                "INSERT OR REPLACE INTO parm_tables (hip_id, node, rows) VALUES (?, ?, ?)",
+                (hip_id, node_path, rows),
+            )
+            self._grow(hip_id, len(rows) + len(node_path) - (old[0] if old else 0))
+
+    def invalidate(self, hip_path):
+        with self.lock, self.db:
+            row = self.db.execute(
+                "SELECT id FROM hips WHERE path = ?", (os.path.abspath(hip_path),)
+            ).fetchone()
+            if row:
+                self._drop(row[0])
+                self.db.execute("DELETE FROM hips WHERE id = ?", (row[0],))
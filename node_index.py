@@ -0,0 +1,185 @@
+import re
+import sys
+import heapq
+import fnmatch
+import threading
+from bisect import bisect_right
+from array import array
+
+MAX_RESULTS = 200
+GLOB_CHARS = set("*?[")
+GLOB_WILDCARDS = re.compile(r"\*|\?|\[[^\]]*\]")
+
+
+class NodeIndex:
+    # Each path is stored once as a tuple of interned segment ids, and every
+    # unique segment keeps a sorted array of the path ids it appears in.
+    # Queries run as one regex scan over a newline separated blob of the
+    # lowered unique segments (C speed, a few MB even for huge scenes); match
+    # offsets map back to segment ids, and merging the segments' path arrays
+    # yields results in scene order.
+    def __init__(self):
+        self.segments = []
+        self.segment_ids = {}
+        self.segment_paths = []
+        self.paths = []
+        self.blob = ""
+        self.offsets = array("I")
+        self.pending = []
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.paths)
+
+    def _segment_id(self, segment):
+        segment_id = self.segment_ids.get(segment)
+        if segment_id is None:
+            segment_id = len(self.segments)
+            self.segments.append(sys.intern(segment))
+            self.segment_ids[segment] = segment_id
+            self.segment_paths.append(array("I"))
+            self.pending.append(segment.lower())
+        return segment_id
+
+    def add(self, paths):
+        with self.lock:
+            self._add(paths)
+
+    def _add(self, paths):
+        for path in paths:
+            path_id = len(self.paths)
+            segment_ids = tuple(self._segment_id(part) for part in path.split("/") if part)
+            self.paths.append(segment_ids)
+            for segment_id in set(segment_ids):
+                self.segment_paths[segment_id].append(path_id)
+
+    def _flush(self):
+        if not self.pending:
+            return
+        offset = len(self.blob)
+        for lowered in self.pending:
+            self.offsets.append(offset)
+            offset += len(lowered) + 1
+        self.blob += "\n".join(self.pending) + "\n"
+        self.pending = []
+
+    def path(self, path_id):
+        return "/" + "/".join(self.segments[segment_id] for segment_id in self.paths[path_id])
+
+    def _scan(self, regex):
+        self._flush()
+        found = []
+        last = -1
+        for match in regex.finditer(self.blob):
+            segment_id = bisect_right(self.offsets, match.start()) - 1
+            if segment_id != last:
+                found.append((match, segment_id))
+                last = segment_id
+        return found
+
+    def _segments_matching(self, pattern):
+        # Find candidates by the longest literal run, then check the glob
+        literal = max(GLOB_WILDCARDS.split(pattern), key=len)
+        regex = re.compile(fnmatch.translate(pattern))
+        if literal:
+            candidates = [segment_id for _, segment_id in self._scan(re.compile(re.escape(literal)))]
+        else:
+            candidates = range(len(self.segments))
+        return {segment_id for segment_id in candidates if regex.match(self.segments[segment_id].lower())}
+
+    def _path_count(self, segment_ids):
+        return sum(len(self.segment_paths[segment_id]) for segment_id in segment_ids)
+
+    def _paths_of(self, segment_ids):
+        # Merge the per-segment path arrays, which are already in scene order
+        last = -1
+        for path_id in heapq.merge(*(self.segment_paths[segment_id] for segment_id in segment_ids)):
+            if path_id != last:
+                last = path_id
+                yield path_id
+
+    def search(self, query, limit=MAX_RESULTS):
+        # Globs if the query has wildcards, else substring with a fuzzy
+        # fallback when nothing contains the query literally
+        query = query.strip().lower()
+        if not query:
+            return []
+        with self.lock:
+            if GLOB_CHARS & set(query):
+                return self.glob(query, limit)
+            results = self.substring(query, limit)
+            if not results:
+                results = self.fuzzy(query, limit)
+            return results
+
+    def substring(self, query, limit=MAX_RESULTS):
+        query = query.lower()
+        parts = [part for part in query.split("/") if part]
+        if not parts:
+            return []
+        # Every piece between slashes must occur in some segment; walk the
+        # paths of whichever piece is rarest and check the full query
+        segment_ids = None
+        for part in parts:
+            found = [segment_id for _, segment_id in self._scan(re.compile(re.escape(part)))]
+            if segment_ids is None or self._path_count(found) < self._path_count(segment_ids):
+                segment_ids = found
+        results = []
+        for path_id in self._paths_of(segment_ids):
+            path = self.path(path_id)
+            if "/" not in query or query in path.lower():
+                results.append(path)
+                if len(results) >= limit:
+                    break
+        return results
+
+    def glob(self, pattern, limit=MAX_RESULTS):
+        # One pattern level per network level. A leading "/" anchors the
+        # pattern at the root, otherwise it matches the end of the path.
+        pattern = pattern.lower()
+        anchored = pattern.startswith("/")
+        levels = [level for level in pattern.strip("/").split("/") if level]
+        if not levels:
+            return []
+        level_sets = [self._segments_matching(level) if level.strip("*") else None for level in levels]
+        selective = [segments for segments in level_sets if segments is not None]
+        if selective:
+            narrowest = min(selective, key=self._path_count)
+            candidates = self._paths_of(narrowest)
+        else:
+            candidates = range(len(self.paths))
+        depth = len(levels)
+        results = []
+        for path_id in candidates:
+            segment_ids = self.paths[path_id]
+            if anchored:
+                if len(segment_ids) != depth:
+                    continue
+            elif len(segment_ids) < depth:
+                continue
+            tail = segment_ids[-depth:]
+            if all(segments is None or segment_id in segments for segment_id, segments in zip(tail, level_sets)):
+                results.append(self.path(path_id))
+                if len(results) >= limit:
+                    break
+        return results
+
+    def fuzzy(self, query, limit=MAX_RESULTS):
+        # Query characters must appear in order within one node name; tighter
+        # matches on shorter names rank first.
+        query = query.lower().replace("/", "")
+        if not query:
+            return []
+        regex = re.compile("[^\n]*?".join(re.escape(char) for char in query))
+        scored = []
+        for match, segment_id in self._scan(regex):
+            scored.append((match.end() - match.start(), len(self.segments[segment_id]), segment_id))
+        scored.sort()
+        results = []
+        for _, _, segment_id in scored:
+            for path_id in self.segment_paths[segment_id]:
+                if self.paths[path_id][-1] == segment_id:
+                    results.append(self.path(path_id))
+                    if len(results) >= limit:
+                        return results
+        return results
@@ -0,0 +1,154 @@
+from PySide6.QtCore import Qt, QAbstractItemModel, QModelIndex
+
+FETCH_BATCH = 500
+PATH_ROLE = Qt.UserRole
+
+
+class TreeNode:
+    __slots__ = ("path", "name", "parent", "row", "children")
+
+    def __init__(self, path, parent, row):
+        self.path = path
+        self.name = path.rsplit("/", 1)[-1] or "/"
+        self.parent = parent
+        self.row = row
+        self.children = []
+
+
+class NodeTreeModel(QAbstractItemModel):
+    # Only paths are kept for the whole scene (grouped by parent). TreeNode
+    # objects are created when a branch is expanded, FETCH_BATCH rows at a
+    # time, so a 300k node scene costs nothing until someone opens /obj.
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.root = TreeNode("/", None, 0)
+        self.node_types = {}
+        self.child_paths = {}
+        self.materialized = {"/": self.root}
+
+    def set_nodes(self, node_types):
+        self.beginResetModel()
+        self.root = TreeNode("/", None, 0)
+        self.node_types = {}
+        self.child_paths = {}
+        self.materialized = {"/": self.root}
+        self.endResetModel()
+        self.add_nodes(node_types)
+
+    def add_nodes(self, node_types):
+        # Nodes can keep arriving while the scene is streamed in. Branches
+        # that are already on screen get their new rows right away (up to one
+        # batch); everything else waits for the branch to be expanded.
+        grown = set()
+        for path, node_type in node_types.items():
+            if path in self.node_types:
+                if node_type:
+                    self.node_types[path] = node_type
+                continue
+            self.node_types[path] = node_type
+            self._register(path, grown)
+        for parent_path in grown:
+            node = self.materialized.get(parent_path)
+            if node is None:
+                continue
+            index = QModelIndex() if node is self.root else self.createIndex(node.row, 0, node)
+            if node is self.root or node.children:
+                if len(node.children) < FETCH_BATCH:
+                    self.fetchMore(index)
+            else:
+                # Collapsed row that just got its first child: repaint the arrow
+                self.dataChanged.emit(index, index)
+
+    def _register(self, path, grown):
+        parent_path = path.rsplit("/", 1)[0] or "/"
+        grown.add(parent_path)
+        siblings = self.child_paths.get(parent_path)
+        if siblings is None:
+            self.child_paths[parent_path] = [path]
+            if parent_path != "/" and parent_path not in self.node_types:
+                self.node_types[parent_path] = None
+                self._register(parent_path, grown)
+        else:
+            siblings.append(path)
+
+    def node(self, index):
+        return index.internalPointer() if index.isValid() else self.root
+
+    def path(self, index):
+        return self.node(index).path if index.isValid() else None
+
+    def index(self, row, column, parent=QModelIndex()):
+        node = self.node(parent)
+        if 0 <= row < len(node.children) and 0 <= column < 2:
+            return self.createIndex(row, column, node.children[row])
+        return QModelIndex()
+
+    def parent(self, index):
+        if not index.isValid():
+            return QModelIndex()
+        parent = index.internalPointer().parent
+        if parent is None or parent is self.root:
+            return QModelIndex()
+        return self.createIndex(parent.row, 0, parent)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.column() > 0:
+            return 0
+        return len(self.node(parent).children)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 2
+
+    def hasChildren(self, parent=QModelIndex()):
+        return self.node(parent).path in self.child_paths
+
+    def canFetchMore(self, parent):
+        node = self.node(parent)
+        return len(node.children) < len(self.child_paths.get(node.path, ()))
+
+    def fetchMore(self, parent):
+        node = self.node(parent)
+        paths = self.child_paths.get(node.path, ())
+        start = len(node.children)
+        end = min(start + FETCH_BATCH, len(paths))
+        if start >= end:
+            return
+        self.beginInsertRows(parent, start, end - 1)
+        for row in range(start, end):
+            child = TreeNode(paths[row], node, row)
+            node.children.append(child)
+            self.materialized[child.path] = child
+        self.endInsertRows()
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        node = index.internalPointer()
+        if role == Qt.DisplayRole:
+            if index.column() == 0:
+                return node.name
+            return self.node_types.get(node.path) or ""
+        if role == Qt.ToolTipRole or role == PATH_ROLE:
+            return node.path
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return ["Node", "Type"][section]
+        return None
+
+    def index_for_path(self, path):
+        # Materialize just the branch leading to path so it can be selected.
+        if path not in self.node_types:
+            return QModelIndex()
+        parts = [part for part in path.split("/") if part]
+        index = QModelIndex()
+        current = ""
+        for part in parts:
+            current += "/" + part
+            node = self.node(index)
+            row = self.child_paths[node.path].index(current)
+            while len(node.children) <= row:
+                self.fetchMore(index)
+            index = self.index(row, 0, index)
+        return index
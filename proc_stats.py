@@ -0,0 +1,138 @@
+import os
+import sys
+from collections import namedtuple
+
+# Cheap process and machine readings straight from Linux /proc: one small
+# read per file, no psutil. Everything returns None / {} where /proc is not
+# available (Windows, macOS), so callers can fall back to fixed behaviour.
+
+PROC = "/proc"
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+ProcStat = namedtuple("ProcStat", "pid ppid state cpu_seconds rss start_seconds")
+
+
+def available():
+    return sys.platform.startswith("linux") and os.path.isfile(os.path.join(PROC, "meminfo"))
+
+
+def load_average():
+    try:
+        with open(os.path.join(PROC, "loadavg")) as f:
+            return tuple(float(value) for value in f.read().split()[:3])
+    except (OSError, ValueError):
+        return None
+
+
+def memory_info():
+    # Bytes for MemTotal, MemAvailable, SwapTotal, SwapFree, ...
+    info = {}
+    try:
+        with open(os.path.join(PROC, "meminfo")) as f:
+            for line in f:
+                name, _, value = line.partition(":")
+                parts = value.split()
+                if parts:
+                    info[name] = int(parts[0]) * (1024 if len(parts) > 1 else 1)
+    except (OSError, ValueError):
+        return {}
+    return info
+
+
+def cpu_times():
+    # (busy, total) jiffies of all CPUs since boot; compare two readings for
+    # the busy fraction over an interval
+    try:
+        with open(os.path.join(PROC, "stat")) as f:
+            values = [int(value) for value in f.readline().split()[1:]]
+    except (OSError, ValueError):
+        return None
+    idle = values[3] + (values[4] if len(values) > 4 else 0)
+    total = sum(values[:8])
+    return total - idle, total
+
+
+def busy_fraction(previous, current):
+    if not previous or not current or current[1] <= previous[1]:
+        return None
+    return (current[0] - previous[0]) / (current[1] - previous[1])
+
+
+def read_stat(pid):
+    try:
+        with open(os.path.join(PROC, str(pid), "stat"), "rb") as f:
+            data = f.read().decode("ascii", "replace")
+    except OSError:
+        return None
+    # The command name may hold spaces and parentheses: split after the last ")"
+    fields = data[data.rfind(")") + 2:].split()
+    try:
+        return ProcStat(pid, int(fields[1]), fields[0], (int(fields[11]) + int(fields[12])) / CLOCK_TICKS,
+                        int(fields[21]) * PAGE_SIZE, int(fields[19]) / CLOCK_TICKS)
+    except (IndexError, ValueError):
+        return None
+
+
+def process_table():
+    # {pid: ProcStat} of every process, for walking process trees
+    table = {}
+    try:
+        names = os.listdir(PROC)
+    except OSError:
+        return table
+    for name in names:
+        if name.isdigit():
+            stat = read_stat(int(name))
+            if stat is not None:
+                table[stat.pid] = stat
+    return table
+
+
+def children_map(table):
+    children = {}
+    for stat in table.values():
+        children.setdefault(stat.ppid, []).append(stat.pid)
+    return children
+
+
+def descendants(pid, table, children=None):
+    children = children_map(table) if children is None else children
+    found = []
+    stack = list(children.get(pid, ()))
+    while stack:
+        child = stack.pop()
+        found.append(child)
+        stack.extend(children.get(child, ()))
+    return found
+
+
+def tree_stats(pids, table=None):
+    # {pid: (rss, cpu_seconds)} summed over each process and all of its
+    # descendants (hbatch -> mantra/karma, ...)
+    table = process_table() if table is None else table
+    children = children_map(table)
+    stats = {}
+    for pid in pids:
+        if pid not in table:
+            continue
+        tree = [pid] + descendants(pid, table, children)
+        stats[pid] = (sum(table[member].rss for member in tree if member in table),
+                      sum(table[member].cpu_seconds for member in tree if member in table))
+    return stats
+
+
+def uptime():
+    try:
+        with open(os.path.join(PROC, "uptime")) as f:
+            return float(f.read().split()[0])
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def format_bytes(size):
+    for unit in ("B", "KB", "MB", "GB"):
+        if abs(size) < 1024:
+            return f"{size:.0f}{unit}" if unit == "B" else f"{size:.1f}{unit}"
+        size /= 1024
+    return f"{size:.1f}TB"
@@ -0,0 +1,216 @@
+import os
+import sys
+import math
+import argparse
+
+import render_queue
+import render_store
+from render_scheduler import AdaptiveScheduler
+from render_progress import ProgressTracker
+from hip_archive import HipArchive
+from hython_client import hython_from_houdini
+from render_queue import read_command_file, HIP_EXTENSIONS
+from render_frames import (format_frames, expand_vars, hip_variables, OutputPattern, OutputWatcher, existing_frames,
+                           frame_key)
+
+HYTHON_RENDER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "hython_render.py")
+CHUNKS_PER_SLOT = 2
+
+
+def csv_rows(csv_path):
+    # The setup HDA writes whitespace separated files ("start end" / "1 240"),
+    # hand written ones are often comma separated; both are accepted and any
+    # non numeric header line is skipped.
+    if not csv_path or not os.path.isfile(csv_path):
+        return
+    with open(csv_path, encoding="utf-8") as f:
+        for line in f:
+            cells = line.replace(",", " ").split()
+            try:
+                yield [int(float(cell)) for cell in cells]
+            except ValueError:
+                continue
+
+
+def read_frame_ranges(csv_path):
+    frames = []
+    for row in csv_rows(csv_path):
+        if len(row) >= 2:
+            step = row[2] if len(row) > 2 and row[2] > 0 else 1
+            frames.extend(range(row[0], row[1] + 1, step))
+    return frames
+
+
+def read_single_frames(csv_path):
+    frames = []
+    for row in csv_rows(csv_path):
+        frames.extend(row)
+    return frames
+
+
+def auto_chunk_size(frame_count, slots):
+    # Enough chunks for every slot to get a couple, so a slow chunk at the
+    # end does not leave the rest of the machine idle
+    return max(1, math.ceil(frame_count / max(1, slots * CHUNKS_PER_SLOT)))
+
+
+def chunk_frames(frames, size=None, chunk_cost=None, frame_cost=None):
+    # Fixed size chunks, or chunks holding about chunk_cost seconds of work
+    # when the cost of a frame can be estimated: frame_cost is seconds per
+    # frame, or {frame: seconds} where unknown frames cost the average.
+    frames = sorted(set(frames))
+    if chunk_cost and frame_cost:
+        if isinstance(frame_cost, dict):
+            default = sum(frame_cost.values()) / len(frame_cost)
+            cost_of = lambda frame: frame_cost.get(frame, default)
+        else:
+            cost_of = lambda frame: frame_cost
+        chunks = []
+        current = []
+        cost = 0.0
+        for frame in frames:
+            current.append(frame)
+            cost += cost_of(frame)
+            if cost >= chunk_cost:
+                chunks.append(current)
+                current = []
+                cost = 0.0
+        if current:
+            chunks.append(current)
+        return chunks
+    size = max(1, size or len(frames) or 1)
+    return [frames[index:index + size] for index in range(0, len(frames), size)]
+
+
+def expand_hip_vars(path, hip_path):
+    return expand_vars(path, hip_variables(hip_path))
+
+
+def find_render_setup(hip_path, rop_name):
+    # The command line render setup HDA in the scene knows the ROP path and
+    # where its frame CSVs live; fall back to any node called rop_name.
+    with HipArchive(hip_path) as archive:
+        fallback = None
+        for node_path in archive.node_paths():
+            parms = archive.parms(node_path)
+            rop_path = parms.get("roppath", "").strip('"')
+            if "csvfilepathrange" in parms and rop_path:
+                name = parms.get("rndrname", "").strip('"') or rop_path.rsplit("/", 1)[-1]
+                if rop_name in (name, rop_path.rsplit("/", 1)[-1]):
+                    return {
+                        "rop": rop_path,
+                        "range_csv": expand_hip_vars(parms["csvfilepathrange"].strip('"'), hip_path),
+                        "single_csv": expand_hip_vars(parms.get("csvfilepathsingle", "").strip('"'), hip_path),
+                        "output": parms.get("rop_output_path", "").strip('"'),
+                    }
+            if fallback is None and node_path.rsplit("/", 1)[-1] == rop_name:
+                fallback = node_path
+        if fallback is None:
+            return None
+        return {"rop": fallback, "range_csv": "", "single_csv": "",
+                "output": archive.parms(fallback).get("sopoutput", "").strip('"'), "frame_range": archive.frame_range()}
+
+
+def command_file_chunks(txt_path, hython="hython", size=None, slots=1, chunk_cost=None, frame_cost=None, skip_existing=False):
+    # For a cmdlrndr command file (hip/cmdlrndr/<rop>/CommandLineCode__<rop>.txt)
+    # returns one job spec per chunk: (name, argv, cwd, metadata). With
+    # skip_existing, frames whose output is already on disk are left out.
+    folder = os.path.dirname(os.path.abspath(txt_path))
+    rop_name = os.path.basename(folder)
+    specs = []
+    for argv, cwd in read_command_file(txt_path):
+        hips = [arg for arg in argv if arg.lower().endswith(HIP_EXTENSIONS)]
+        if not hips:
+            raise ValueError(f"No .hip in command: {' '.join(argv)}")
+        hip_path = os.path.join(cwd, hips[-1])
+        setup = find_render_setup(hip_path, rop_name)
+        if setup is None:
+            raise ValueError(f"No ROP called {rop_name} in {hip_path}")
+        csv_dir = os.path.join(folder, "csv")
+        range_csv = setup["range_csv"] if os.path.isfile(setup["range_csv"]) else os.path.join(csv_dir, "range_frames.csv")
+        single_csv = setup["single_csv"] if os.path.isfile(setup["single_csv"]) else os.path.join(csv_dir, "single_frames.csv")
+        frames = read_frame_ranges(range_csv) + read_single_frames(single_csv)
+        if not frames and setup.get("frame_range"):
+            start, end = setup["frame_range"]
+            frames = list(range(int(start), int(end) + 1))
+        if not frames:
+            raise ValueError(f"No frames for {rop_name}: {range_csv} and {single_csv} are empty")
+        if skip_existing and setup["output"]:
+            on_disk = existing_frames(OutputPattern(setup["output"], hip_path, setup["rop"]), frames)
+            frames = [frame for frame in frames if frame_key(frame) not in on_disk]
+            if not frames:
+                continue
+        chunk_size = size
+        if chunk_size is None and not (chunk_cost and frame_cost):
+            chunk_size = auto_chunk_size(len(set(frames)), slots)
+        for chunk in chunk_frames(frames, chunk_size, chunk_cost, frame_cost):
+            spec = format_frames(chunk)
+            argv = [hython, HYTHON_RENDER_SCRIPT, os.path.abspath(hip_path), setup["rop"], spec]
+            metadata = {"hip": os.path.abspath(hip_path), "rop": setup["rop"], "frames": spec,
+                        "frame_count": len(chunk), "output": setup["output"], "source": txt_path}
+            specs.append((f"{rop_name} [{spec}]", argv, cwd, metadata))
+    return specs
+
+
+def batch_name(files):
+    # cmdlrndr command files live in a folder named after their ROP
+    names = [os.path.basename(os.path.dirname(os.path.abspath(path))) for path in files]
+    return ", ".join(names) if len(names) <= 3 else f"{', '.join(names[:3])} +{len(names) - 3}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Split cmdlrndr render commands into frame chunks.")
+    parser.add_argument("files", nargs="+", help="Command files, e.g. hip/cmdlrndr/rop_geometry1/CommandLineCode__rop_geometry1.txt")
+    parser.add_argument("-s", "--chunk-size", type=int, default=None, help="Frames per chunk (default: spread over the slots)")
+    parser.add_argument("--chunk-seconds", type=float, default=None, help="Target seconds per chunk, with --frame-seconds")
+    parser.add_argument("--frame-seconds", type=float, default=None, help="Estimated seconds per frame")
+    parser.add_argument("-j", "--slots", type=int, default=os.cpu_count() or 1, help="Concurrent jobs to plan for / run with")
+    parser.add_argument("--houdini", default=None, help="Houdini executable; hython is taken from its bin folder")
+    parser.add_argument("--skip-existing", action="store_true", help="Leave out frames whose output file already exists and is not empty")
+    parser.add_argument("--run", action="store_true", help="Run the chunks on the render queue instead of printing them")
+    parser.add_argument("--adaptive", action="store_true", help="Adjust the slots (up to -j) to CPU load and free memory (Linux)")
+    parser.add_argument("--db", default=render_store.STORE_FILE, help=f"Job store for --run (default: {render_store.STORE_FILE})")
+    args = parser.parse_args()
+
+    hython = hython_from_houdini(args.houdini) if args.houdini else "hython"
+    specs = []
+    for path in args.files:
+        specs.extend(command_file_chunks(path, hython, args.chunk_size, args.slots, args.chunk_seconds, args.frame_seconds,
+                                         skip_existing=args.skip_existing))
+    if not specs:
+        print("Nothing to render: every frame is already on disk")
+        return 0
+    if not args.run:
+        for name, argv, cwd, _ in specs:
+            print(f"{name}\t{render_queue.subprocess.list2cmdline(argv)}")
+        return
+    queue = render_queue.RenderQueue(args.slots, env=render_queue.render_env(args.houdini))
+
+    def report(job):
+        if job.state in render_queue.FINISHED_STATES:
+            wall = f"{job.wall_time:.1f}s" if job.wall_time is not None else "-"
+            progress = tracker.progress(job)
+            frames = f" ({progress.describe()})" if progress is not None and progress.completed else ""
+            print(f"[{job.state}] {job.name} exit={job.exit_code} {wall}{frames} {job.error or job.log_path}")
+
+    store = render_store.RenderStore(args.db)
+    queue.add_listener(render_store.StoreRecorder(store))
+    tracker = ProgressTracker(queue, store)
+    OutputWatcher(queue, store).add_listener(tracker.frame_landed)
+    if args.adaptive and AdaptiveScheduler.available():
+        AdaptiveScheduler(queue, store, max_slots=args.slots).start()
+    queue.add_listener(report)
+    batch_id = render_store.submit_batch(queue, store, batch_name(args.files), specs)
+    print(f"Batch {batch_id}: {len(specs)} chunks (resume with: python render_store.py resume {batch_id})")
+    try:
+        queue.wait()
+    except KeyboardInterrupt:
+        queue.shutdown()
+        queue.wait(10)
+    counts = queue.counts()
+    print(f"{counts[render_queue.DONE]} chunks done, {counts[render_queue.FAILED]} failed")
+    return 1 if counts[render_queue.FAILED] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
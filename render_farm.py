@@ -0,0 +1,465 @@
+import os
+import sys
+import json
+import hmac
+import time
+import socket
+import argparse
+import ipaddress
+import threading
+import socketserver
+
+import render_queue
+import render_chunks
+import render_store
+from render_scheduler import AdaptiveScheduler
+from render_progress import ProgressTracker
+from render_frames import OutputWatcher
+from render_queue import RenderQueue, QUEUED, RUNNING, DONE, FAILED, CANCELLED, FINISHED_STATES
+
+DEFAULT_PORT = 8765
+HEARTBEAT_SECONDS = 5
+HEARTBEAT_TIMEOUT = 20
+RECONNECT_SECONDS = 5
+MAX_WORKER_SLOTS = 256
+# Job metadata workers get along with the command (memory estimates per ROP)
+SHARED_METADATA = ("hip", "rop", "frames", "output", "source")
+
+# Coordinator and workers talk JSON lines over one TCP connection per worker.
+# worker -> coordinator:
+#   {"type": "hello", "worker": name, "slots": n, "token": t}
+#   {"type": "started", "job": id, "pid": pid}
+#   {"type": "log", "job": id, "line": text}
+#   {"type": "finished", "job": id, "state": s, "exit_code": c, "error": e}
+#   {"type": "heartbeat", "running": [ids]}
+# coordinator -> worker:
+#   {"type": "job", "job": id, "name": n, "argv": [...], "cwd": path, "metadata": {hip, rop, ...}}
+#   {"type": "cancel", "job": id}
+#   {"type": "error", "message": m}  (hello refused)
+# Commands run with the coordinator's paths, so the project must be mounted
+# at the same path on every machine.
+
+
+def send_message(sock, lock, message):
+    data = (json.dumps(message) + "\n").encode("utf-8")
+    with lock:
+        sock.sendall(data)
+
+
+class FarmWorker:
+    # The coordinator's view of one connected worker
+    def __init__(self, name, slots, sock):
+        self.name = name
+        self.slots = max(1, slots)
+        self.sock = sock
+        self.send_lock = threading.Lock()
+        self.jobs = {}
+        self.logs = {}
+        self.connected = time.time()
+        self.last_seen = time.time()
+        self.alive = True
+
+    @property
+    def free(self):
+        return self.slots - len(self.jobs) if self.alive else 0
+
+    def send(self, message):
+        try:
+            send_message(self.sock, self.send_lock, message)
+        except OSError:
+            self.drop()
+
+    def drop(self):
+        # Closing the socket ends the handler's read loop, which hands the
+        # worker's jobs back to the queue
+        self.alive = False
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+
+class FarmHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        coordinator = self.server.coordinator
+        try:
+            hello = json.loads(self.rfile.readline() or b"{}")
+        except ValueError:
+            return
+        if hello.get("type") != "hello":
+            return
+        if not coordinator.check_token(hello.get("token", "")):
+            send_message(self.request, threading.Lock(), {"type": "error", "message": "wrong token"})
+            return
+        try:
+            slots = int(hello.get("slots", 1))
+        except (TypeError, ValueError):
+            slots = 0
+        if not 1 <= slots <= MAX_WORKER_SLOTS:
+            send_message(self.request, threading.Lock(), {"type": "error", "message": f"slots must be 1-{MAX_WORKER_SLOTS}"})
+            return
+        worker = FarmWorker(hello.get("worker") or self.client_address[0], slots, self.request)
+        coordinator.attach(worker)
+        try:
+            for line in self.rfile:
+                try:
+                    message = json.loads(line)
+                except ValueError:
+                    continue
+                coordinator.handle_message(worker, message)
+        except OSError:
+            pass
+        finally:
+            coordinator.detach(worker)
+
+
+class FarmServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def is_loopback(host):
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+class FarmCoordinator(RenderQueue):
+    # A RenderQueue whose slots are the free slots of connected workers.
+    # Jobs are pushed to workers as slots open up, their output is streamed
+    # back into the local log folder, and the jobs of a worker that
+    # disconnects or misses heartbeats are queued again.
+    def __init__(self, bind="127.0.0.1", port=DEFAULT_PORT, log_dir=render_queue.LOG_DIR, token=""):
+        # Workers receive every job's command line and report its result:
+        # anything reachable from other machines needs a shared secret
+        if not token and not is_loopback(bind):
+            raise ValueError(f"a token is required to listen on {bind or 'all addresses'}")
+        super().__init__(1, log_dir)
+        self.token = token
+        self.workers = []
+        self.server = FarmServer((bind, port), FarmHandler)
+        self.server.coordinator = self
+        self.address = self.server.server_address
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        threading.Thread(target=self._watch_heartbeats, daemon=True).start()
+
+    def check_token(self, token):
+        return hmac.compare_digest(self.token or "", token or "")
+
+    def attach(self, worker):
+        with self.lock:
+            self.workers.append(worker)
+            self.slots = sum(worker.slots for worker in self.workers)
+        self._dispatch()
+
+    def detach(self, worker):
+        worker.alive = False
+        with self.lock:
+            if worker in self.workers:
+                self.workers.remove(worker)
+            self.slots = max(1, sum(worker.slots for worker in self.workers))
+            jobs = list(worker.jobs.values())
+            worker.jobs.clear()
+        for job in jobs:
+            self._close_log(worker, job)
+            if job.cancel_requested:
+                self._finish(job, CANCELLED)
+            else:
+                self._requeue(job, f"worker {worker.name} lost")
+
+    def _requeue(self, job, reason):
+        with self.lock:
+            job.state = QUEUED
+            job.error = reason
+            job.pid = None
+            job.host = None
+            job.started = None
+            job.finished = None
+            self.running.pop(job.job_id, None)
+            self.pending.appendleft(job)
+        self._notify(job)
+        job.error = ""
+        self._dispatch()
+
+    def set_slots(self, slots):
+        # Capacity comes from the workers
+        pass
+
+    def worker_status(self):
+        with self.lock:
+            return [(worker.name, len(worker.jobs), worker.slots, time.time() - worker.last_seen) for worker in self.workers]
+
+    def _dispatch(self):
+        assigned = []
+        with self.lock:
+            while not self.stopped and self.pending:
+                worker = max(self.workers, key=lambda worker: worker.free, default=None)
+                if worker is None or worker.free <= 0:
+                    break
+                job = self.pending.popleft()
+                if job.state != QUEUED:
+                    continue
+                job.state = RUNNING
+                job.started = time.time()
+                job.host = worker.name
+                worker.jobs[job.job_id] = job
+                self.running[job.job_id] = job
+                assigned.append((worker, job))
+        for worker, job in assigned:
+            log = self._open_log(job)
+            log.write(f"# {job.command}\n# cwd: {job.cwd}\n# worker: {worker.name}\n".encode("utf-8"))
+            log.flush()
+            worker.logs[job.job_id] = log
+            self._notify(job)
+            metadata = {key: job.metadata[key] for key in SHARED_METADATA if key in job.metadata}
+            worker.send({"type": "job", "job": job.job_id, "name": job.name, "argv": job.argv, "cwd": job.cwd,
+                         "metadata": metadata})
+
+    def _close_log(self, worker, job, footer=None):
+        log = worker.logs.pop(job.job_id, None)
+        if log is not None:
+            if footer:
+                log.write(footer.encode("utf-8"))
+            log.close()
+
+    def handle_message(self, worker, message):
+        worker.last_seen = time.time()
+        kind = message.get("type")
+        with self.lock:
+            if kind == "finished":
+                job = worker.jobs.pop(message.get("job"), None)
+            else:
+                job = worker.jobs.get(message.get("job"))
+        if job is None:
+            # Heartbeat, or a job that was already handed to another worker
+            return
+        if kind == "log":
+            log = worker.logs.get(job.job_id)
+            if log is not None:
+                line = message.get("line", "").encode("utf-8")
+                log.write(line)
+                log.flush()
+                self._output(job, line)
+        elif kind == "started":
+            job.pid = message.get("pid")
+            self._notify(job)
+        elif kind == "finished":
+            job.exit_code = message.get("exit_code")
+            job.error = message.get("error", "")
+            self._close_log(worker, job, f"# exit code {job.exit_code}\n")
+            state = message.get("state", FAILED)
+            if job.cancel_requested:
+                state = CANCELLED
+            self._finish(job, state if state in FINISHED_STATES else FAILED)
+
+    def cancel(self, job):
+        super().cancel(job)
+        with self.lock:
+            worker = next((worker for worker in self.workers if job.job_id in worker.jobs), None)
+        if worker is not None:
+            worker.send({"type": "cancel", "job": job.job_id})
+
+    def _watch_heartbeats(self):
+        while not self.stopped:
+            time.sleep(1)
+            now = time.time()
+            with self.lock:
+                lost = [worker for worker in self.workers if now - worker.last_seen > HEARTBEAT_TIMEOUT]
+            for worker in lost:
+                worker.drop()
+
+    def shutdown(self):
+        super().shutdown()
+        self.server.shutdown()
+        self.server.server_close()
+        with self.lock:
+            workers = list(self.workers)
+        for worker in workers:
+            worker.drop()
+
+
+class FarmAgent:
+    # Headless worker: connects to the coordinator, runs the jobs it is sent
+    # on a local RenderQueue and streams state and output back
+    def __init__(self, host, port, slots=render_queue.DEFAULT_SLOTS, name=None, token="", log_dir=None, env=None,
+                 store=None, adaptive=False):
+        self.address = (host, port)
+        self.name = name or socket.gethostname()
+        self.token = token
+        # Several agents may share a machine (and a project folder)
+        log_dir = log_dir or os.path.join(render_queue.LOG_DIR, f"worker_{render_queue.safe_filename(self.name)}")
+        self.slots = slots
+        self.queue = RenderQueue(slots, log_dir, env)
+        if adaptive and AdaptiveScheduler.available():
+            # Slots advertised to the coordinator stay at the maximum; the
+            # scheduler holds extra jobs back locally while the box is busy
+            AdaptiveScheduler(self.queue, store, max_slots=slots).start()
+        self.queue.add_listener(self._job_changed)
+        self.queue.add_output_listener(self._job_output)
+        self.sock = None
+        self.send_lock = threading.Lock()
+        self.jobs = {}
+        self.stopped = False
+
+    def _send(self, message):
+        sock = self.sock
+        if sock is None:
+            return
+        try:
+            send_message(sock, self.send_lock, message)
+        except OSError:
+            pass
+
+    def _job_changed(self, job):
+        farm_id = job.metadata.get("farm_job")
+        if job.metadata.get("connection") is not self.sock:
+            return
+        if job.state == RUNNING and job.pid is not None:
+            self._send({"type": "started", "job": farm_id, "pid": job.pid})
+        elif job.state in FINISHED_STATES:
+            self.jobs.pop(farm_id, None)
+            self._send({"type": "finished", "job": farm_id, "state": job.state,
+                        "exit_code": job.exit_code, "error": job.error})
+
+    def _job_output(self, job, line):
+        if job.metadata.get("connection") is self.sock:
+            self._send({"type": "log", "job": job.metadata.get("farm_job"), "line": line.decode("utf-8", "replace")})
+
+    def _heartbeat(self, sock):
+        while self.sock is sock and not self.stopped:
+            self._send({"type": "heartbeat", "running": list(self.jobs)})
+            time.sleep(HEARTBEAT_SECONDS)
+
+    def serve_once(self):
+        sock = socket.create_connection(self.address, timeout=10)
+        sock.settimeout(None)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        self.sock = sock
+        self._send({"type": "hello", "worker": self.name, "slots": self.slots, "token": self.token})
+        threading.Thread(target=self._heartbeat, args=(sock,), daemon=True).start()
+        try:
+            for line in sock.makefile("rb"):
+                message = json.loads(line)
+                if message.get("type") == "job":
+                    self.jobs[message["job"]] = self.queue.add(
+                        message["name"], message["argv"], message["cwd"],
+                        **dict(message.get("metadata", {}), farm_job=message["job"], connection=sock))
+                elif message.get("type") == "cancel":
+                    job = self.jobs.get(message.get("job"))
+                    if job is not None:
+                        self.queue.cancel(job)
+                elif message.get("type") == "error":
+                    print(f"Coordinator refused worker {self.name}: {message.get('message')}")
+                    self.stopped = True
+        finally:
+            self.sock = None
+            sock.close()
+            # The coordinator hands these to other workers; don't render twice
+            for job in list(self.jobs.values()):
+                self.queue.cancel(job)
+            self.jobs.clear()
+
+    def run(self):
+        while not self.stopped:
+            try:
+                self.serve_once()
+            except (OSError, ValueError) as e:
+                print(f"Coordinator {self.address[0]}:{self.address[1]}: {e}")
+            if not self.stopped:
+                time.sleep(RECONNECT_SECONDS)
+
+    def stop(self):
+        self.stopped = True
+        sock = self.sock
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        self.queue.shutdown()
+
+
+def parse_address(text):
+    host, _, port = text.rpartition(":")
+    return (host or "127.0.0.1"), int(port or DEFAULT_PORT)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Spread render jobs over worker machines.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve_parser = commands.add_parser("serve", help="Run a coordinator for command files and wait for them to finish")
+    serve_parser.add_argument("files", nargs="+", help="Command .txt files")
+    serve_parser.add_argument("--bind", default="127.0.0.1", help="Address to listen on (default: 127.0.0.1; others need --token)")
+    serve_parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    serve_parser.add_argument("--token", default=os.environ.get("RENDER_FARM_TOKEN", ""), help="Shared secret workers must send")
+    serve_parser.add_argument("--chunk", action="store_true", help="Split cmdlrndr ROPs into frame chunks")
+    serve_parser.add_argument("-s", "--chunk-size", type=int, default=None, help="Frames per chunk (default: spread over --slots)")
+    serve_parser.add_argument("-j", "--slots", type=int, default=8, help="Total worker slots to plan chunks for (default: 8)")
+    serve_parser.add_argument("--skip-existing", action="store_true", help="With --chunk, leave out frames whose output is already on disk")
+    serve_parser.add_argument("--db", default=render_store.STORE_FILE, help=f"Job store (default: {render_store.STORE_FILE})")
+    worker_parser = commands.add_parser("worker", help="Run jobs for a coordinator")
+    worker_parser.add_argument("coordinator", help="host:port of the coordinator")
+    worker_parser.add_argument("-j", "--slots", type=int, default=render_queue.DEFAULT_SLOTS)
+    worker_parser.add_argument("--name", default=None, help="Worker name (default: host name)")
+    worker_parser.add_argument("--token", default=os.environ.get("RENDER_FARM_TOKEN", ""))
+    worker_parser.add_argument("--logs", default=None, help=f"Local log folder (default: {render_queue.LOG_DIR}/worker_<name>)")
+    worker_parser.add_argument("--houdini", default=None, help="Houdini executable; its bin folder is put on PATH")
+    worker_parser.add_argument("--adaptive", action="store_true", help="Adjust the slots (up to -j) to CPU load and free memory (Linux)")
+    worker_parser.add_argument("--db", default=render_store.STORE_FILE, help="Local store for learned memory use with --adaptive")
+    args = parser.parse_args()
+
+    if args.command == "worker":
+        host, port = parse_address(args.coordinator)
+        store = render_store.RenderStore(args.db) if args.adaptive else None
+        agent = FarmAgent(host, port, args.slots, args.name, args.token, args.logs, render_queue.render_env(args.houdini),
+                          store, args.adaptive)
+        print(f"Worker {agent.name}: {args.slots} slots, coordinator {host}:{port}")
+        try:
+            agent.run()
+        except KeyboardInterrupt:
+            agent.stop()
+        return 0
+
+    try:
+        coordinator = FarmCoordinator(args.bind, args.port, token=args.token)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    store = render_store.RenderStore(args.db)
+    coordinator.add_listener(render_store.StoreRecorder(store))
+    tracker = ProgressTracker(coordinator, store)
+    # Workers write to shared storage, which inotify here does not see
+    OutputWatcher(coordinator, store, poll=True).add_listener(tracker.frame_landed)
+
+    def report(job):
+        if job.state in FINISHED_STATES:
+            print(f"[{job.state}] {job.name} on {job.host} exit={job.exit_code} {job.error or job.log_path}")
+        elif job.state == QUEUED and job.error:
+            print(f"[requeued] {job.name}: {job.error}")
+
+    coordinator.add_listener(report)
+    jobs = []
+    for path in args.files:
+        if args.chunk:
+            jobs.extend(render_chunks.command_file_chunks(path, "hython", args.chunk_size, args.slots,
+                                                          skip_existing=args.skip_existing))
+        else:
+            jobs.extend(render_queue.command_file_jobs(path))
+    batch_id = render_store.submit_batch(coordinator, store, render_chunks.batch_name(args.files), jobs)
+    print(f"Batch {batch_id}: {len(jobs)} jobs, listening on {args.bind}:{coordinator.address[1]}")
+    try:
+        coordinator.wait()
+    except KeyboardInterrupt:
+        coordinator.shutdown()
+        coordinator.wait(10)
+    counts = coordinator.counts()
+    coordinator.shutdown()
+    print(f"{counts[DONE]} done, {counts[FAILED]} failed, {counts[CANCELLED]} cancelled")
+    return 1 if counts[FAILED] or counts[CANCELLED] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
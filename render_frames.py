@@ -0,0 +1,407 @@
+import os
+import re
+import sys
+import time
+import errno
+import select
+import struct
+import argparse
+import threading
+import traceback
+
+from render_queue import RUNNING, FINISHED_STATES
+
+FRAME_PART = re.compile(r"^(-?\d+)(?:-(-?\d+))?$")
+HOUDINI_VAR = re.compile(r"\$\{?([A-Za-z_]\w*)\}?")
+FRAME_VAR = re.compile(r"^(?:F(\d?)|FF)$")
+POLL_SECONDS = 2.0
+
+# inotify(7) through ctypes: no extra package, and any failure (not Linux,
+# watch limit reached) falls back to polling with os.scandir
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+EVENT_HEADER = struct.Struct("iIII")
+
+
+def parse_frames(spec):
+    frames = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        match = FRAME_PART.match(part)
+        if not match:
+            raise ValueError(f"Bad frame spec: {spec}")
+        start = int(match.group(1))
+        end = int(match.group(2)) if match.group(2) is not None else start
+        frames.extend(range(start, end + 1))
+    return frames
+
+
+def format_frames(frames):
+    # [1, 2, 3, 7, 9, 10] -> "1-3,7,9-10"
+    parts = []
+    run_start = previous = None
+    for frame in frames:
+        if previous is not None and frame == previous + 1:
+            previous = frame
+            continue
+        if run_start is not None:
+            parts.append(str(run_start) if run_start == previous else f"{run_start}-{previous}")
+        run_start = previous = frame
+    if run_start is not None:
+        parts.append(str(run_start) if run_start == previous else f"{run_start}-{previous}")
+    return ",".join(parts)
+
+
+def hip_variables(hip_path, rop_path=""):
+    hip_path = os.path.abspath(hip_path)
+    return {
+        "HIP": os.path.dirname(hip_path).replace("\\", "/"),
+        "HIPFILE": hip_path.replace("\\", "/"),
+        "HIPNAME": os.path.splitext(os.path.basename(hip_path))[0],
+        "OS": rop_path.rstrip("/").rsplit("/", 1)[-1],
+    }
+
+
+def expand_vars(path, variables, frame=None):
+    # $HIP, $HIPNAME, $OS, ${HIP}, $F/$F4/$FF (when frame is given) and
+    # environment variables such as $JOB; anything unknown is left as is
+    def replace(match):
+        name = match.group(1)
+        frame_match = FRAME_VAR.match(name)
+        if frame_match and frame is not None:
+            if name == "FF":
+                return f"{frame:g}"
+            return str(int(frame)).zfill(int(frame_match.group(1) or 0))
+        if name in variables:
+            return variables[name]
+        return os.environ.get(name, match.group(0))
+    return HOUDINI_VAR.sub(replace, path)
+
+
+def frame_key(frame):
+    return int(frame) if float(frame).is_integer() else float(frame)
+
+
+class OutputPattern:
+    # A ROP output path such as $HIP/geo/$HIPNAME.$OS.$F.bgeo.sc, split into
+    # its folder and a regex that maps file names in it back to frames
+    def __init__(self, pattern, hip_path, rop_path=""):
+        self.pattern = pattern.strip().strip('"')
+        self.variables = hip_variables(hip_path, rop_path)
+        directory, name = os.path.split(self.pattern.replace("\\", "/"))
+        self.directory = os.path.normpath(expand_vars(directory, self.variables)) if directory else "."
+        self.name_regex = None
+        if not self._frame_vars(directory):
+            self.name_regex = self._compile(name)
+
+    def _frame_vars(self, text):
+        return [match for match in HOUDINI_VAR.finditer(text) if FRAME_VAR.match(match.group(1))]
+
+    def _compile(self, name):
+        if not self._frame_vars(name):
+            return None
+        parts = []
+        position = 0
+        seen = False
+        for match in HOUDINI_VAR.finditer(name):
+            parts.append(re.escape(expand_vars(name[position:match.start()], self.variables)))
+            var = match.group(1)
+            if FRAME_VAR.match(var):
+                if seen:
+                    parts.append("(?P=frame)")
+                else:
+                    parts.append(r"(?P<frame>-?\d+\.\d+|-?\d+)" if var == "FF" else r"(?P<frame>-?\d+)")
+                    seen = True
+            else:
+                parts.append(re.escape(expand_vars(match.group(0), self.variables)))
+            position = match.end()
+        parts.append(re.escape(expand_vars(name[position:], self.variables)))
+        return re.compile("".join(parts) + "$")
+
+    def path(self, frame):
+        return os.path.normpath(expand_vars(self.pattern, self.variables, frame))
+
+    def frame_of(self, name):
+        if self.name_regex is None:
+            return None
+        match = self.name_regex.match(name)
+        return frame_key(float(match.group("frame"))) if match else None
+
+
+def existing_frames(pattern, frames=None):
+    # {frame: size} of non-empty outputs: one os.scandir pass over the output
+    # folder, or a stat per frame when the folder itself depends on the frame
+    found = {}
+    if pattern.name_regex is None:
+        for frame in frames or ():
+            try:
+                size = os.stat(pattern.path(frame)).st_size
+            except OSError:
+                continue
+            if size > 0:
+                found[frame_key(frame)] = size
+        return found
+    wanted = None if frames is None else {frame_key(frame) for frame in frames}
+    try:
+        entries = os.scandir(pattern.directory)
+    except OSError:
+        return found
+    with entries:
+        for entry in entries:
+            frame = pattern.frame_of(entry.name)
+            if frame is None or (wanted is not None and frame not in wanted):
+                continue
+            try:
+                size = entry.stat().st_size
+            except OSError:
+                continue
+            if size > 0:
+                found[frame] = size
+    return found
+
+
+def chunk_pattern(metadata):
+    if metadata.get("output") and metadata.get("hip"):
+        return OutputPattern(metadata["output"], metadata["hip"], metadata.get("rop", ""))
+    return None
+
+
+def skip_existing(argv, metadata):
+    # For a hython_render.py chunk job, drops the frames whose output is
+    # on disk now (a file deleted to force a re-render is rendered again).
+    # Returns (argv, metadata), or None when every frame exists; other jobs
+    # are returned unchanged.
+    pattern = chunk_pattern(metadata)
+    spec = metadata.get("frames")
+    if pattern is None or not spec or not argv or argv[-1] != spec:
+        return argv, metadata
+    frames = parse_frames(spec)
+    done = existing_frames(pattern, frames)
+    missing = [frame for frame in frames if frame_key(frame) not in done]
+    if not missing:
+        return None
+    if len(missing) == len(frames):
+        return argv, metadata
+    spec = format_frames(missing)
+    return argv[:-1] + [spec], dict(metadata, frames=spec, frame_count=len(missing))
+
+
+class Inotify:
+    def __init__(self):
+        import ctypes
+        import ctypes.util
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.ctypes = ctypes
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+    def add_watch(self, path, mask=IN_CLOSE_WRITE | IN_MOVED_TO):
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            raise OSError(self.ctypes.get_errno(), f"inotify_add_watch failed for {path}")
+        return wd
+
+    def remove_watch(self, wd):
+        self.libc.inotify_rm_watch(self.fd, wd)
+
+    def read(self, timeout):
+        # [(wd, name)] of files closed after writing or moved in
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            data = os.read(self.fd, 65536)
+        except OSError as e:
+            if e.errno == errno.EAGAIN:
+                return []
+            raise
+        events = []
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            wd, _, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+            if name:
+                events.append((wd, os.fsdecode(name)))
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+
+class OutputWatcher:
+    # Marks frames of running chunk jobs complete as soon as their output
+    # file lands, instead of at process exit. Uses inotify on the output
+    # folders where it can and polls them with os.scandir otherwise (also
+    # for network storage written from other machines, where inotify sees
+    # nothing: pass poll=True).
+    def __init__(self, queue, store=None, poll=False, interval=POLL_SECONDS):
+        self.queue = queue
+        self.store = store
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.jobs = {}
+        self.folders = {}
+        self.watches = {}
+        self.listeners = []
+        self.inotify = None
+        if not poll and sys.platform.startswith("linux"):
+            try:
+                self.inotify = Inotify()
+            except (OSError, AttributeError):
+                self.inotify = None
+        self.stopped = threading.Event()
+        queue.add_listener(self._job_changed)
+        threading.Thread(target=self._run, daemon=True).start()
+
+    @property
+    def mode(self):
+        return "inotify" if self.inotify is not None else "polling"
+
+    def add_listener(self, listener):
+        # listener(job, frame, path), from the watcher thread
+        self.listeners.append(listener)
+
+    def written(self, job):
+        # (frames on disk, frames in the chunk), or None
+        with self.lock:
+            watch = self.jobs.get(job.job_id)
+            return (len(watch["seen"]), len(watch["frames"])) if watch else None
+
+    def _job_changed(self, job):
+        if job.state == RUNNING and job.job_id not in self.jobs:
+            self._add(job)
+        elif job.state in FINISHED_STATES and job.job_id in self.jobs:
+            # Catch anything that landed between the last event and exit
+            self._scan(self.jobs[job.job_id]["pattern"].directory, settled=True)
+            self._remove(job)
+
+    def _add(self, job):
+        pattern = chunk_pattern(job.metadata)
+        if pattern is None or pattern.name_regex is None or not job.metadata.get("frames"):
+            return
+        frames = {frame_key(frame) for frame in parse_frames(job.metadata["frames"])}
+        try:
+            os.makedirs(pattern.directory, exist_ok=True)
+        except OSError:
+            return
+        folder = pattern.directory
+        with self.lock:
+            self.jobs[job.job_id] = {"job": job, "pattern": pattern, "frames": frames, "seen": set(), "sizes": {}}
+            self.folders.setdefault(folder, set()).add(job.job_id)
+            if self.inotify is not None and folder not in self.watches.values():
+                try:
+                    self.watches[self.inotify.add_watch(folder)] = folder
+                except OSError:
+                    pass
+        self._scan(folder)
+
+    def _remove(self, job):
+        with self.lock:
+            watch = self.jobs.pop(job.job_id, None)
+            if watch is None:
+                return
+            folder = watch["pattern"].directory
+            job_ids = self.folders.get(folder, set())
+            job_ids.discard(job.job_id)
+            if not job_ids:
+                self.folders.pop(folder, None)
+                for wd, watched in list(self.watches.items()):
+                    if watched == folder:
+                        self.inotify.remove_watch(wd)
+                        del self.watches[wd]
+
+    def _landed(self, folder, name, settled=True):
+        # settled: the file is known to be complete (closed after writing,
+        # or the job has exited). A polled file only counts once its size
+        # is the same on two scans in a row, so one still being written
+        # is not taken for a finished frame.
+        with self.lock:
+            watches = [self.jobs[job_id] for job_id in self.folders.get(folder, ())]
+        for watch in watches:
+            frame = watch["pattern"].frame_of(name)
+            if frame is None or frame not in watch["frames"] or frame in watch["seen"]:
+                continue
+            path = os.path.join(folder, name)
+            try:
+                size = os.stat(path).st_size
+            except OSError:
+                continue
+            if size <= 0:
+                continue
+            if not settled:
+                previous = watch["sizes"].get(name)
+                watch["sizes"][name] = size
+                if previous != size:
+                    continue
+            watch["seen"].add(frame)
+            job = watch["job"]
+            # Like RenderQueue listeners: a failing store write or listener
+            # is reported, and the watcher thread keeps going
+            try:
+                if self.store is not None and job.metadata.get("chunk_id") is not None:
+                    self.store.record_output(job.metadata["chunk_id"], frame, path, size)
+                for listener in self.listeners:
+                    listener(job, frame, path)
+            except Exception:
+                traceback.print_exc()
+
+    def _scan(self, folder, settled=False):
+        try:
+            with os.scandir(folder) as entries:
+                names = [entry.name for entry in entries]
+        except OSError:
+            return
+        for name in names:
+            self._landed(folder, name, settled)
+
+    def _run(self):
+        while not self.stopped.is_set():
+            if self.inotify is not None:
+                try:
+                    events = self.inotify.read(self.interval)
+                except OSError:
+                    events = []
+                    self.stopped.wait(self.interval)
+                for wd, name in events:
+                    folder = self.watches.get(wd)
+                    if folder is not None:
+                        self._landed(folder, name)
+            else:
+                with self.lock:
+                    folders = list(self.folders)
+                for folder in folders:
+                    self._scan(folder)
+                self.stopped.wait(self.interval)
+
+    def stop(self):
+        self.stopped.set()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check which frames of a ROP output pattern are already on disk.")
+    parser.add_argument("pattern", help="Output path, e.g. '$HIP/geo/$HIPNAME.$OS.$F.bgeo.sc'")
+    parser.add_argument("hip", help="The .hip file ($HIP, $HIPNAME)")
+    parser.add_argument("frames", help="Frame spec, e.g. 1-240")
+    parser.add_argument("--rop", default="", help="ROP path ($OS)")
+    args = parser.parse_args()
+
+    pattern = OutputPattern(args.pattern, args.hip, args.rop)
+    frames = parse_frames(args.frames)
+    start = time.perf_counter()
+    found = existing_frames(pattern, frames)
+    missing = [frame for frame in frames if frame_key(frame) not in found]
+    print(f"{len(found)} of {len(frames)} frames on disk in {pattern.directory} ({time.perf_counter() - start:.3f}s)")
+    if missing:
+        print(f"Missing: {format_frames(missing)}")
+    return 0 if not missing else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
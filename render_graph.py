@@ -0,0 +1,146 @@
+import os
+import sys
+import shlex
+import argparse
+
+import render_queue
+import render_chunks
+from hip_archive import HipArchiveError
+from hython_client import hython_from_houdini
+from render_queue import HIP_EXTENSIONS
+
+STAMP_DIR = "stamps"
+MAKE = "make"
+NINJA = "ninja"
+GRAPH_EXTENSIONS = {".ninja": NINJA, ".mk": MAKE}
+
+
+def graph_format(path):
+    # build.ninja -> ninja; Makefile, *.mk and anything else -> make
+    return GRAPH_EXTENSIONS.get(os.path.splitext(path)[1].lower(), MAKE)
+
+
+def graph_jobs(files, chunk=False, hython="hython", size=None, slots=1, skip_existing=False):
+    specs = []
+    for path in files:
+        if chunk:
+            specs.extend(render_chunks.command_file_chunks(path, hython, size, slots, skip_existing=skip_existing))
+        else:
+            specs.extend(render_queue.command_file_jobs(path))
+    return specs
+
+
+def job_inputs(argv, cwd, metadata):
+    # A target is stale when its command file or scene is newer than its stamp
+    inputs = [metadata.get("source"), metadata.get("hip")]
+    inputs.extend(os.path.join(cwd, arg) for arg in argv if arg.lower().endswith(HIP_EXTENSIONS))
+    paths = []
+    for path in inputs:
+        if path and os.path.isfile(path):
+            path = os.path.abspath(path)
+            if path not in paths:
+                paths.append(path)
+    return paths
+
+
+def build_targets(specs, log_dir=render_queue.LOG_DIR):
+    # One target per job: the command runs in its own folder with output in
+    # log_dir/<name>.log, and the stamp is only touched when it exits 0, so a
+    # re-run of make/ninja skips everything that already rendered.
+    targets = []
+    used = set()
+    for name, argv, cwd, metadata in specs:
+        base = render_queue.safe_filename(name)
+        stem = base
+        index = 1
+        while stem in used:
+            index += 1
+            stem = f"{base}_{index}"
+        used.add(stem)
+        log = f"{log_dir}/{stem}.log"
+        command = f"mkdir -p {shlex.quote(log_dir)} && (cd {shlex.quote(os.path.abspath(cwd))} && {shlex.join(argv)}) > {shlex.quote(log)} 2>&1"
+        targets.append({"name": name, "stamp": f"{STAMP_DIR}/{stem}.stamp", "log": log,
+                        "inputs": job_inputs(argv, cwd, metadata), "command": command})
+    return targets
+
+
+def make_path(path):
+    return path.replace("$", "$$").replace(" ", "\\ ").replace(":", "\\:").replace("#", "\\#")
+
+
+def ninja_path(path):
+    return path.replace("$", "$$").replace(" ", "$ ").replace(":", "$:")
+
+
+def write_makefile(f, targets, header):
+    f.write(f"{header}\n")
+    f.write(".PHONY: all clean\n\n")
+    f.write(f"all: {' '.join(make_path(target['stamp']) for target in targets)}\n\n")
+    for target in targets:
+        f.write(f"{make_path(target['stamp'])}: {' '.join(make_path(path) for path in target['inputs'])}\n")
+        f.write(f"\t@echo {shlex.quote(target['name']).replace('$', '$$')}\n")
+        f.write(f"\t@{target['command'].replace('$', '$$')}\n")
+        f.write("\t@mkdir -p $(@D) && touch $@\n\n")
+    f.write(f"clean:\n\trm -rf {STAMP_DIR}\n")
+
+
+def write_ninja(f, targets, header, slots=None):
+    f.write(f"{header}\n")
+    f.write("ninja_required_version = 1.3\n\n")
+    if slots:
+        # hython renders are too heavy for ninja's default of one per core
+        f.write(f"pool render\n  depth = {slots}\n\n")
+    f.write("rule render\n  command = $cmd && touch $out\n  description = $name\n")
+    if slots:
+        f.write("  pool = render\n")
+    f.write("\n")
+    for target in targets:
+        f.write(f"build {ninja_path(target['stamp'])}: render {' '.join(ninja_path(path) for path in target['inputs'])}\n")
+        f.write(f"  cmd = {target['command'].replace('$', '$$')}\n")
+        f.write(f"  name = {target['name'].replace('$', '$$')}\n")
+    f.write(f"\nbuild all: phony {' '.join(ninja_path(target['stamp']) for target in targets)}\n")
+    f.write("default all\n")
+
+
+def write_graph(path, specs, fmt=None, slots=None):
+    # Stamps and logs are relative to the folder of the graph file, which is
+    # where make/ninja run from
+    fmt = fmt or graph_format(path)
+    targets = build_targets(specs)
+    tool = "make -j N" if fmt == MAKE else "ninja"
+    header = (f"# Generated by render_graph.py: {len(targets)} render jobs.\n"
+              f"# Run with `{tool}` from this folder; jobs that finished are skipped on the next run.")
+    with open(path, "w", encoding="utf-8", newline="\n") as f:
+        if fmt == NINJA:
+            write_ninja(f, targets, header, slots)
+        else:
+            write_makefile(f, targets, header)
+    return len(targets)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write render command files as a Makefile or ninja build graph.")
+    parser.add_argument("files", nargs="+", help="Command files, e.g. hip/cmdlrndr/rop_geometry1/CommandLineCode__rop_geometry1.txt")
+    parser.add_argument("-o", "--output", default="Makefile", help="Makefile, *.mk or *.ninja (default: Makefile)")
+    parser.add_argument("-f", "--format", choices=(MAKE, NINJA), default=None, help="Override the format implied by --output")
+    parser.add_argument("--chunk", action="store_true", help="Split cmdlrndr ROPs into frame chunks, one target each")
+    parser.add_argument("-s", "--chunk-size", type=int, default=None, help="Frames per chunk (default: spread over the slots)")
+    parser.add_argument("-j", "--slots", type=int, default=None, help="Concurrent renders: chunk planning and the ninja pool depth")
+    parser.add_argument("--skip-existing", action="store_true", help="With --chunk, leave out frames whose output is already on disk")
+    parser.add_argument("--houdini", default=None, help="Houdini executable; hython is taken from its bin folder")
+    args = parser.parse_args()
+
+    hython = hython_from_houdini(args.houdini) if args.houdini else "hython"
+    try:
+        specs = graph_jobs(args.files, args.chunk, hython, args.chunk_size, args.slots or os.cpu_count() or 1,
+                           args.skip_existing)
+    except (OSError, ValueError, HipArchiveError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    count = write_graph(args.output, specs, args.format, args.slots)
+    print(f"Wrote {count} targets to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,290 @@
+import re
+import sys
+import time
+import argparse
+import threading
+from collections import deque
+
+from render_queue import RUNNING, DONE, FINISHED_STATES
+
+RECENT_FRAMES = 20
+FLUSH_FRAMES = 25
+FLUSH_SECONDS = 5.0
+THROUGHPUT_WINDOW = 300.0
+
+# hython_render.py: "CHUNK <rop> <frames> <n> frames", "FRAME <frame> <seconds>"
+CHUNK_LINE = re.compile(r"^CHUNK \S+ \S+ (\d+) frames")
+FRAME_LINE = re.compile(r"^FRAME (-?\d+(?:\.\d+)?) (\d+(?:\.\d+)?)")
+# Verbose ROPs (hbatch -v, render -V): "Rendering frame 12 (3 of 24)"
+ROP_FRAME = re.compile(r"\b(?:Rendering|Writing|Generating) frame\s+(-?\d+(?:\.\d+)?)(?:\s*\((\d+) of (\d+)\))?", re.I)
+# Mantra/Karma with -a: progress of the current frame
+ALF_PROGRESS = re.compile(r"ALF_PROGRESS\s+(\d+)%")
+# The .cmd echoes each command under hbatch -v; PDG reports work item counts
+TOPCOOK = re.compile(r"^\s*topcook\s+(\S+)")
+WORK_ITEMS = re.compile(r"(\d+)\s*(?:/|of)\s*(\d+)\s+work items", re.I)
+
+
+class JobProgress:
+    # Follows one job's output line by line. Only counters and the per-frame
+    # times are kept, never the log itself.
+    def __init__(self, total=None, started=None):
+        self.total = total
+        self.done = 0
+        self.frame_times = {}
+        self.recent = deque(maxlen=RECENT_FRAMES)
+        self.current = None
+        self.current_started = None
+        self.percent = 0
+        self.stage = ""
+        self.items = None
+        self.started = started or time.time()
+        self.pending = []
+        self.landed = set()
+
+    def _complete(self, frame, seconds):
+        if frame not in self.frame_times:
+            self.done += 1
+        self.frame_times[frame] = seconds
+        self.recent.append(seconds)
+        self.pending.append((frame, seconds, time.time()))
+        self.percent = 0
+
+    def feed(self, line):
+        # Returns the frames completed by this line
+        count = len(self.pending)
+        match = FRAME_LINE.match(line)
+        if match:
+            self.current = None
+            self._complete(float(match.group(1)), float(match.group(2)))
+            return len(self.pending) - count
+        match = CHUNK_LINE.match(line)
+        if match:
+            self.total = int(match.group(1))
+            return 0
+        match = ROP_FRAME.search(line)
+        if match:
+            now = time.time()
+            # A frame ends when the next one starts
+            if self.current is not None:
+                self._complete(self.current, now - self.current_started)
+            self.current = float(match.group(1))
+            self.current_started = now
+            if match.group(3):
+                self.total = int(match.group(3))
+            return len(self.pending) - count
+        match = ALF_PROGRESS.search(line)
+        if match:
+            self.percent = min(100, int(match.group(1)))
+            return 0
+        match = TOPCOOK.match(line)
+        if match:
+            self.stage = f"topcook {match.group(1)}"
+            self.items = None
+            return 0
+        match = WORK_ITEMS.search(line)
+        if match:
+            self.items = (int(match.group(1)), int(match.group(2)))
+        return 0
+
+    def land(self, frame):
+        # An output file seen on disk, possibly before the log says so
+        self.landed.add(float(frame))
+
+    @property
+    def completed(self):
+        return max(self.done, len(self.landed))
+
+    def finish(self, succeeded):
+        completed = 0
+        if succeeded and self.current is not None:
+            self._complete(self.current, time.time() - self.current_started)
+            completed = 1
+        self.current = None
+        return completed
+
+    @property
+    def average(self):
+        return sum(self.recent) / len(self.recent) if self.recent else None
+
+    @property
+    def fraction(self):
+        if self.total:
+            return min(1.0, (self.completed + self.percent / 100.0) / self.total)
+        if self.items and self.items[1]:
+            return min(1.0, self.items[0] / self.items[1])
+        return None
+
+    @property
+    def throughput(self):
+        # Frames per minute since the job started
+        elapsed = time.time() - self.started
+        return self.done / elapsed * 60 if self.done and elapsed > 0 else None
+
+    @property
+    def eta(self):
+        if not self.total or self.average is None:
+            return None
+        remaining = max(0, self.total - self.completed) * self.average
+        if self.current is not None:
+            remaining -= min(self.average, time.time() - self.current_started)
+        return max(0.0, remaining)
+
+    def describe(self):
+        parts = []
+        if self.total:
+            parts.append(f"{self.completed}/{self.total} frames")
+        elif self.done:
+            parts.append(f"{self.done} frames")
+        if len(self.landed) > self.done:
+            parts.append(f"{len(self.landed)} on disk")
+        if self.items:
+            parts.append(f"{self.stage or 'work items'} {self.items[0]}/{self.items[1]}")
+        elif self.stage:
+            parts.append(self.stage)
+        if self.average is not None:
+            parts.append(f"{self.average:.2f}s/frame" if self.average < 10 else f"{self.average:.0f}s/frame")
+        if self.eta is not None and self.completed < self.total:
+            parts.append(f"ETA {format_seconds(self.eta)}")
+        return ", ".join(parts)
+
+
+def format_seconds(seconds):
+    seconds = int(round(seconds))
+    if seconds >= 3600:
+        return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+    if seconds >= 60:
+        return f"{seconds // 60}m{seconds % 60:02d}s"
+    return f"{seconds}s"
+
+
+class ProgressTracker:
+    # Output and state listener for a RenderQueue (or FarmCoordinator): keeps
+    # a JobProgress per job and writes finished frames to the job store in
+    # small batches while the job runs
+    def __init__(self, queue, store=None):
+        self.queue = queue
+        self.store = store
+        self.lock = threading.Lock()
+        self.jobs = {}
+        self.flushed = {}
+        self.completions = deque()
+        queue.add_output_listener(self._output)
+        queue.add_listener(self._job_changed)
+
+    def progress(self, job):
+        return self.jobs.get(job.job_id)
+
+    def _attempt_progress(self, job):
+        # A job handed back to the queue (farm) starts again from scratch
+        progress = self.jobs.get(job.job_id)
+        if progress is None or progress.started != job.started:
+            progress = self.jobs[job.job_id] = JobProgress(job.metadata.get("frame_count"), job.started)
+            self.flushed[job.job_id] = time.time()
+        return progress
+
+    def _output(self, job, line):
+        progress = self._attempt_progress(job)
+        completed = progress.feed(line.decode("utf-8", "replace").rstrip())
+        if completed:
+            now = time.time()
+            with self.lock:
+                self.completions.extend([now] * completed)
+        if len(progress.pending) >= FLUSH_FRAMES or (progress.pending and time.time() - self.flushed[job.job_id] > FLUSH_SECONDS):
+            self._flush(job, progress)
+
+    def frame_landed(self, job, frame, path):
+        # OutputWatcher listener
+        self._attempt_progress(job).land(frame)
+
+    def _flush(self, job, progress):
+        frames, progress.pending = progress.pending, []
+        self.flushed[job.job_id] = time.time()
+        attempt_id = job.metadata.get("attempt_id")
+        if self.store is not None and attempt_id is not None and frames:
+            self.store.record_frames(attempt_id, frames, progress.done)
+
+    def _job_changed(self, job):
+        if job.state == RUNNING:
+            self._attempt_progress(job)
+        elif job.state in FINISHED_STATES:
+            progress = self.jobs.get(job.job_id)
+            if progress is not None:
+                if progress.finish(job.state == DONE):
+                    with self.lock:
+                        self.completions.append(time.time())
+                self._flush(job, progress)
+
+    def throughput(self):
+        # Frames per minute over all jobs, from the last few minutes
+        now = time.time()
+        with self.lock:
+            while self.completions and now - self.completions[0] > THROUGHPUT_WINDOW:
+                self.completions.popleft()
+            if not self.completions:
+                return None
+            window = max(60.0, now - self.completions[0])
+            return len(self.completions) / window * 60
+
+    def remaining_frames(self):
+        remaining = 0
+        for job in self.queue.snapshot():
+            if job.state in FINISHED_STATES:
+                continue
+            progress = self.jobs.get(job.job_id)
+            if job.state == RUNNING and progress is not None and progress.total:
+                remaining += max(0, progress.total - progress.completed)
+            else:
+                remaining += job.metadata.get("frame_count", 0)
+        return remaining
+
+    def eta(self):
+        throughput = self.throughput()
+        remaining = self.remaining_frames()
+        if not throughput or not remaining:
+            return None
+        return remaining / throughput * 60
+
+
+def follow(path, poll=0.5):
+    # Lines of a log that may still be written, like tail -f
+    with open(path, "rb") as f:
+        while True:
+            line = f.readline()
+            if line:
+                yield line
+            else:
+                time.sleep(poll)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-frame timing, progress and ETA from render logs.")
+    parser.add_argument("logs", nargs="+", help="Render Queue logs (render_logs/*.log)")
+    parser.add_argument("-f", "--follow", action="store_true", help="Keep reading a log that is still being written")
+    parser.add_argument("--frames", action="store_true", help="Print every frame time")
+    args = parser.parse_args()
+
+    for path in args.logs:
+        progress = JobProgress()
+        lines = follow(path) if args.follow else open(path, "rb")
+        try:
+            for line in lines:
+                text = line.decode("utf-8", "replace").rstrip()
+                if text.startswith("# exit code"):
+                    progress.finish(text.endswith(" 0"))
+                    break
+                if progress.feed(text) and args.follow:
+                    print(f"{path}: {progress.describe()}", flush=True)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if not args.follow:
+                lines.close()
+        if args.frames:
+            for frame, seconds in sorted(progress.frame_times.items()):
+                print(f"{frame:g}\t{seconds:.3f}")
+        print(f"{path}: {progress.describe() or 'no frame progress found'}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
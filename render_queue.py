@@ -0,0 +1,335 @@
+import os
+import sys
+import time
+import shlex
+import argparse
+import itertools
+import threading
+import traceback
+import subprocess
+from collections import deque
+
+DEFAULT_SLOTS = 4
+LOG_DIR = "render_logs"
+HIP_EXTENSIONS = (".hip", ".hipnc", ".hiplc")
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATES = (DONE, FAILED, CANCELLED)
+
+
+def split_command(line):
+    if os.name == "nt":
+        return [part[1:-1] if len(part) > 1 and part[0] == part[-1] == '"' else part
+                for part in shlex.split(line, posix=False)]
+    return shlex.split(line)
+
+
+def safe_filename(name):
+    return "".join(char if char.isalnum() or char in "-_." else "_" for char in name)
+
+
+def command_cwd(txt_path, argv):
+    # Command files use paths relative to the scene folder
+    # (hbatch -v -c ./cmdlrndr/.../x.cmd test.hip), while the .txt lives a
+    # couple of levels below it: run from the nearest folder holding the hip.
+    folder = os.path.dirname(os.path.abspath(txt_path))
+    hips = [arg for arg in argv if arg.lower().endswith(HIP_EXTENSIONS)]
+    if hips and not os.path.isabs(hips[-1]):
+        candidate = folder
+        for _ in range(5):
+            if os.path.exists(os.path.join(candidate, hips[-1])):
+                return candidate
+            parent = os.path.dirname(candidate)
+            if parent == candidate:
+                break
+            candidate = parent
+    return folder
+
+
+def read_command_file(txt_path):
+    commands = []
+    with open(txt_path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith(("#", "REM ", "rem ")):
+                argv = split_command(line)
+                commands.append((argv, command_cwd(txt_path, argv)))
+    return commands
+
+
+def command_file_jobs(txt_path):
+    # One job spec per command line: (name, argv, cwd, metadata)
+    base = os.path.splitext(os.path.basename(txt_path))[0]
+    commands = read_command_file(txt_path)
+    return [(base if len(commands) == 1 else f"{base} #{index}", argv, cwd, {"source": txt_path})
+            for index, (argv, cwd) in enumerate(commands, 1)]
+
+
+def render_env(houdini_path=None):
+    # hbatch/hython live next to the Houdini executable from the settings
+    env = dict(os.environ)
+    if houdini_path:
+        bin_dir = os.path.dirname(houdini_path)
+        if os.path.isdir(bin_dir):
+            env["PATH"] = bin_dir + os.pathsep + env.get("PATH", "")
+    return env
+
+
+class RenderJob:
+    def __init__(self, job_id, name, argv, cwd, metadata=None):
+        self.job_id = job_id
+        self.name = name
+        self.argv = argv
+        self.cwd = cwd
+        self.metadata = metadata or {}
+        self.state = QUEUED
+        self.exit_code = None
+        self.error = ""
+        self.pid = None
+        self.host = None
+        self.started = None
+        self.finished = None
+        self.log_path = None
+        self.process = None
+        self.cancel_requested = False
+
+    @property
+    def wall_time(self):
+        if self.started is None:
+            return None
+        return (self.finished or time.time()) - self.started
+
+    @property
+    def command(self):
+        return subprocess.list2cmdline(self.argv)
+
+
+class RenderQueue:
+    # Runs render commands as separate processes, at most `slots` at a time.
+    # Each job gets its own log file (stdout and stderr merged, streamed to
+    # disk line by line) and a thread that waits on the process; listeners
+    # are called from those threads whenever a job changes state.
+    def __init__(self, slots=DEFAULT_SLOTS, log_dir=LOG_DIR, env=None):
+        self.slots = max(1, slots)
+        self.log_dir = log_dir
+        self.env = env
+        self.jobs = []
+        self.pending = deque()
+        self.running = {}
+        self.listeners = []
+        self.output_listeners = []
+        # Optional admit(job, running_jobs) -> bool, asked before each start
+        # (see render_scheduler); a refused job waits at the head of the queue
+        self.admit = None
+        self.ids = itertools.count(1)
+        self.lock = threading.Condition()
+        self.stopped = False
+
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
+    def add_output_listener(self, listener):
+        # Called as listener(job, line) for every line of job output, from the
+        # job's thread, right after the line reached the log
+        self.output_listeners.append(listener)
+
+    def _call_listener(self, listener, *args):
+        # Listeners write to the job store and the UI; one that fails (e.g.
+        # "database is locked") is reported and skipped, so the job thread
+        # still finishes the job and frees its slot
+        try:
+            listener(*args)
+        except Exception:
+            traceback.print_exc()
+
+    def _notify(self, job):
+        for listener in self.listeners:
+            self._call_listener(listener, job)
+
+    def _output(self, job, line):
+        for listener in self.output_listeners:
+            self._call_listener(listener, job, line)
+
+    def add(self, name, argv, cwd=None, **metadata):
+        with self.lock:
+            job = RenderJob(next(self.ids), name, list(argv), cwd or os.getcwd(), metadata)
+            self.jobs.append(job)
+            self.pending.append(job)
+        self._notify(job)
+        self._dispatch()
+        return job
+
+    def add_command_file(self, txt_path):
+        return [self.add(name, argv, cwd, **metadata) for name, argv, cwd, metadata in command_file_jobs(txt_path)]
+
+    def set_slots(self, slots):
+        with self.lock:
+            self.slots = max(1, slots)
+        self._dispatch()
+
+    def _dispatch(self):
+        started = []
+        with self.lock:
+            while not self.stopped and self.pending and len(self.running) < self.slots:
+                job = self.pending[0]
+                if job.state == QUEUED and self.admit is not None and self.running \
+                        and not self.admit(job, list(self.running.values())):
+                    break
+                self.pending.popleft()
+                if job.state != QUEUED:
+                    continue
+                job.state = RUNNING
+                job.started = time.time()
+                self.running[job.job_id] = job
+                started.append(job)
+        for job in started:
+            threading.Thread(target=self._run, args=(job,), daemon=True).start()
+
+    def _open_log(self, job):
+        os.makedirs(self.log_dir, exist_ok=True)
+        stamp = time.strftime("%Y%m%d_%H%M%S", time.localtime(job.started))
+        job.log_path = os.path.abspath(os.path.join(self.log_dir, f"{stamp}_{job.job_id:05d}_{safe_filename(job.name)}.log"))
+        return open(job.log_path, "wb")
+
+    def _run(self, job):
+        try:
+            with self._open_log(job) as log:
+                log.write(f"# {job.command}\n# cwd: {job.cwd}\n".encode("utf-8"))
+                log.flush()
+                creationflags = subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0
+                try:
+                    process = subprocess.Popen(job.argv, cwd=job.cwd, env=self.env, stdin=subprocess.DEVNULL,
+                                               stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                               creationflags=creationflags)
+                except (OSError, ValueError, TypeError) as e:
+                    # Missing executable, or an argv Popen refuses (embedded NUL from a corrupt command file)
+                    job.error = f"Could not start {job.argv[0] if job.argv else job.name}: {e}"
+                    log.write(f"# {job.error}\n".encode("utf-8"))
+                    self._finish(job, FAILED)
+                    return
+                with self.lock:
+                    job.process = process
+                    job.pid = process.pid
+                    if job.cancel_requested:
+                        process.terminate()
+                self._notify(job)
+                for line in process.stdout:
+                    log.write(line)
+                    log.flush()
+                    self._output(job, line)
+                process.stdout.close()
+                job.exit_code = process.wait()
+                log.write(f"# exit code {job.exit_code}\n".encode("utf-8"))
+        except Exception as e:
+            # Whatever goes wrong, the job must end and give its slot back
+            job.error = str(e) if isinstance(e, OSError) else f"{type(e).__name__}: {e}"
+            process = job.process
+            if process is not None and process.poll() is None:
+                process.kill()
+            self._finish(job, FAILED)
+            return
+        if job.cancel_requested:
+            self._finish(job, CANCELLED)
+        else:
+            self._finish(job, DONE if job.exit_code == 0 else FAILED)
+
+    def _finish(self, job, state):
+        with self.lock:
+            job.state = state
+            job.finished = time.time()
+            job.process = None
+            self.running.pop(job.job_id, None)
+        self._notify(job)
+        with self.lock:
+            self.lock.notify_all()
+        self._dispatch()
+
+    def cancel(self, job):
+        with self.lock:
+            if job.state == QUEUED:
+                job.state = CANCELLED
+                job.finished = time.time()
+                cancelled = True
+            else:
+                cancelled = False
+                if job.state == RUNNING:
+                    job.cancel_requested = True
+                    if job.process is not None:
+                        job.process.terminate()
+            self.lock.notify_all()
+        if cancelled:
+            self._notify(job)
+
+    def retry(self, job):
+        if job.state not in (FAILED, CANCELLED):
+            return None
+        return self.add(job.name, job.argv, job.cwd, **job.metadata)
+
+    def clear_finished(self):
+        with self.lock:
+            self.jobs = [job for job in self.jobs if job.state not in FINISHED_STATES]
+
+    def snapshot(self):
+        with self.lock:
+            return list(self.jobs)
+
+    def counts(self):
+        counts = dict.fromkeys((QUEUED, RUNNING, DONE, FAILED, CANCELLED), 0)
+        with self.lock:
+            for job in self.jobs:
+                counts[job.state] += 1
+        return counts
+
+    def wait(self, timeout=None):
+        deadline = None if timeout is None else time.time() + timeout
+        with self.lock:
+            while self.running or any(job.state == QUEUED for job in self.pending):
+                remaining = None if deadline is None else deadline - time.time()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self.lock.wait(remaining)
+        return True
+
+    def shutdown(self):
+        with self.lock:
+            self.stopped = True
+            pending = [job for job in self.pending if job.state == QUEUED]
+            running = list(self.running.values())
+        for job in pending + running:
+            self.cancel(job)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run render command files (.txt) as parallel jobs.")
+    parser.add_argument("files", nargs="+", help="Command .txt files, e.g. hip/cmdlrndr/rop_geometry1/CommandLineCode__rop_geometry1.txt")
+    parser.add_argument("-j", "--slots", type=int, default=DEFAULT_SLOTS, help=f"Concurrent jobs (default: {DEFAULT_SLOTS})")
+    parser.add_argument("--logs", default=LOG_DIR, help=f"Log folder (default: {LOG_DIR})")
+    parser.add_argument("--houdini", default=None, help="Houdini executable; its bin folder is put on PATH")
+    args = parser.parse_args()
+
+    queue = RenderQueue(args.slots, args.logs, render_env(args.houdini))
+
+    def report(job):
+        if job.state in FINISHED_STATES:
+            wall = f"{job.wall_time:.1f}s" if job.wall_time is not None else "-"
+            print(f"[{job.state}] {job.name} exit={job.exit_code} {wall} {job.error or job.log_path}")
+
+    queue.add_listener(report)
+    for path in args.files:
+        queue.add_command_file(path)
+    try:
+        queue.wait()
+    except KeyboardInterrupt:
+        queue.shutdown()
+        queue.wait(10)
+    counts = queue.counts()
+    print(f"{counts[DONE]} done, {counts[FAILED]} failed, {counts[CANCELLED]} cancelled")
+    return 1 if counts[FAILED] or counts[CANCELLED] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,158 @@
+import os
+import threading
+
+import proc_stats
+from render_queue import DONE, FINISHED_STATES
+
+INTERVAL = 2.0
+GROW_BELOW_BUSY = 0.85
+SHRINK_ABOVE_LOAD = 1.5
+MEMORY_HEADROOM = 1024 ** 3
+MEMORY_HEADROOM_FRACTION = 0.1
+MEMORY_MARGIN = 1.25
+MEMORY_SMOOTHING = 0.3
+DEFAULT_JOB_MEMORY = 2 * 1024 ** 3
+
+
+def job_memory_key(job):
+    # Chunks of the same ROP in the same scene need about the same memory
+    hip = job.metadata.get("hip")
+    rop = job.metadata.get("rop")
+    if hip and rop:
+        return f"{os.path.basename(hip)}:{rop}"
+    return job.metadata.get("source") or job.name
+
+
+class AdaptiveScheduler:
+    # Keeps a RenderQueue between min_slots and max_slots from live /proc
+    # readings: a slot is added while the CPUs have idle time and memory is
+    # left for another job, and removed when the run queue is well over the
+    # core count or MemAvailable drops below the headroom. Running jobs are
+    # never killed; fewer slots only hold back new starts.
+    #
+    # Each start is also checked against memory: a job needs its estimate
+    # (smoothed peak RSS of earlier runs of the same ROP, from the job store)
+    # on top of what the running jobs are still expected to grow into.
+    def __init__(self, queue, store=None, min_slots=1, max_slots=None, interval=INTERVAL):
+        self.queue = queue
+        self.store = store
+        self.min_slots = max(1, min_slots)
+        self.max_slots = max(self.min_slots, max_slots or os.cpu_count() or 1)
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.estimates = store.memory_estimates() if store is not None else {}
+        self.job_rss = {}
+        self.peaks = {}
+        self.memory = {}
+        self.load = None
+        self.busy = None
+        self.cpu = proc_stats.cpu_times()
+        self.stopped = threading.Event()
+        self.thread = None
+
+    @staticmethod
+    def available():
+        return proc_stats.available()
+
+    def start(self):
+        self.queue.admit = self.admit
+        self.queue.add_listener(self._job_changed)
+        self.sample()
+        # Start half way and let the readings move it
+        self.queue.set_slots(max(self.min_slots, self.max_slots // 2))
+        self.thread = threading.Thread(target=self._loop, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stopped.set()
+        if self.queue.admit == self.admit:
+            self.queue.admit = None
+        if self._job_changed in self.queue.listeners:
+            self.queue.listeners.remove(self._job_changed)
+
+    def headroom(self):
+        return max(MEMORY_HEADROOM, MEMORY_HEADROOM_FRACTION * self.memory.get("MemTotal", 0))
+
+    def estimate(self, job):
+        with self.lock:
+            known = self.estimates.get(job_memory_key(job))
+            if known is not None:
+                average, peak = known
+                return max(average * MEMORY_MARGIN, min(peak, average * 2))
+            if self.estimates:
+                # Unknown ROP: assume it is as heavy as the heaviest seen so far
+                return max(peak for _, peak in self.estimates.values())
+        return DEFAULT_JOB_MEMORY
+
+    def reserved(self, running_jobs):
+        # Memory the running jobs will still take before reaching their estimate
+        with self.lock:
+            job_rss = dict(self.job_rss)
+        return sum(max(0, self.estimate(job) - job_rss.get(job.job_id, 0)) for job in running_jobs)
+
+    def admit(self, job, running_jobs):
+        if not self.memory:
+            return True
+        available = self.memory.get("MemAvailable", 0) - self.reserved(running_jobs)
+        return available - self.estimate(job) >= self.headroom()
+
+    def sample(self):
+        self.memory = proc_stats.memory_info()
+        load = proc_stats.load_average()
+        self.load = load[0] if load else None
+        cpu = proc_stats.cpu_times()
+        self.busy = proc_stats.busy_fraction(self.cpu, cpu)
+        self.cpu = cpu
+        running = [job for job in self.queue.snapshot() if job.pid and job.state not in FINISHED_STATES]
+        stats = proc_stats.tree_stats([job.pid for job in running]) if running else {}
+        with self.lock:
+            self.job_rss = {}
+            for job in running:
+                rss = stats.get(job.pid, (0, 0))[0]
+                self.job_rss[job.job_id] = rss
+                self.peaks[job.job_id] = max(self.peaks.get(job.job_id, 0), rss)
+
+    def target_slots(self):
+        slots = self.queue.slots
+        cores = os.cpu_count() or 1
+        counts = self.queue.counts()
+        if self.memory and self.memory.get("MemAvailable", 0) < self.headroom():
+            return max(self.min_slots, min(slots, counts["running"]) - 1)
+        if self.load is not None and self.load > SHRINK_ABOVE_LOAD * cores:
+            return max(self.min_slots, slots - 1)
+        # Only grow when every slot is in use and more work is waiting
+        if counts["queued"] and counts["running"] >= slots and self.busy is not None and self.busy < GROW_BELOW_BUSY:
+            return min(self.max_slots, slots + 1)
+        return max(self.min_slots, min(self.max_slots, slots))
+
+    def _loop(self):
+        while not self.stopped.wait(self.interval):
+            self.sample()
+            # set_slots also re-runs dispatch for jobs held back by admit()
+            self.queue.set_slots(self.target_slots())
+
+    def _job_changed(self, job):
+        if job.state not in FINISHED_STATES:
+            return
+        with self.lock:
+            peak = self.peaks.pop(job.job_id, 0)
+            self.job_rss.pop(job.job_id, None)
+        if job.state != DONE or not peak:
+            return
+        key = job_memory_key(job)
+        with self.lock:
+            average, known_peak = self.estimates.get(key, (peak, peak))
+            self.estimates[key] = (average + MEMORY_SMOOTHING * (peak - average), max(known_peak, peak))
+        if self.store is not None:
+            self.store.record_memory(key, peak, job.metadata.get("attempt_id"))
+
+    def status(self):
+        parts = [f"{self.queue.slots} slots"]
+        if self.load is not None:
+            parts.append(f"load {self.load:.1f}")
+        if self.busy is not None:
+            parts.append(f"cpu {self.busy * 100:.0f}%")
+        if self.memory:
+            parts.append(f"{proc_stats.format_bytes(self.memory.get('MemAvailable', 0))} free")
+        return ", ".join(parts)
@@ -0,0 +1,376 @@
+import os
+import sys
+import json
+import time
+import socket
+import sqlite3
+import argparse
+import threading
+
+import render_queue
+from render_queue import QUEUED, RUNNING, DONE, FAILED, CANCELLED, FINISHED_STATES
+from render_scheduler import AdaptiveScheduler, MEMORY_SMOOTHING
+from render_progress import ProgressTracker
+from render_frames import OutputWatcher, skip_existing
+
+STORE_FILE = "render_jobs.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS batches (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    created REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS chunks (
+    id INTEGER PRIMARY KEY,
+    batch_id INTEGER NOT NULL,
+    idx INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    argv TEXT NOT NULL,
+    cwd TEXT NOT NULL,
+    metadata TEXT NOT NULL,
+    state TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    exit_code INTEGER,
+    wall_time REAL,
+    log_path TEXT
+);
+CREATE INDEX IF NOT EXISTS chunks_batch_state ON chunks (batch_id, state);
+CREATE TABLE IF NOT EXISTS attempts (
+    id INTEGER PRIMARY KEY,
+    chunk_id INTEGER NOT NULL,
+    host TEXT NOT NULL,
+    pid INTEGER,
+    started REAL NOT NULL,
+    finished REAL,
+    state TEXT NOT NULL,
+    exit_code INTEGER,
+    wall_time REAL,
+    log_path TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS attempts_chunk ON attempts (chunk_id);
+"""
+# Statements that bring a store from the previous version up to the key
+MIGRATIONS = {
+    2: [
+        "ALTER TABLE attempts ADD COLUMN peak_rss INTEGER",
+        """CREATE TABLE IF NOT EXISTS job_memory (
+            key TEXT PRIMARY KEY,
+            runs INTEGER NOT NULL,
+            average_rss REAL NOT NULL,
+            peak_rss INTEGER NOT NULL,
+            updated REAL NOT NULL
+        )""",
+    ],
+    3: [
+        "ALTER TABLE attempts ADD COLUMN frames_done INTEGER",
+        """CREATE TABLE IF NOT EXISTS frames (
+            attempt_id INTEGER NOT NULL,
+            frame REAL NOT NULL,
+            seconds REAL NOT NULL,
+            finished REAL NOT NULL
+        )""",
+        "CREATE INDEX IF NOT EXISTS frames_attempt ON frames (attempt_id)",
+    ],
+    4: [
+        """CREATE TABLE IF NOT EXISTS outputs (
+            chunk_id INTEGER NOT NULL,
+            frame REAL NOT NULL,
+            path TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            landed REAL NOT NULL,
+            PRIMARY KEY (chunk_id, frame)
+        )""",
+    ],
+}
+SCHEMA_VERSION = max(MIGRATIONS)
+
+
+def pid_alive(pid):
+    if not pid or os.name == "nt":
+        # No cheap check on Windows; a resume is an explicit request anyway
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class RenderStore:
+    # Every batch, chunk and attempt of the render queue. Unlike the node
+    # cache this is history, so the schema is only ever extended in place.
+    def __init__(self, db_path=STORE_FILE):
+        self.lock = threading.Lock()
+        self.host = socket.gethostname()
+        self.db = sqlite3.connect(db_path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+        version = self.db.execute("PRAGMA user_version").fetchone()[0]
+        for target in range(max(version, 1) + 1, SCHEMA_VERSION + 1):
+            for statement in MIGRATIONS.get(target, ()):
+                self.db.execute(statement)
+        if version < SCHEMA_VERSION:
+            self.db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self.db.commit()
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+    def create_batch(self, name, specs):
+        # specs: (name, argv, cwd, metadata) per chunk, as built by
+        # render_chunks. Returns the batch id and the chunk ids in order.
+        with self.lock, self.db:
+            batch_id = self.db.execute(
+                "INSERT INTO batches (name, created) VALUES (?, ?)", (name, time.time())
+            ).lastrowid
+            chunk_ids = []
+            for index, (chunk_name, argv, cwd, metadata) in enumerate(specs):
+                chunk_ids.append(self.db.execute(
+                    "INSERT INTO chunks (batch_id, idx, name, argv, cwd, metadata, state) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (batch_id, index, chunk_name, json.dumps(argv), cwd, json.dumps(metadata), QUEUED),
+                ).lastrowid)
+            return batch_id, chunk_ids
+
+    def start_attempt(self, chunk_id, pid=None, log_path=None, host=None):
+        with self.lock, self.db:
+            self.db.execute(
+                "UPDATE chunks SET state = ?, attempts = attempts + 1, log_path = ? WHERE id = ?",
+                (RUNNING, log_path, chunk_id),
+            )
+            return self.db.execute(
+                "INSERT INTO attempts (chunk_id, host, pid, started, state, log_path) VALUES (?, ?, ?, ?, ?, ?)",
+                (chunk_id, host or self.host, pid, time.time(), RUNNING, log_path),
+            ).lastrowid
+
+    def finish_attempt(self, attempt_id, chunk_id, state, exit_code=None, wall_time=None, error=""):
+        with self.lock, self.db:
+            self.db.execute(
+                "UPDATE attempts SET finished = ?, state = ?, exit_code = ?, wall_time = ?, error = ? WHERE id = ?",
+                (time.time(), state, exit_code, wall_time, error, attempt_id),
+            )
+            self.db.execute(
+                "UPDATE chunks SET state = ?, exit_code = ?, wall_time = ? WHERE id = ?",
+                (state, exit_code, wall_time, chunk_id),
+            )
+
+    def record_memory(self, key, peak_rss, attempt_id=None):
+        # Peak RSS of a finished job, smoothed per key (hip + ROP) so the
+        # scheduler can estimate what the next chunk of it will need
+        with self.lock, self.db:
+            if attempt_id is not None:
+                self.db.execute("UPDATE attempts SET peak_rss = ? WHERE id = ?", (peak_rss, attempt_id))
+            row = self.db.execute("SELECT runs, average_rss, peak_rss FROM job_memory WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.db.execute("INSERT INTO job_memory (key, runs, average_rss, peak_rss, updated) VALUES (?, 1, ?, ?, ?)",
+                                (key, peak_rss, peak_rss, time.time()))
+            else:
+                average = row[1] + MEMORY_SMOOTHING * (peak_rss - row[1])
+                self.db.execute("UPDATE job_memory SET runs = ?, average_rss = ?, peak_rss = ?, updated = ? WHERE key = ?",
+                                (row[0] + 1, average, max(row[2], peak_rss), time.time(), key))
+
+    def record_frames(self, attempt_id, frames, frames_done):
+        # frames: (frame, seconds, finished) as parsed from the job output
+        with self.lock, self.db:
+            self.db.executemany("INSERT INTO frames (attempt_id, frame, seconds, finished) VALUES (?, ?, ?, ?)",
+                                [(attempt_id, frame, seconds, finished) for frame, seconds, finished in frames])
+            self.db.execute("UPDATE attempts SET frames_done = ? WHERE id = ?", (frames_done, attempt_id))
+
+    def frame_times(self, chunk_id):
+        # {frame: seconds} of the latest attempt that timed each frame
+        with self.lock:
+            rows = self.db.execute(
+                "SELECT frames.frame, frames.seconds FROM frames JOIN attempts ON attempts.id = frames.attempt_id "
+                "WHERE attempts.chunk_id = ? ORDER BY frames.finished", (chunk_id,)).fetchall()
+        return dict(rows)
+
+    def record_output(self, chunk_id, frame, path, size):
+        with self.lock, self.db:
+            self.db.execute("INSERT OR REPLACE INTO outputs (chunk_id, frame, path, size, landed) VALUES (?, ?, ?, ?, ?)",
+                            (chunk_id, frame, path, size, time.time()))
+
+    def memory_estimates(self):
+        # {key: (average_rss, peak_rss)}
+        with self.lock:
+            return {key: (average, peak) for key, average, peak in
+                    self.db.execute("SELECT key, average_rss, peak_rss FROM job_memory")}
+
+    def set_chunk_state(self, chunk_id, state):
+        with self.lock, self.db:
+            self.db.execute("UPDATE chunks SET state = ? WHERE id = ?", (state, chunk_id))
+
+    def recover(self, batch_id=None):
+        # Chunks left "running" by a process that no longer exists (crash,
+        # reboot) are marked failed so a resume picks them up
+        query = ("SELECT attempts.id, attempts.chunk_id, attempts.host, attempts.pid FROM attempts "
+                 "JOIN chunks ON chunks.id = attempts.chunk_id WHERE attempts.state = ?")
+        args = [RUNNING]
+        if batch_id is not None:
+            query += " AND chunks.batch_id = ?"
+            args.append(batch_id)
+        with self.lock:
+            rows = self.db.execute(query, args).fetchall()
+        recovered = 0
+        for attempt_id, chunk_id, host, pid in rows:
+            if host == self.host and pid_alive(pid):
+                continue
+            self.finish_attempt(attempt_id, chunk_id, FAILED, error="interrupted")
+            recovered += 1
+        return recovered
+
+    def batches(self, limit=None):
+        # One grouped query over the (batch_id, state) index, cheap enough to
+        # run every time the tray menu opens
+        query = ("SELECT batches.id, batches.name, batches.created, chunks.state, COUNT(chunks.id) "
+                 "FROM batches LEFT JOIN chunks ON chunks.batch_id = batches.id "
+                 "WHERE batches.id IN (SELECT id FROM batches ORDER BY id DESC LIMIT ?) "
+                 "GROUP BY batches.id, chunks.state ORDER BY batches.id DESC")
+        with self.lock:
+            rows = self.db.execute(query, (limit if limit is not None else -1,)).fetchall()
+        batches = {}
+        for batch_id, name, created, state, count in rows:
+            batch = batches.setdefault(batch_id, {"id": batch_id, "name": name, "created": created, "total": 0,
+                                                  QUEUED: 0, RUNNING: 0, DONE: 0, FAILED: 0, CANCELLED: 0})
+            if state is not None:
+                batch[state] = batch.get(state, 0) + count
+                batch["total"] += count
+        return list(batches.values())
+
+    def chunks(self, batch_id, states=None):
+        query = ("SELECT id, name, argv, cwd, metadata, state, attempts, exit_code, wall_time, log_path "
+                 "FROM chunks WHERE batch_id = ?")
+        args = [batch_id]
+        if states:
+            query += f" AND state IN ({','.join('?' * len(states))})"
+            args.extend(states)
+        with self.lock:
+            rows = self.db.execute(query + " ORDER BY idx", args).fetchall()
+        return [
+            {"id": row[0], "name": row[1], "argv": json.loads(row[2]), "cwd": row[3], "metadata": json.loads(row[4]),
+             "state": row[5], "attempts": row[6], "exit_code": row[7], "wall_time": row[8], "log_path": row[9]}
+            for row in rows
+        ]
+
+
+class StoreRecorder:
+    # RenderQueue listener that writes attempts of jobs carrying a chunk_id
+    def __init__(self, store):
+        self.store = store
+
+    def __call__(self, job):
+        chunk_id = job.metadata.get("chunk_id")
+        if chunk_id is None:
+            return
+        attempt_id = job.metadata.get("attempt_id")
+        if job.state == QUEUED:
+            if attempt_id is not None:
+                # Handed back to the queue, e.g. by the farm when a worker is lost
+                self.store.finish_attempt(attempt_id, chunk_id, FAILED, error=job.error)
+                self.store.set_chunk_state(chunk_id, QUEUED)
+                del job.metadata["attempt_id"]
+            return
+        if attempt_id is None and (job.state == RUNNING or job.state in FINISHED_STATES):
+            if job.state == CANCELLED and job.started is None:
+                self.store.set_chunk_state(chunk_id, CANCELLED)
+                return
+            attempt_id = job.metadata["attempt_id"] = self.store.start_attempt(chunk_id, job.pid, job.log_path, job.host)
+        if job.state in FINISHED_STATES:
+            self.store.finish_attempt(attempt_id, chunk_id, job.state, job.exit_code, job.wall_time, job.error)
+
+
+def submit_batch(queue, store, name, specs):
+    batch_id, chunk_ids = store.create_batch(name, specs)
+    for (chunk_name, argv, cwd, metadata), chunk_id in zip(specs, chunk_ids):
+        queue.add(chunk_name, argv, cwd, **dict(metadata, batch_id=batch_id, chunk_id=chunk_id))
+    return batch_id
+
+
+def resume_batch(queue, store, batch_id, skip=False):
+    # Re-queues every chunk of the batch that is not done (failed, cancelled,
+    # interrupted or never started). With skip, frames already on disk are
+    # left out and chunks with nothing left are marked done.
+    store.recover(batch_id)
+    queued_ids = {job.metadata.get("chunk_id") for job in queue.snapshot() if job.state in (QUEUED, RUNNING)}
+    count = 0
+    for chunk in store.chunks(batch_id, [QUEUED, FAILED, CANCELLED]):
+        if chunk["id"] in queued_ids:
+            continue
+        argv, metadata = chunk["argv"], chunk["metadata"]
+        if skip:
+            remaining = skip_existing(argv, metadata)
+            if remaining is None:
+                store.set_chunk_state(chunk["id"], DONE)
+                continue
+            argv, metadata = remaining
+        store.set_chunk_state(chunk["id"], QUEUED)
+        queue.add(chunk["name"], argv, chunk["cwd"], **dict(metadata, batch_id=batch_id, chunk_id=chunk["id"]))
+        count += 1
+    return count
+
+
+def format_batch(batch):
+    created = time.strftime("%Y-%m-%d %H:%M", time.localtime(batch["created"]))
+    text = f"#{batch['id']} {batch['name']} ({created}): {batch[DONE]}/{batch['total']} done"
+    for state in (RUNNING, FAILED, CANCELLED):
+        if batch[state]:
+            text += f", {batch[state]} {state}"
+    return text
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render batch history and resume.")
+    parser.add_argument("--db", default=STORE_FILE, help=f"Job store (default: {STORE_FILE})")
+    commands = parser.add_subparsers(dest="command", required=True)
+    list_parser = commands.add_parser("list", help="Show batches and their chunk states")
+    list_parser.add_argument("-n", "--limit", type=int, default=20)
+    show_parser = commands.add_parser("show", help="Show the chunks of a batch")
+    show_parser.add_argument("batch", type=int)
+    resume_parser = commands.add_parser("resume", help="Re-run every chunk of a batch that is not done")
+    resume_parser.add_argument("batch", type=int)
+    resume_parser.add_argument("-j", "--slots", type=int, default=render_queue.DEFAULT_SLOTS)
+    resume_parser.add_argument("--houdini", default=None, help="Houdini executable; its bin folder is put on PATH")
+    resume_parser.add_argument("--skip-existing", action="store_true", help="Leave out frames whose output is already on disk")
+    resume_parser.add_argument("--adaptive", action="store_true", help="Adjust the slots (up to -j) to CPU load and free memory (Linux)")
+    args = parser.parse_args()
+
+    store = RenderStore(args.db)
+    if args.command == "list":
+        for batch in store.batches(args.limit):
+            print(format_batch(batch))
+    elif args.command == "show":
+        for chunk in store.chunks(args.batch):
+            wall = "" if chunk["wall_time"] is None else f"{chunk['wall_time']:.1f}s"
+            print(f"{chunk['name']}\t{chunk['state']}\tattempts={chunk['attempts']}\texit={chunk['exit_code']}\t{wall}")
+    elif args.command == "resume":
+        queue = render_queue.RenderQueue(args.slots, env=render_queue.render_env(args.houdini))
+        queue.add_listener(StoreRecorder(store))
+        tracker = ProgressTracker(queue, store)
+        OutputWatcher(queue, store).add_listener(tracker.frame_landed)
+        if args.adaptive and AdaptiveScheduler.available():
+            AdaptiveScheduler(queue, store, max_slots=args.slots).start()
+
+        def report(job):
+            if job.state in FINISHED_STATES:
+                print(f"[{job.state}] {job.name} exit={job.exit_code} {job.error or job.log_path}")
+
+        queue.add_listener(report)
+        count = resume_batch(queue, store, args.batch, args.skip_existing)
+        print(f"Resuming {count} chunks of batch {args.batch}")
+        try:
+            queue.wait()
+        except KeyboardInterrupt:
+            queue.shutdown()
+            queue.wait(10)
+        batch = next((batch for batch in store.batches() if batch["id"] == args.batch), None)
+        if batch:
+            print(format_batch(batch))
+            return 1 if batch[DONE] < batch["total"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
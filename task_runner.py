@@ -0,0 +1,148 @@
+import traceback
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, QTimer, Signal
+
+# Max concurrent tasks per pool. The hython pool is serial because every
+# request goes through the one long-lived hython worker anyway.
+POOL_LIMITS = {"default": 4, "hython": 1, "io": 8}
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+
+class TaskCancelled(Exception):
+    pass
+
+
+class Task(QObject):
+    progress = Signal(int, int, str)
+    chunk = Signal(object)
+    finished = Signal(object)
+    failed = Signal(str)
+    state_changed = Signal(str)
+
+    def __init__(self, name, fn, args, kwargs, pool):
+        super().__init__()
+        self.name = name
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.pool = pool
+        self.state = PENDING
+        self.cancelled = False
+        self.done = 0
+        self.total = 0
+        self.message = ""
+        self.result = None
+        self.error = ""
+
+    def is_finished(self):
+        return self.state in (DONE, FAILED, CANCELLED)
+
+    def cancel(self):
+        self.cancelled = True
+
+    def check_cancelled(self):
+        if self.cancelled:
+            raise TaskCancelled()
+
+    def report(self, done, total, message=""):
+        self.check_cancelled()
+        self.done = done
+        self.total = total
+        self.message = message
+        self.progress.emit(done, total, message)
+
+    def send_chunk(self, data):
+        # Partial results for the GUI while the task is still running
+        self.check_cancelled()
+        self.chunk.emit(data)
+
+    def set_state(self, state):
+        self.state = state
+        self.state_changed.emit(state)
+
+    def run(self):
+        if self.cancelled:
+            self.set_state(CANCELLED)
+            return
+        self.set_state(RUNNING)
+        try:
+            result = self.fn(self, *self.args, **self.kwargs)
+        except TaskCancelled:
+            self.set_state(CANCELLED)
+            return
+        except Exception as e:
+            traceback.print_exc()
+            self.error = f"{type(e).__name__}: {e}"
+            self.set_state(FAILED)
+            self.failed.emit(self.error)
+            return
+        self.result = result
+        self.set_state(DONE)
+        self.finished.emit(result)
+
+
+class TaskRunnable(QRunnable):
+    def __init__(self, task):
+        super().__init__()
+        self.task = task
+        self.setAutoDelete(False)
+
+    def run(self):
+        self.task.run()
+
+
+class TaskRunner(QObject):
+    task_added = Signal(object)
+    tasks_cleared = Signal()
+
+    def __init__(self, limits=POOL_LIMITS):
+        super().__init__()
+        self.pools = {}
+        for name, limit in limits.items():
+            pool = QThreadPool(self)
+            pool.setMaxThreadCount(limit)
+            self.pools[name] = pool
+        self.tasks = []
+        self.runnables = {}
+
+    def submit(self, name, fn, *args, pool="default", **kwargs):
+        # fn is called as fn(task, *args, **kwargs) on a pool thread and may
+        # call task.report() for progress and task.check_cancelled().
+        task = Task(name, fn, args, kwargs, pool)
+        runnable = TaskRunnable(task)
+        self.tasks.append(task)
+        self.runnables[task] = runnable
+        self.task_added.emit(task)
+        # Start on the next event loop turn so the caller can connect to the
+        # task's signals before it can possibly finish.
+        QTimer.singleShot(0, self, lambda: self._start(task))
+        return task
+
+    def _start(self, task):
+        if task.cancelled:
+            task.set_state(CANCELLED)
+            return
+        self.pools[task.pool].start(self.runnables[task])
+
+    def cancel(self, task):
+        task.cancel()
+        runnable = self.runnables.get(task)
+        if runnable is not None and self.pools[task.pool].tryTake(runnable):
+            task.set_state(CANCELLED)
+
+    def clear_finished(self):
+        for task in [task for task in self.tasks if task.is_finished()]:
+            del self.runnables[task]
+        self.tasks = [task for task in self.tasks if not task.is_finished()]
+        self.tasks_cleared.emit()
+
+    def shutdown(self, timeout_ms=5000):
+        for task in self.tasks:
+            if not task.is_finished():
+                self.cancel(task)
+        for pool in self.pools.values():
+            pool.waitForDone(timeout_ms)
@@ -0,0 +1,34 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import render_queue
+
+
+class RenderQueueTest(unittest.TestCase):
+    def setUp(self):
+        self.log_dir = tempfile.mkdtemp()
+        self.queue = render_queue.RenderQueue(slots=1, log_dir=self.log_dir)
+
+    def test_job_that_cannot_start_fails_and_frees_its_slot(self):
+        bad = self.queue.add("bad", [sys.executable, "-c", "print('x')\0"])
+        good = self.queue.add("good", [sys.executable, "-c", "print('ok')"])
+        self.assertTrue(self.queue.wait(30))
+        self.assertEqual(bad.state, render_queue.FAILED)
+        self.assertIn("null byte", bad.error)
+        self.assertEqual(good.state, render_queue.DONE)
+        self.assertEqual(good.exit_code, 0)
+
+    def test_missing_executable_fails(self):
+        job = self.queue.add("missing", [os.path.join(self.log_dir, "no_such_program")])
+        good = self.queue.add("good", [sys.executable, "-c", "pass"])
+        self.assertTrue(self.queue.wait(30))
+        self.assertEqual(job.state, render_queue.FAILED)
+        self.assertEqual(good.state, render_queue.DONE)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,13 +1,38 @@
 import sys
 import os
+import time
 import configparser
-import csv
-import subprocess
-from PySide6.QtWidgets import QApplication, QWidget, QFileDialog, QLineEdit, QPushButton, QVBoxLayout, QMessageBox, QSystemTrayIcon, QMenu, QLabel, QListWidget, QComboBox
-from PySide6.QtGui import QIcon, QAction
-import tempfile
+from PySide6.QtWidgets import QApplication, QWidget, QFileDialog, QLineEdit, QPushButton, QVBoxLayout, QMessageBox, QSystemTrayIcon, QMenu, QLabel, QListWidget, QComboBox, QTableView, QTreeView, QHeaderView, QAbstractItemView, QTableWidget, QTableWidgetItem, QProgressBar, QCheckBox, QSpinBox, QPlainTextEdit
+from PySide6.QtGui import QIcon, QAction, QStandardItemModel, QStandardItem, QDesktopServices
+from PySide6.QtCore import Qt, QSortFilterProxyModel, QObject, Signal, QTimer, QUrl
+from hython_client import HythonWorker, hython_from_houdini
+from hip_archive import HipArchive, HipArchiveError
+from node_cache import NodeCache
+from task_runner import TaskRunner, RUNNING, DONE
+from node_tree_model import NodeTreeModel
+from node_index import NodeIndex, MAX_RESULTS
+import hip_scan
+import hip_diff
+import folder_builder
+import folder_spec
+from folder_template import load_template, TemplateError
+import render_queue
+import render_chunks
+import render_store
+import render_graph
+import render_farm
+from render_scheduler import AdaptiveScheduler
+from render_progress import ProgressTracker, format_seconds
+from render_frames import OutputWatcher
+import proc_stats
+import dcc_supervisor
+from dcc_supervisor import DccSupervisor, LaunchError, format_duration
 
 CONFIG_FILE = "settings.ini"
+NODE_CHUNK = 5000
+BATCH_ROWS = 50
+TRAY_BATCHES = 10
+PARM_TABLE_COLUMNS = ["name", "type", "value", "expression", "default", "animated"]
 
 def load_config():
     config = configparser.ConfigParser()
@@ -19,14 +44,20 @@ def load_config():
     return config
 
 def save_config(paths):
+    save_config_section('Paths', paths)
+
+def save_config_section(section, values):
+    # Keep other sections ([Farm]) that are edited by hand
     config = configparser.ConfigParser()
-    config['Paths'] = paths
+    config.read(CONFIG_FILE)
+    config[section] = values
     with open(CONFIG_FILE, 'w') as configfile:
         config.write(configfile)
 
 class FolderGeneratorWindow(QWidget):
-    def __init__(self):
+    def __init__(self, runner):
         super().__init__()
+        self.runner = runner
         self.setWindowTitle("Folder Generator")
         self.setGeometry(100, 100, 400, 250)
         
@@ -36,23 +67,39 @@ class FolderGeneratorWindow(QWidget):
         self.target_path_input = QLineEdit(self)
         self.browse_target_btn = QPushButton("Browse")
         self.upload_csv_btn = QPushButton("Upload CSV")
+        self.csv_help_label = QLabel("One folder path per row, or a header row naming path / sequence / shot / "
+                                     "department / task columns. A single-column CSV only has a header "
+                                     "if its first cell is exactly \"path\".")
+        self.csv_help_label.setWordWrap(True)
         self.confirm_label = QLabel("No CSV uploaded.")
+        self.load_template_btn = QPushButton("Load Template (optional)")
+        self.template_label = QLabel("No template: CSV rows are folder paths.")
+        self.dry_run_checkbox = QCheckBox("Dry run (only report what would be created)")
+        self.sync_checkbox = QCheckBox("Sync: scan the target once, create only missing folders, list extra ones")
         self.create_folders_btn = QPushButton("Create Folders")
         self.create_folders_btn.setEnabled(False)
         
         self.browse_target_btn.clicked.connect(self.browse_target_path)
         self.upload_csv_btn.clicked.connect(self.upload_csv)
+        self.load_template_btn.clicked.connect(self.load_template)
         self.create_folders_btn.clicked.connect(self.create_folders)
         
         layout.addWidget(self.target_path_label)
         layout.addWidget(self.target_path_input)
         layout.addWidget(self.browse_target_btn)
         layout.addWidget(self.upload_csv_btn)
+        layout.addWidget(self.csv_help_label)
         layout.addWidget(self.confirm_label)
+        layout.addWidget(self.load_template_btn)
+        layout.addWidget(self.template_label)
+        layout.addWidget(self.dry_run_checkbox)
+        layout.addWidget(self.sync_checkbox)
         layout.addWidget(self.create_folders_btn)
         
         self.setLayout(layout)
-        self.folder_paths = []
+        self.csv_path = ""
+        self.folder_count = 0
+        self.template = None
         self.target_path = ""
     
     def closeEvent(self, event):
@@ -68,26 +115,94 @@ class FolderGeneratorWindow(QWidget):
     def upload_csv(self):
         file_path, _ = QFileDialog.getOpenFileName(self, "Select CSV File", "", "CSV Files (*.csv)")
         if file_path:
-            self.folder_paths = []
-            with open(file_path, newline='', encoding='utf-8') as csvfile:
-                reader = csv.reader(csvfile)
-                for row in reader:
-                    if row:
-                        self.folder_paths.append(row[0])
-            
-            self.confirm_label.setText("CSV Uploaded: {} folders detected".format(len(self.folder_paths)))
-            self.create_folders_btn.setEnabled(True)
+            # Rows are only counted (and patterns checked) here; the paths
+            # themselves are streamed from the file when folders are created
+            self.csv_path = ""
+            self.create_folders_btn.setEnabled(False)
+            self.confirm_label.setText("Reading CSV...")
+            task = self.runner.submit(f"Read CSV: {os.path.basename(file_path)}", self.count_csv_paths, file_path, pool="io")
+            task.finished.connect(self.csv_counted)
+            task.failed.connect(self.csv_failed)
+    
+    def load_template(self):
+        file_path, _ = QFileDialog.getOpenFileName(self, "Select Folder Template", "", "Templates (*.json *.yaml *.yml)")
+        if not file_path:
+            return
+        try:
+            self.template = load_template(file_path)
+        except (OSError, ValueError, TemplateError) as e:
+            self.template = None
+            self.template_label.setText("No template: CSV rows are folder paths.")
+            QMessageBox.critical(self, "Error", f"Could not load template: {e}")
+            return
+        self.template_label.setText(
+            f"Template: {os.path.basename(file_path)} ({len(self.template)} folders per CSV row, columns are variables)"
+        )
+    
+    def count_csv_paths(self, task, file_path):
+        return file_path, folder_spec.count_csv_paths(file_path)
+    
+    def csv_counted(self, result):
+        self.csv_path, self.folder_count = result
+        self.confirm_label.setText("CSV Uploaded: {} folders detected".format(self.folder_count))
+        self.create_folders_btn.setEnabled(True)
+    
+    def csv_failed(self, error):
+        self.confirm_label.setText("No CSV uploaded.")
+        QMessageBox.critical(self, "Error", f"Could not read CSV: {error}")
     
     def create_folders(self):
         if not self.target_path:
             QMessageBox.warning(self, "Error", "Please select a target path first.")
             return
         
-        for path in self.folder_paths:
-            full_path = os.path.join(self.target_path, path)
-            os.makedirs(full_path, exist_ok=True)
-        QMessageBox.information(self, "Folders Created", "All folders have been successfully created!")
         self.create_folders_btn.setEnabled(False)
+        dry_run = self.dry_run_checkbox.isChecked()
+        sync = self.sync_checkbox.isChecked()
+        name = "Sync folders" if sync else "Create folders"
+        task = self.runner.submit(f"{name} (dry run)" if dry_run else name, self.run_create_folders,
+                                  self.target_path, self.csv_path, self.folder_count, self.template, dry_run, sync,
+                                  pool="io")
+        task.progress.connect(self.show_create_progress)
+        task.finished.connect(self.folders_created)
+        task.failed.connect(self.folders_failed)
+    
+    def run_create_folders(self, task, target_path, csv_path, total, template, dry_run, sync):
+        if template is not None:
+            # Conditional branches make the final count unknown up front
+            paths = template.expand(folder_spec.iter_csv_records(csv_path))
+            total = 0
+        else:
+            paths = folder_spec.iter_csv_paths(csv_path)
+        if sync:
+            summary = folder_builder.sync_folders(target_path, paths, dry_run=dry_run, report_extra=True,
+                                                  progress=task.report, cancelled=lambda: task.cancelled, total=total)
+        else:
+            summary = folder_builder.create_folders(target_path, paths, dry_run=dry_run,
+                                                    progress=task.report, cancelled=lambda: task.cancelled, total=total)
+        summary["dry_run"] = dry_run
+        return summary
+    
+    def show_create_progress(self, done, total, message):
+        self.confirm_label.setText(f"Creating folders: {done}/{total}")
+    
+    def folders_created(self, summary):
+        self.create_folders_btn.setEnabled(True)
+        text = folder_builder.format_summary(summary, summary["dry_run"])
+        self.confirm_label.setText(text)
+        details = [f"Would create: {path}" for path in summary["planned"][:20]]
+        details += [f"Failed: {path} ({error})" for path, error in summary["failures"][:20]]
+        details += [f"Not in spec: {path}" for path in summary.get("extras", [])[:20]]
+        if summary[folder_builder.FAILED]:
+            QMessageBox.warning(self, "Folders Created", "\n".join([text, ""] + details))
+        elif summary["dry_run"] or summary.get("extras"):
+            QMessageBox.information(self, "Dry Run" if summary["dry_run"] else "Folders Synced", "\n".join([text, ""] + details))
+        else:
+            QMessageBox.information(self, "Folders Created", text)
+    
+    def folders_failed(self, error):
+        self.create_folders_btn.setEnabled(True)
+        QMessageBox.critical(self, "Error", f"Failed to create folders: {error}")
 
 
 class SettingsWindow(QWidget):
@@ -147,8 +262,12 @@ class SettingsWindow(QWidget):
 
 
 class BatchRenderSetup(QWidget):
-    def __init__(self):
+    def __init__(self, runner, queue, store, get_farm):
         super().__init__()
+        self.runner = runner
+        self.queue = queue
+        self.store = store
+        self.get_farm = get_farm
         self.setWindowTitle("Batch Render Setup")
         self.setGeometry(150, 150, 500, 400)
         
@@ -159,18 +278,33 @@ class BatchRenderSetup(QWidget):
         self.save_path_input = QLineEdit()
         self.browse_save_path_btn = QPushButton("Browse Save Location")
         self.generate_bat_btn = QPushButton("Generate Batch File")
+        self.queue_jobs_btn = QPushButton("Send to Render Queue")
+        self.farm_jobs_btn = QPushButton("Send to Render Farm")
+        self.chunk_checkbox = QCheckBox("Split cmdlrndr ROPs into frame chunks (frames from csv/range_frames.csv, single_frames.csv)")
+        self.chunk_size_input = QSpinBox()
+        self.chunk_size_input.setRange(0, 100000)
+        self.chunk_size_input.setSpecialValueText("Auto (spread over the queue slots)")
+        self.skip_existing_checkbox = QCheckBox("Skip frames whose output is already on disk (chunks only)")
         
         self.select_files_btn.clicked.connect(self.select_text_files)
         self.browse_save_path_btn.clicked.connect(self.browse_save_location)
         self.generate_bat_btn.clicked.connect(self.generate_batch_file)
+        self.queue_jobs_btn.clicked.connect(self.send_to_render_queue)
+        self.farm_jobs_btn.clicked.connect(self.send_to_render_farm)
         
         layout.addWidget(QLabel("Selected Text Files:"))
         layout.addWidget(self.file_list)
         layout.addWidget(self.select_files_btn)
-        layout.addWidget(QLabel("Save Batch File To:"))
+        layout.addWidget(QLabel("Save Batch File To (.bat, Makefile or .ninja):"))
         layout.addWidget(self.save_path_input)
         layout.addWidget(self.browse_save_path_btn)
         layout.addWidget(self.generate_bat_btn)
+        layout.addWidget(self.chunk_checkbox)
+        layout.addWidget(QLabel("Frames per Chunk:"))
+        layout.addWidget(self.chunk_size_input)
+        layout.addWidget(self.skip_existing_checkbox)
+        layout.addWidget(self.queue_jobs_btn)
+        layout.addWidget(self.farm_jobs_btn)
         
         self.setLayout(layout)
         
@@ -183,7 +317,7 @@ class BatchRenderSetup(QWidget):
             self.file_list.addItems(files)
     
     def browse_save_location(self):
-        file_path, _ = QFileDialog.getSaveFileName(self, "Save Batch File", "", "Batch Files (*.bat)")
+        file_path, _ = QFileDialog.getSaveFileName(self, "Save Batch File", "", "Batch Files (*.bat);;Ninja Files (*.ninja);;Makefiles (Makefile *.mk)")
         if file_path:
             self.save_path_input.setText(file_path)
     
@@ -197,21 +331,671 @@ class BatchRenderSetup(QWidget):
             QMessageBox.warning(self, "Error", "No save location specified.")
             return
         
-        try:
-            with open(save_path, "w", encoding="utf-8") as bat_file:
-                for file in self.file_paths:
-                    with open(file, "r", encoding="utf-8") as txt_file:
-                        command = txt_file.read().strip()
-                        bat_file.write(command + "\n")
-            QMessageBox.information(self, "Success", "Batch file generated successfully.")
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Failed to generate batch file: {str(e)}")
+        self.generate_bat_btn.setEnabled(False)
+        if save_path.lower().endswith(".bat"):
+            task = self.runner.submit("Generate batch file", self.write_batch_file, save_path, list(self.file_paths), pool="io")
+        else:
+            # Makefile / build.ninja: one target per job (or frame chunk), run in parallel with make -j or ninja
+            houdini_path = load_config()['Paths'].get('houdini', '')
+            hython = hython_from_houdini(houdini_path) if houdini_path else "hython"
+            task = self.runner.submit("Generate build graph", self.write_build_graph, save_path, list(self.file_paths),
+                                      self.chunk_checkbox.isChecked(), hython, self.chunk_size_input.value() or None,
+                                      self.queue.slots, self.skip_existing_checkbox.isChecked(), pool="io")
+        task.finished.connect(self.batch_file_written)
+        task.failed.connect(self.batch_file_failed)
+    
+    def send_to_render_queue(self):
+        houdini_path = load_config()['Paths'].get('houdini', '')
+        hython = hython_from_houdini(houdini_path) if houdini_path else "hython"
+        batch_id, count = self.submit_jobs(self.queue, hython)
+        if batch_id is not None:
+            QMessageBox.information(self, "Render Queue", f"Batch #{batch_id}: {count} jobs queued, {self.queue.slots} at a time. "
+                                    "Open Render Queue from the tray to follow them.")
+    
+    def send_to_render_farm(self):
+        farm = self.get_farm()
+        if farm is None:
+            return
+        # Workers find hython on their own PATH (render_farm.py worker --houdini)
+        batch_id, count = self.submit_jobs(farm, "hython")
+        if batch_id is not None:
+            QMessageBox.information(self, "Render Farm", f"Batch #{batch_id}: {count} jobs queued on port {farm.address[1]}. "
+                                    "Open Render Farm from the tray to follow them.")
+    
+    def submit_jobs(self, queue, hython):
+        if not self.file_paths:
+            QMessageBox.warning(self, "Error", "No text files selected.")
+            return None, 0
+        
+        chunk_size = self.chunk_size_input.value() or None
+        skip_existing = self.skip_existing_checkbox.isChecked()
+        specs = []
+        for file_path in self.file_paths:
+            try:
+                if self.chunk_checkbox.isChecked():
+                    # Each chunk is its own job, so a failed one can be retried alone
+                    specs.extend(render_chunks.command_file_chunks(file_path, hython, chunk_size, queue.slots,
+                                                                   skip_existing=skip_existing))
+                else:
+                    specs.extend(render_queue.command_file_jobs(file_path))
+            except (OSError, ValueError, HipArchiveError) as e:
+                QMessageBox.warning(self, "Error", f"Could not queue {file_path}: {e}")
+        if not specs:
+            if skip_existing:
+                QMessageBox.information(self, "Render", "Nothing to render: every frame is already on disk.")
+            return None, 0
+        # Recorded in the job store, so the batch can be resumed after a crash
+        return render_store.submit_batch(queue, self.store, render_chunks.batch_name(self.file_paths), specs), len(specs)
+    
+    def write_batch_file(self, task, save_path, file_paths):
+        with open(save_path, "w", encoding="utf-8") as bat_file:
+            for index, file in enumerate(file_paths, 1):
+                with open(file, "r", encoding="utf-8") as txt_file:
+                    command = txt_file.read().strip()
+                    bat_file.write(command + "\n")
+                task.report(index, len(file_paths), file)
+    
+    def write_build_graph(self, task, save_path, file_paths, chunk, hython, chunk_size, slots, skip_existing):
+        task.report(0, 0, "Reading command files")
+        specs = render_graph.graph_jobs(file_paths, chunk, hython, chunk_size, slots, skip_existing)
+        return render_graph.write_graph(save_path, specs, slots=slots)
+    
+    def batch_file_written(self, result):
+        self.generate_bat_btn.setEnabled(True)
+        QMessageBox.information(self, "Success", "Batch file generated successfully.")
+    
+    def batch_file_failed(self, error):
+        self.generate_bat_btn.setEnabled(True)
+        QMessageBox.critical(self, "Error", f"Failed to generate batch file: {error}")
+    
+    def closeEvent(self, event):
+        self.hide()
+        event.ignore()
+
+
+
+
+class HipScanWindow(QWidget):
+    def __init__(self, runner):
+        super().__init__()
+        self.runner = runner
+        self.setWindowTitle("Hip Scan")
+        self.setGeometry(150, 150, 500, 350)
+        
+        layout = QVBoxLayout()
+        
+        self.scan_dir_input = QLineEdit(self)
+        self.browse_scan_dir_btn = QPushButton("Browse Project Directory")
+        self.node_patterns_input = QLineEdit(self)
+        self.node_patterns_input.setPlaceholderText("/obj/*/rop_geometry1, /out/*")
+        self.parms_input = QLineEdit(self)
+        self.parms_input.setPlaceholderText("f1, f2, sopoutput")
+        self.use_hython_checkbox = QCheckBox("Evaluate with hython (otherwise raw values from the .hip archive)")
+        self.workers_input = QSpinBox()
+        self.workers_input.setRange(1, 256)
+        self.workers_input.setValue(os.cpu_count() or 1)
+        self.report_path_input = QLineEdit(self)
+        self.browse_report_btn = QPushButton("Browse Report Location")
+        self.run_scan_btn = QPushButton("Run Scan")
+        self.scan_status_label = QLabel("")
+        
+        self.browse_scan_dir_btn.clicked.connect(self.browse_scan_dir)
+        self.browse_report_btn.clicked.connect(self.browse_report_path)
+        self.run_scan_btn.clicked.connect(self.run_scan)
+        
+        layout.addWidget(QLabel("Project Directory:"))
+        layout.addWidget(self.scan_dir_input)
+        layout.addWidget(self.browse_scan_dir_btn)
+        layout.addWidget(QLabel("Node Paths / Globs (comma separated):"))
+        layout.addWidget(self.node_patterns_input)
+        layout.addWidget(QLabel("Parameters (comma separated):"))
+        layout.addWidget(self.parms_input)
+        layout.addWidget(self.use_hython_checkbox)
+        layout.addWidget(QLabel("Parallel Workers:"))
+        layout.addWidget(self.workers_input)
+        layout.addWidget(QLabel("Save Report To (.csv or .jsonl):"))
+        layout.addWidget(self.report_path_input)
+        layout.addWidget(self.browse_report_btn)
+        layout.addWidget(self.run_scan_btn)
+        layout.addWidget(self.scan_status_label)
+        
+        self.setLayout(layout)
+    
+    def closeEvent(self, event):
+        self.hide()
+        event.ignore()
+    
+    def browse_scan_dir(self):
+        folder = QFileDialog.getExistingDirectory(self, "Select Project Directory")
+        if folder:
+            self.scan_dir_input.setText(folder)
+    
+    def browse_report_path(self):
+        file_path, _ = QFileDialog.getSaveFileName(self, "Save Report", "", "Reports (*.csv *.jsonl)")
+        if file_path:
+            self.report_path_input.setText(file_path)
+    
+    def run_scan(self):
+        root = self.scan_dir_input.text()
+        output = self.report_path_input.text()
+        if not root or not output:
+            QMessageBox.warning(self, "Error", "Please select a project directory and a report location.")
+            return
+        
+        nodes = [pattern.strip() for pattern in self.node_patterns_input.text().split(",") if pattern.strip()]
+        parms = [name.strip() for name in self.parms_input.text().split(",") if name.strip()]
+        hython_path = None
+        if self.use_hython_checkbox.isChecked():
+            hython_path = hython_from_houdini(load_config()['Paths'].get('houdini', ''))
+        
+        self.run_scan_btn.setEnabled(False)
+        task = self.runner.submit(f"Hip scan: {root}", self.run_scan_task, root, output, nodes, parms,
+                                  hython_path, self.workers_input.value())
+        task.progress.connect(self.show_scan_progress)
+        task.finished.connect(self.scan_finished)
+        task.failed.connect(self.scan_failed)
+    
+    def run_scan_task(self, task, root, output, nodes, parms, hython_path, workers):
+        return hip_scan.scan(root, output, nodes, parms, hython_path, workers,
+                             progress=task.report, cancelled=lambda: task.cancelled)
+    
+    def show_scan_progress(self, done, total, hip):
+        self.scan_status_label.setText(f"Scanned {done}/{total}: {os.path.basename(hip)}")
+    
+    def scan_finished(self, summary):
+        self.run_scan_btn.setEnabled(True)
+        self.scan_status_label.setText(
+            f"{summary['files']} files: {summary['ok']} ok, {summary['missing']} missing, {summary['error']} failed"
+        )
+    
+    def scan_failed(self, error):
+        self.run_scan_btn.setEnabled(True)
+        QMessageBox.critical(self, "Error", f"Hip scan failed: {error}")
+
+
+class HipDiffWindow(QWidget):
+    def __init__(self, runner):
+        super().__init__()
+        self.runner = runner
+        self.setWindowTitle("Hip Diff")
+        self.setGeometry(150, 150, 600, 500)
+        
+        layout = QVBoxLayout()
+        
+        self.old_hip_input = QLineEdit(self)
+        self.browse_old_hip_btn = QPushButton("Browse Older Hip")
+        self.new_hip_input = QLineEdit(self)
+        self.browse_new_hip_btn = QPushButton("Browse Newer Hip")
+        self.run_diff_btn = QPushButton("Compare")
+        self.diff_output = QPlainTextEdit(self)
+        self.diff_output.setReadOnly(True)
+        self.diff_output.setLineWrapMode(QPlainTextEdit.NoWrap)
+        
+        self.browse_old_hip_btn.clicked.connect(lambda: self.browse_hip(self.old_hip_input))
+        self.browse_new_hip_btn.clicked.connect(lambda: self.browse_hip(self.new_hip_input))
+        self.run_diff_btn.clicked.connect(self.run_diff)
+        
+        layout.addWidget(QLabel("Older Houdini File:"))
+        layout.addWidget(self.old_hip_input)
+        layout.addWidget(self.browse_old_hip_btn)
+        layout.addWidget(QLabel("Newer Houdini File:"))
+        layout.addWidget(self.new_hip_input)
+        layout.addWidget(self.browse_new_hip_btn)
+        layout.addWidget(self.run_diff_btn)
+        layout.addWidget(self.diff_output)
+        
+        self.setLayout(layout)
+    
+    def closeEvent(self, event):
+        self.hide()
+        event.ignore()
+    
+    def browse_hip(self, line_edit):
+        file_path, _ = QFileDialog.getOpenFileName(self, "Select Houdini File", "", "Houdini Files (*.hip *.hipnc *.hiplc)")
+        if file_path:
+            line_edit.setText(file_path)
+    
+    def run_diff(self):
+        old_path = self.old_hip_input.text()
+        new_path = self.new_hip_input.text()
+        if not old_path or not new_path:
+            QMessageBox.warning(self, "Error", "Please select both Houdini files.")
+            return
+        
+        self.run_diff_btn.setEnabled(False)
+        self.diff_output.setPlainText("Comparing...")
+        task = self.runner.submit(f"Hip diff: {os.path.basename(old_path)} -> {os.path.basename(new_path)}",
+                                  self.run_diff_task, old_path, new_path, pool="io")
+        task.finished.connect(self.diff_finished)
+        task.failed.connect(self.diff_failed)
+    
+    def run_diff_task(self, task, old_path, new_path):
+        return hip_diff.format_diff(hip_diff.diff_files(old_path, new_path))
+    
+    def diff_finished(self, text):
+        self.run_diff_btn.setEnabled(True)
+        self.diff_output.setPlainText(text)
+    
+    def diff_failed(self, error):
+        self.run_diff_btn.setEnabled(True)
+        self.diff_output.clear()
+        QMessageBox.critical(self, "Error", f"Hip diff failed: {error}")
+
+
+class TaskListWindow(QWidget):
+    def __init__(self, runner):
+        super().__init__()
+        self.runner = runner
+        self.setWindowTitle("Tasks")
+        self.setGeometry(150, 150, 600, 300)
+        
+        layout = QVBoxLayout()
+        
+        self.task_table = QTableWidget(0, 4)
+        self.task_table.setHorizontalHeaderLabels(["Task", "State", "Progress", "Message"])
+        self.task_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.task_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.task_table.horizontalHeader().setStretchLastSection(True)
+        self.cancel_task_btn = QPushButton("Cancel Selected Task")
+        self.clear_tasks_btn = QPushButton("Clear Finished Tasks")
+        
+        self.cancel_task_btn.clicked.connect(self.cancel_selected_task)
+        self.clear_tasks_btn.clicked.connect(self.runner.clear_finished)
+        self.runner.task_added.connect(self.add_task)
+        self.runner.tasks_cleared.connect(self.refresh_tasks)
+        
+        layout.addWidget(self.task_table)
+        layout.addWidget(self.cancel_task_btn)
+        layout.addWidget(self.clear_tasks_btn)
+        
+        self.setLayout(layout)
+        self.tasks = []
+        self.refresh_tasks()
+    
+    def closeEvent(self, event):
+        self.hide()
+        event.ignore()
+    
+    def refresh_tasks(self):
+        self.tasks = []
+        self.task_table.setRowCount(0)
+        for task in self.runner.tasks:
+            self.add_task(task)
+    
+    def add_task(self, task):
+        row = len(self.tasks)
+        self.tasks.append(task)
+        self.task_table.insertRow(row)
+        self.task_table.setItem(row, 0, QTableWidgetItem(task.name))
+        self.task_table.setItem(row, 1, QTableWidgetItem(task.state))
+        self.task_table.setCellWidget(row, 2, QProgressBar())
+        self.task_table.setItem(row, 3, QTableWidgetItem(task.message))
+        task.progress.connect(self.update_task)
+        task.state_changed.connect(self.update_task)
+        self.show_task(task)
+    
+    def update_task(self, *args):
+        task = self.sender()
+        if task in self.tasks:
+            self.show_task(task)
+    
+    def show_task(self, task):
+        row = self.tasks.index(task)
+        self.task_table.item(row, 1).setText(task.state)
+        self.task_table.item(row, 3).setText(task.error or task.message)
+        progress = self.task_table.cellWidget(row, 2)
+        if task.total:
+            progress.setRange(0, task.total)
+            progress.setValue(task.done)
+        elif task.state == RUNNING:
+            progress.setRange(0, 0)
+        else:
+            progress.setRange(0, 1)
+            progress.setValue(1 if task.state == DONE else 0)
+    
+    def cancel_selected_task(self):
+        row = self.task_table.currentRow()
+        if 0 <= row < len(self.tasks):
+            self.runner.cancel(self.tasks[row])
+
+
+class RenderQueueSignals(QObject):
+    # RenderQueue calls its listeners from job threads; this moves the
+    # updates onto the GUI thread
+    job_changed = Signal(object)
+
+
+class RenderQueueWindow(QWidget):
+    def __init__(self, queue, store, tracker):
+        super().__init__()
+        self.queue = queue
+        self.store = store
+        self.tracker = tracker
+        self.setWindowTitle("Render Queue")
+        self.setGeometry(150, 150, 800, 600)
+        
+        layout = QVBoxLayout()
+        
+        self.slots_label = QLabel("Concurrent Jobs:")
+        self.slots_input = QSpinBox()
+        self.slots_input.setRange(1, 256)
+        self.slots_input.setValue(queue.slots)
+        self.adaptive_checkbox = QCheckBox("Adapt to CPU load and free memory (up to the slots above, Linux only)")
+        self.adaptive_checkbox.setEnabled(AdaptiveScheduler.available())
+        self.job_table = QTableWidget(0, 6)
+        self.job_table.setHorizontalHeaderLabels(["Job", "State", "Progress", "Exit Code", "Wall Time", "Log"])
+        self.job_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.job_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.job_table.horizontalHeader().setStretchLastSection(True)
+        self.add_files_btn = QPushButton("Add Command Files")
+        self.cancel_job_btn = QPushButton("Cancel Selected Job")
+        self.retry_job_btn = QPushButton("Retry Selected Job")
+        self.open_log_btn = QPushButton("Open Log")
+        self.clear_jobs_btn = QPushButton("Clear Finished Jobs")
+        self.queue_status_label = QLabel("")
+        self.batch_table = QTableWidget(0, 7)
+        self.batch_table.setHorizontalHeaderLabels(["Batch", "Created", "Done", "Running", "Failed", "Cancelled", "Total"])
+        self.batch_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.batch_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.batch_table.horizontalHeader().setStretchLastSection(True)
+        self.resume_batch_btn = QPushButton("Resume Selected Batch")
+        self.resume_skip_checkbox = QCheckBox("Skip frames already on disk when resuming")
+        self.resume_skip_checkbox.setChecked(True)
+        
+        self.slots_input.valueChanged.connect(self.slots_changed)
+        self.adaptive_checkbox.toggled.connect(self.toggle_adaptive)
+        self.add_files_btn.clicked.connect(self.add_command_files)
+        self.cancel_job_btn.clicked.connect(self.cancel_selected_job)
+        self.retry_job_btn.clicked.connect(self.retry_selected_job)
+        self.open_log_btn.clicked.connect(self.open_selected_log)
+        self.job_table.doubleClicked.connect(self.open_selected_log)
+        self.clear_jobs_btn.clicked.connect(self.clear_finished_jobs)
+        self.resume_batch_btn.clicked.connect(self.resume_selected_batch)
+        
+        layout.addWidget(self.slots_label)
+        layout.addWidget(self.slots_input)
+        layout.addWidget(self.adaptive_checkbox)
+        layout.addWidget(self.job_table)
+        layout.addWidget(self.add_files_btn)
+        layout.addWidget(self.cancel_job_btn)
+        layout.addWidget(self.retry_job_btn)
+        layout.addWidget(self.open_log_btn)
+        layout.addWidget(self.clear_jobs_btn)
+        layout.addWidget(self.queue_status_label)
+        layout.addWidget(QLabel("Batches:"))
+        layout.addWidget(self.batch_table)
+        layout.addWidget(self.resume_skip_checkbox)
+        layout.addWidget(self.resume_batch_btn)
+        
+        self.setLayout(layout)
+        self.batches = []
+        self.scheduler = None
+        self.jobs = []
+        self.rows = {}
+        self.signals = RenderQueueSignals()
+        self.signals.job_changed.connect(self.show_job)
+        self.queue.add_listener(self.signals.job_changed.emit)
+        # Wall time of running jobs keeps ticking without any job event
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh_running_jobs)
+        self.timer.start(1000)
+        self.refresh_jobs()
+        self.refresh_batches()
     
     def closeEvent(self, event):
         self.hide()
         event.ignore()
+    
+    def refresh_jobs(self):
+        self.jobs = []
+        self.rows = {}
+        self.job_table.setRowCount(0)
+        for job in self.queue.snapshot():
+            self.show_job(job)
+    
+    def show_job(self, job):
+        row = self.rows.get(job.job_id)
+        if row is None:
+            row = self.job_table.rowCount()
+            self.job_table.insertRow(row)
+            for column in range(6):
+                self.job_table.setItem(row, column, QTableWidgetItem(""))
+            self.job_table.item(row, 0).setText(job.name)
+            self.job_table.item(row, 0).setToolTip(job.command)
+            self.rows[job.job_id] = row
+            self.jobs.append(job)
+        self.job_table.item(row, 1).setText(job.state)
+        self.show_progress(row, job)
+        self.job_table.item(row, 3).setText("" if job.exit_code is None else str(job.exit_code))
+        self.job_table.item(row, 4).setText("" if job.wall_time is None else f"{job.wall_time:.1f}s")
+        self.job_table.item(row, 5).setText(job.error or job.log_path or "")
+        self.show_counts()
+        if job.state in render_queue.FINISHED_STATES and "batch_id" in job.metadata:
+            self.refresh_batches()
+    
+    def show_progress(self, row, job):
+        # Frame counts come from the tracker parsing the job output as it
+        # runs; the bar is only created once a job reports any progress
+        progress = self.tracker.progress(job)
+        fraction = progress.fraction if progress is not None else None
+        bar = self.job_table.cellWidget(row, 2)
+        if fraction is None and bar is None:
+            return
+        if bar is None:
+            bar = QProgressBar()
+            bar.setRange(0, 1000)
+            self.job_table.setCellWidget(row, 2, bar)
+        if fraction is not None:
+            bar.setValue(int(fraction * 1000))
+        bar.setFormat(progress.describe() if progress is not None else "")
+    
+    def refresh_running_jobs(self):
+        if self.isVisible():
+            for job in self.jobs:
+                if job.state == render_queue.RUNNING:
+                    self.show_job(job)
+            if self.scheduler is not None:
+                self.show_counts()
+    
+    def show_counts(self):
+        counts = self.queue.counts()
+        text = ", ".join(f"{count} {state}" for state, count in counts.items() if count)
+        throughput = self.tracker.throughput()
+        if throughput:
+            text += f" | {throughput:.1f} frames/min"
+            eta = self.tracker.eta()
+            if eta is not None:
+                text += f", ETA {format_seconds(eta)}"
+        if self.scheduler is not None:
+            text += f" ({self.scheduler.status()})"
+        self.queue_status_label.setText(text)
+    
+    def slots_changed(self, slots):
+        if self.scheduler is not None:
+            self.scheduler.max_slots = slots
+            self.queue.set_slots(min(self.queue.slots, slots))
+        else:
+            self.queue.set_slots(slots)
+    
+    def toggle_adaptive(self, enabled):
+        if self.scheduler is not None:
+            self.scheduler.stop()
+            self.scheduler = None
+        if enabled:
+            # Memory estimates per ROP come from earlier runs in the job store
+            self.scheduler = AdaptiveScheduler(self.queue, self.store, max_slots=self.slots_input.value()).start()
+        else:
+            self.queue.set_slots(self.slots_input.value())
+        self.show_counts()
+    
+    def selected_job(self):
+        row = self.job_table.currentRow()
+        return self.jobs[row] if 0 <= row < len(self.jobs) else None
+    
+    def add_command_files(self):
+        files, _ = QFileDialog.getOpenFileNames(self, "Select Command Files", "", "Text Files (*.txt)")
+        for file_path in files:
+            try:
+                self.queue.add_command_file(file_path)
+            except (OSError, ValueError) as e:
+                QMessageBox.warning(self, "Error", f"Could not read {file_path}: {e}")
+    
+    def cancel_selected_job(self):
+        job = self.selected_job()
+        if job is not None:
+            self.queue.cancel(job)
+    
+    def retry_selected_job(self):
+        job = self.selected_job()
+        if job is not None and self.queue.retry(job) is None:
+            QMessageBox.information(self, "Retry", "Only failed or cancelled jobs can be retried.")
+    
+    def open_selected_log(self):
+        job = self.selected_job()
+        if job is not None and job.log_path:
+            QDesktopServices.openUrl(QUrl.fromLocalFile(job.log_path))
+    
+    def clear_finished_jobs(self):
+        self.queue.clear_finished()
+        self.refresh_jobs()
+    
+    def refresh_batches(self):
+        if not self.isVisible() and self.batches:
+            return
+        self.batches = self.store.batches(BATCH_ROWS)
+        self.batch_table.setRowCount(len(self.batches))
+        for row, batch in enumerate(self.batches):
+            created = time.strftime("%Y-%m-%d %H:%M", time.localtime(batch["created"]))
+            values = [f"#{batch['id']} {batch['name']}", created, batch[render_queue.DONE], batch[render_queue.RUNNING],
+                      batch[render_queue.FAILED], batch[render_queue.CANCELLED], batch["total"]]
+            for column, value in enumerate(values):
+                self.batch_table.setItem(row, column, QTableWidgetItem(str(value)))
+    
+    def resume_selected_batch(self):
+        row = self.batch_table.currentRow()
+        if not 0 <= row < len(self.batches):
+            return
+        batch_id = self.batches[row]["id"]
+        count = render_store.resume_batch(self.queue, self.store, batch_id, self.resume_skip_checkbox.isChecked())
+        self.refresh_batches()
+        if not count:
+            QMessageBox.information(self, "Resume", f"Nothing to resume: every job of batch #{batch_id} is done or queued.")
+    
+    def showEvent(self, event):
+        self.refresh_batches()
+        super().showEvent(event)
+
+
+class RenderFarmWindow(RenderQueueWindow):
+    # The coordinator is a RenderQueue whose slots are the connected workers
+    def __init__(self, farm, store, tracker):
+        super().__init__(farm, store, tracker)
+        self.setWindowTitle(f"Render Farm (port {farm.address[1]})")
+        self.slots_label.hide()
+        self.slots_input.hide()
+        self.adaptive_checkbox.hide()
+        self.worker_label = QLabel("")
+        self.layout().insertWidget(0, self.worker_label)
+        self.timer.timeout.connect(self.show_workers)
+        self.show_workers()
+    
+    def show_workers(self):
+        workers = self.queue.worker_status()
+        if not workers:
+            self.worker_label.setText(f"No workers. Start one with: python render_farm.py worker <this host>:{self.queue.address[1]}")
+            return
+        self.worker_label.setText("Workers: " + ", ".join(
+            f"{name} {running}/{slots}" + (f" (silent {silent:.0f}s)" if silent > render_farm.HEARTBEAT_SECONDS * 2 else "")
+            for name, running, slots, silent in workers))
 
 
+class SessionSignals(QObject):
+    # DccSupervisor calls its listeners from the reaper thread
+    session_changed = Signal(object)
+
+
+class SessionsWindow(QWidget):
+    def __init__(self, supervisor):
+        super().__init__()
+        self.supervisor = supervisor
+        self.setWindowTitle("DCC Sessions")
+        self.setGeometry(150, 150, 750, 300)
+        
+        layout = QVBoxLayout()
+        
+        self.session_table = QTableWidget(0, 8)
+        self.session_table.setHorizontalHeaderLabels(["Session", "PID", "State", "Launch", "Uptime", "CPU", "RSS", "Log"])
+        self.session_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.session_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.session_table.horizontalHeader().setStretchLastSection(True)
+        self.max_heavy_input = QSpinBox()
+        self.max_heavy_input.setRange(0, 64)
+        self.max_heavy_input.setSpecialValueText("No limit")
+        self.max_heavy_input.setValue(supervisor.max_heavy)
+        self.open_log_btn = QPushButton("Open Log")
+        self.clear_btn = QPushButton("Clear Exited Sessions")
+        self.status_label = QLabel("")
+        
+        self.max_heavy_input.valueChanged.connect(self.max_heavy_changed)
+        self.open_log_btn.clicked.connect(self.open_selected_log)
+        self.session_table.doubleClicked.connect(self.open_selected_log)
+        self.clear_btn.clicked.connect(self.clear_exited)
+        
+        layout.addWidget(self.session_table)
+        layout.addWidget(QLabel("Max Houdini / Nuke sessions at once:"))
+        layout.addWidget(self.max_heavy_input)
+        layout.addWidget(self.open_log_btn)
+        layout.addWidget(self.clear_btn)
+        layout.addWidget(self.status_label)
+        
+        self.setLayout(layout)
+        self.sessions = []
+        # /proc is only read while the window is open
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh_sessions)
+    
+    def refresh_sessions(self):
+        self.supervisor.sample()
+        self.sessions = self.supervisor.snapshot()
+        self.session_table.setRowCount(len(self.sessions))
+        for row, session in enumerate(self.sessions):
+            values = [
+                session.name,
+                session.pid,
+                session.state if session.exit_code is None else f"{session.state} ({session.exit_code})",
+                f"{session.launch_seconds * 1000:.0f}ms" if session.launch_seconds is not None else "",
+                format_duration(session.uptime),
+                f"{session.cpu_percent:.0f}%" if session.cpu_percent is not None and session.alive else "",
+                proc_stats.format_bytes(session.rss) if session.rss is not None and session.alive else "",
+                session.log_path or "",
+            ]
+            for column, value in enumerate(values):
+                self.session_table.setItem(row, column, QTableWidgetItem(str(value)))
+        running = sum(1 for session in self.sessions if session.alive)
+        self.status_label.setText(f"{running} running" + ("" if proc_stats.available() else " (CPU and memory readings need Linux /proc)"))
+    
+    def max_heavy_changed(self, value):
+        self.supervisor.max_heavy = value
+        save_config_section('Sessions', {'max_heavy': str(value)})
+    
+    def open_selected_log(self):
+        row = self.session_table.currentRow()
+        if 0 <= row < len(self.sessions) and self.sessions[row].log_path:
+            QDesktopServices.openUrl(QUrl.fromLocalFile(self.sessions[row].log_path))
+    
+    def clear_exited(self):
+        self.supervisor.clear_exited()
+        self.refresh_sessions()
+    
+    def showEvent(self, event):
+        self.refresh_sessions()
+        self.timer.start(2000)
+        super().showEvent(event)
+    
+    def closeEvent(self, event):
+        self.timer.stop()
+        self.hide()
+        event.ignore()
 
 
 class VFXTrayApp(QSystemTrayIcon):
@@ -225,8 +1009,15 @@ class VFXTrayApp(QSystemTrayIcon):
         self.folder_generator_action = QAction("Folder Generator", self)
         self.get_node_action = QAction("Get Node", self)
         self.batch_render_action = QAction("Batch Render Setup", self)
+        self.render_queue_action = QAction("Render Queue", self)
+        self.render_farm_action = QAction("Render Farm", self)
+        self.render_batches_menu = QMenu("Render Batches")
+        self.hip_scan_action = QAction("Hip Scan", self)
+        self.hip_diff_action = QAction("Hip Diff", self)
+        self.tasks_action = QAction("Tasks", self)
         self.launch_houdini_action = QAction("Launch Houdini", self)
         self.launch_nuke_action = QAction("Launch Nuke X", self)
+        self.sessions_action = QAction("DCC Sessions", self)
         self.settings_action = QAction("Settings", self)
         self.quit_action = QAction("Quit", self)
         
@@ -235,7 +1026,14 @@ class VFXTrayApp(QSystemTrayIcon):
         
         self.menu.addAction(self.launch_houdini_action)
         self.menu.addAction(self.launch_nuke_action)
+        self.menu.addAction(self.sessions_action)
         self.menu.addAction(self.batch_render_action)
+        self.menu.addAction(self.render_queue_action)
+        self.menu.addAction(self.render_farm_action)
+        self.menu.addMenu(self.render_batches_menu)
+        self.menu.addAction(self.hip_scan_action)
+        self.menu.addAction(self.hip_diff_action)
+        self.menu.addAction(self.tasks_action)
         self.menu.addSeparator()
         self.menu.addAction(self.settings_action)
         self.menu.addAction(self.quit_action)
@@ -245,8 +1043,15 @@ class VFXTrayApp(QSystemTrayIcon):
         self.folder_generator_action.triggered.connect(self.show_folder_generator)
         self.get_node_action.triggered.connect(self.show_get_node)
         self.batch_render_action.triggered.connect(self.open_batch_render_setup)
+        self.render_queue_action.triggered.connect(self.show_render_queue)
+        self.render_farm_action.triggered.connect(self.show_render_farm)
+        self.render_batches_menu.aboutToShow.connect(self.fill_render_batches_menu)
+        self.hip_scan_action.triggered.connect(self.show_hip_scan)
+        self.hip_diff_action.triggered.connect(self.show_hip_diff)
+        self.tasks_action.triggered.connect(self.show_tasks)
         self.launch_houdini_action.triggered.connect(self.launch_houdini)
         self.launch_nuke_action.triggered.connect(self.launch_nuke)
+        self.sessions_action.triggered.connect(self.show_sessions)
         self.settings_action.triggered.connect(self.show_settings)
         self.quit_action.triggered.connect(self.quit_app)
         
@@ -254,6 +1059,27 @@ class VFXTrayApp(QSystemTrayIcon):
         self.folder_generator_window = None
         self.get_node_window = None
         self.batch_render_window = None
+        self.task_list_window = None
+        self.hip_scan_window = None
+        self.hip_diff_window = None
+        self.render_queue_window = None
+        self.render_farm_window = None
+        self.render_farm = None
+        self.render_farm_progress = None
+        self.sessions_window = None
+        self.runner = TaskRunner()
+        self.supervisor = DccSupervisor()
+        self.session_signals = SessionSignals()
+        self.session_signals.session_changed.connect(self.session_changed)
+        self.supervisor.add_listener(self.session_signals.session_changed.emit)
+        self.render_queue = render_queue.RenderQueue()
+        self.render_store = render_store.RenderStore()
+        # Jobs left running by a previous session that died show as failed
+        self.render_store.recover()
+        self.render_queue.add_listener(render_store.StoreRecorder(self.render_store))
+        self.render_progress = ProgressTracker(self.render_queue, self.render_store)
+        self.render_outputs = OutputWatcher(self.render_queue, self.render_store)
+        self.render_outputs.add_listener(self.render_progress.frame_landed)
         self.load_settings()
         self.show()
     
@@ -261,19 +1087,81 @@ class VFXTrayApp(QSystemTrayIcon):
         config = load_config()
         self.houdini_path = config['Paths'].get('houdini', '')
         self.nuke_path = config['Paths'].get('nuke', '')
+        self.supervisor.max_heavy = config.getint('Sessions', 'max_heavy', fallback=0)
+        self.render_queue.env = render_queue.render_env(self.houdini_path)
 
     def show_folder_generator(self):
         if self.folder_generator_window is None:
-            self.folder_generator_window = FolderGeneratorWindow()
+            self.folder_generator_window = FolderGeneratorWindow(self.runner)
         self.folder_generator_window.show()
         self.folder_generator_window.activateWindow()
     
     def show_get_node(self):
         if self.get_node_window is None:
-            self.get_node_window = GetNodeWindow()
+            self.get_node_window = GetNodeWindow(self.runner)
         self.get_node_window.show()
         self.get_node_window.activateWindow()
     
+    def show_hip_scan(self):
+        if self.hip_scan_window is None:
+            self.hip_scan_window = HipScanWindow(self.runner)
+        self.hip_scan_window.show()
+        self.hip_scan_window.activateWindow()
+    
+    def show_hip_diff(self):
+        if self.hip_diff_window is None:
+            self.hip_diff_window = HipDiffWindow(self.runner)
+        self.hip_diff_window.show()
+        self.hip_diff_window.activateWindow()
+    
+    def show_render_queue(self):
+        if self.render_queue_window is None:
+            self.render_queue_window = RenderQueueWindow(self.render_queue, self.render_store, self.render_progress)
+        self.render_queue_window.show()
+        self.render_queue_window.activateWindow()
+    
+    def get_render_farm(self):
+        # The coordinator only listens once the farm is first used
+        if self.render_farm is None:
+            config = load_config()
+            farm_config = config['Farm'] if config.has_section('Farm') else {}
+            try:
+                self.render_farm = render_farm.FarmCoordinator(
+                    farm_config.get('bind', '127.0.0.1'), int(farm_config.get('port', render_farm.DEFAULT_PORT)),
+                    token=farm_config.get('token', ''))
+            except (OSError, ValueError) as e:
+                QMessageBox.critical(None, "Render Farm", f"Could not start the render coordinator: {e}")
+                return None
+            self.render_farm.add_listener(render_store.StoreRecorder(self.render_store))
+            self.render_farm_progress = ProgressTracker(self.render_farm, self.render_store)
+            # Workers write to shared storage, which inotify here does not see
+            render_farm_outputs = OutputWatcher(self.render_farm, self.render_store, poll=True)
+            render_farm_outputs.add_listener(self.render_farm_progress.frame_landed)
+        return self.render_farm
+    
+    def show_render_farm(self):
+        if self.get_render_farm() is None:
+            return
+        if self.render_farm_window is None:
+            self.render_farm_window = RenderFarmWindow(self.render_farm, self.render_store, self.render_farm_progress)
+        self.render_farm_window.show()
+        self.render_farm_window.activateWindow()
+    
+    def fill_render_batches_menu(self):
+        self.render_batches_menu.clear()
+        batches = self.render_store.batches(TRAY_BATCHES)
+        if not batches:
+            self.render_batches_menu.addAction("No render batches").setEnabled(False)
+        for batch in batches:
+            action = self.render_batches_menu.addAction(render_store.format_batch(batch))
+            action.triggered.connect(self.show_render_queue)
+    
+    def show_tasks(self):
+        if self.task_list_window is None:
+            self.task_list_window = TaskListWindow(self.runner)
+        self.task_list_window.show()
+        self.task_list_window.activateWindow()
+    
     def show_settings(self):
         if self.settings_window is None:
             self.settings_window = SettingsWindow()
@@ -282,26 +1170,55 @@ class VFXTrayApp(QSystemTrayIcon):
     
     def launch_houdini(self):
         if self.houdini_path:
-            os.startfile(self.houdini_path)
+            self.launch_dcc("Houdini", self.houdini_path)
     
     def launch_nuke(self):
         if self.nuke_path:
-            os.startfile(self.nuke_path)
+            self.launch_dcc("Nuke X", self.nuke_path)
+    
+    def launch_dcc(self, name, path):
+        try:
+            self.supervisor.launch(name, dcc_supervisor.dcc_command(path))
+        except LaunchError as e:
+            QMessageBox.warning(None, f"Launch {name}", str(e))
+    
+    def session_changed(self, session):
+        if session.state == dcc_supervisor.CRASHED:
+            self.showMessage(f"{session.name} exited", f"Exit code {session.exit_code} after {format_duration(session.uptime)}. "
+                             f"Log: {session.log_path}", QSystemTrayIcon.Warning)
+        if self.sessions_window is not None and self.sessions_window.isVisible():
+            self.sessions_window.refresh_sessions()
+    
+    def show_sessions(self):
+        if self.sessions_window is None:
+            self.sessions_window = SessionsWindow(self.supervisor)
+        self.sessions_window.show()
+        self.sessions_window.activateWindow()
     
     def quit_app(self):
+        if self.get_node_window is not None:
+            self.get_node_window.shutdown()
+        self.render_queue.shutdown()
+        self.render_queue.wait(5)
+        if self.render_farm is not None:
+            self.render_farm.shutdown()
+        self.render_store.close()
+        self.supervisor.stop()
+        self.runner.shutdown()
         self.app.quit()
 
     def open_batch_render_setup(self):
         if self.batch_render_window is None:
-            self.batch_render_window = BatchRenderSetup()
+            self.batch_render_window = BatchRenderSetup(self.runner, self.render_queue, self.render_store, self.get_render_farm)
         self.batch_render_window.show()
         self.batch_render_window.activateWindow()
 
 class GetNodeWindow(QWidget):
-    def __init__(self):
+    def __init__(self, runner):
         super().__init__()
+        self.runner = runner
         self.setWindowTitle("Get Node")
-        self.setGeometry(100, 100, 400, 300)
+        self.setGeometry(100, 100, 700, 700)
         
         layout = QVBoxLayout()
         
@@ -309,70 +1226,164 @@ class GetNodeWindow(QWidget):
         self.houdini_file_input = QLineEdit(self)
         self.browse_houdini_file_btn = QPushButton("Browse")
         self.load_nodes_btn = QPushButton("Load Nodes")
-        self.node_list = QListWidget()
+        self.node_count_label = QLabel("Nodes: 0")
+        self.node_search_input = QLineEdit(self)
+        self.node_search_input.setPlaceholderText("Search nodes (substring, /obj/*/rop_* or fuzzy)...")
+        self.node_search_results = QListWidget()
+        self.node_search_results.setMaximumHeight(120)
+        self.node_model = NodeTreeModel(self)
+        self.node_tree = QTreeView()
+        self.node_tree.setModel(self.node_model)
+        self.node_tree.setUniformRowHeights(True)
+        self.node_tree.header().setSectionResizeMode(0, QHeaderView.Stretch)
         self.parm_label = QLabel("Select Parameter:")
         self.parm_dropdown = QComboBox()
+        self.parm_filter_input = QLineEdit(self)
+        self.parm_filter_input.setPlaceholderText("Filter parameters...")
+        self.parm_model = QStandardItemModel(0, len(PARM_TABLE_COLUMNS), self)
+        self.parm_model.setHorizontalHeaderLabels([column.capitalize() for column in PARM_TABLE_COLUMNS])
+        self.parm_proxy = QSortFilterProxyModel(self)
+        self.parm_proxy.setSourceModel(self.parm_model)
+        self.parm_proxy.setFilterCaseSensitivity(Qt.CaseInsensitive)
+        self.parm_proxy.setFilterKeyColumn(-1)
+        self.parm_table = QTableView()
+        self.parm_table.setModel(self.parm_proxy)
+        self.parm_table.setSortingEnabled(True)
+        self.parm_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.parm_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.parm_table.horizontalHeader().setSectionResizeMode(QHeaderView.Interactive)
+        self.parm_table.horizontalHeader().setStretchLastSection(True)
         self.get_parm_value_btn = QPushButton("Get Parameter Value")
         self.parm_value_label = QLabel("Parameter Value: ")
         self.new_value_input = QLineEdit(self)
-        self.set_parm_value_btn = QPushButton("Set Parameter Value")
+        self.set_parm_value_btn = QPushButton("Queue Parameter Edit")
+        self.pending_edits_list = QListWidget()
+        self.remove_edit_btn = QPushButton("Remove Selected Edit")
+        self.clear_edits_btn = QPushButton("Clear Pending Edits")
+        self.commit_edits_btn = QPushButton("Commit Pending Edits")
         
         self.browse_houdini_file_btn.clicked.connect(self.browse_houdini_file)
         self.load_nodes_btn.clicked.connect(self.load_nodes)
-        self.node_list.itemSelectionChanged.connect(self.load_parameters)
+        self.node_tree.selectionModel().currentChanged.connect(self.node_selection_changed)
+        self.node_search_input.textChanged.connect(self.search_nodes)
+        self.node_search_results.currentTextChanged.connect(self.select_node_path)
+        self.parm_filter_input.textChanged.connect(self.parm_proxy.setFilterFixedString)
+        self.parm_table.clicked.connect(self.select_parm_from_table)
         self.get_parm_value_btn.clicked.connect(self.get_parm_value)
         self.set_parm_value_btn.clicked.connect(self.set_parm_value)
+        self.remove_edit_btn.clicked.connect(self.remove_pending_edit)
+        self.clear_edits_btn.clicked.connect(self.clear_pending_edits)
+        self.commit_edits_btn.clicked.connect(self.commit_pending_edits)
         
         layout.addWidget(self.houdini_file_label)
         layout.addWidget(self.houdini_file_input)
         layout.addWidget(self.browse_houdini_file_btn)
         layout.addWidget(self.load_nodes_btn)
-        layout.addWidget(self.node_list)
+        layout.addWidget(self.node_count_label)
+        layout.addWidget(self.node_search_input)
+        layout.addWidget(self.node_search_results)
+        layout.addWidget(self.node_tree)
         layout.addWidget(self.parm_label)
         layout.addWidget(self.parm_dropdown)
+        layout.addWidget(self.parm_filter_input)
+        layout.addWidget(self.parm_table)
         layout.addWidget(self.get_parm_value_btn)
         layout.addWidget(self.parm_value_label)
         layout.addWidget(QLabel("New Parameter Value:"))
         layout.addWidget(self.new_value_input)
         layout.addWidget(self.set_parm_value_btn)
+        layout.addWidget(QLabel("Pending Edits:"))
+        layout.addWidget(self.pending_edits_list)
+        layout.addWidget(self.remove_edit_btn)
+        layout.addWidget(self.clear_edits_btn)
+        layout.addWidget(self.commit_edits_btn)
         
         self.setLayout(layout)
-        self.node_list.itemSelectionChanged.connect(self.load_parameters)
+        self.worker = None
+        self.cache = NodeCache()
+        self.parm_rows = {}
+        self.pending_edits = []
+        self.pending_hip = ""
+        self.parm_task = None
+        self.node_index = NodeIndex()
+    
+    def get_worker(self):
+        config = load_config()
+        hython_path = hython_from_houdini(config['Paths'].get('houdini', ''))
+        if self.worker is None or self.worker.hython_path != hython_path:
+            self.shutdown()
+            self.worker = HythonWorker(hython_path)
+        return self.worker
+    
+    def shutdown(self):
+        if self.worker is not None:
+            self.worker.stop()
+            self.worker = None
     
     def set_parm_value(self):
-        selected_node = self.node_list.currentItem()
-        if not selected_node:
+        node_path = self.selected_node_path()
+        if not node_path:
             QMessageBox.warning(self, "Error", "Please select a node.")
             return
         
-        node_path = selected_node.text()
         parm_name = self.parm_dropdown.currentText()
         new_value = self.new_value_input.text()
         file_path = self.houdini_file_input.text()
+        if not parm_name:
+            QMessageBox.warning(self, "Error", "Please select a parameter.")
+            return
         
-        config = load_config()
-        houdini_path = config['Paths'].get('houdini', '')
-        houdini_bin_dir = os.path.dirname(houdini_path)
-        hython_path = os.path.join(houdini_bin_dir, "hython.exe")
-        
-        temp_script = tempfile.NamedTemporaryFile(delete=False, suffix=".py", mode="w", encoding="utf-8")
-        temp_script.write("import hou\n")
-        temp_script.write(f"hou.hipFile.load(r'{file_path}')\n")
-        temp_script.write(f"node = hou.node(r'{node_path}')\n")
-        temp_script.write(f"if node.parm(r'{parm_name}'):\n")
-        temp_script.write(f"    node.parm(r'{parm_name}').set({repr(new_value)})\n")
-        temp_script.write("hou.hipFile.save()\n")
-        temp_script.close()
-        
-        command = f'"{hython_path}" "{temp_script.name}"'
-        result = subprocess.run(command, shell=True, capture_output=True, text=True)
-        os.unlink(temp_script.name)
-        
-        if result.returncode != 0:
-            QMessageBox.warning(self, "Error", f"Houdini execution failed:\n{result.stderr}")
+        if self.pending_hip != file_path:
+            self.clear_pending_edits()
+            self.pending_hip = file_path
+        
+        # Queuing the same parameter again replaces the earlier edit
+        self.pending_edits = [edit for edit in self.pending_edits
+                              if (edit["node"], edit["parm"]) != (node_path, parm_name)]
+        self.pending_edits.append({"node": node_path, "parm": parm_name, "value": new_value})
+        self.refresh_pending_edits()
+
+    def refresh_pending_edits(self):
+        self.pending_edits_list.clear()
+        self.pending_edits_list.addItems(
+            [f"{edit['node']}/{edit['parm']} = {edit['value']}" for edit in self.pending_edits]
+        )
+        self.commit_edits_btn.setText(f"Commit Pending Edits ({len(self.pending_edits)})")
+
+    def remove_pending_edit(self):
+        row = self.pending_edits_list.currentRow()
+        if row >= 0:
+            del self.pending_edits[row]
+            self.refresh_pending_edits()
+
+    def clear_pending_edits(self):
+        self.pending_edits = []
+        self.refresh_pending_edits()
+
+    def commit_pending_edits(self):
+        if not self.pending_edits:
+            QMessageBox.warning(self, "Error", "No pending edits to commit.")
             return
         
-        QMessageBox.information(self, "Success", "Parameter value updated and file saved.")
+        self.commit_edits_btn.setEnabled(False)
+        task = self.runner.submit(f"Commit {len(self.pending_edits)} edits", self.run_commit_edits,
+                                  self.pending_hip, list(self.pending_edits), pool="hython")
+        task.finished.connect(self.edits_committed)
+        task.failed.connect(self.edits_failed)
+    
+    def run_commit_edits(self, task, file_path, edits):
+        return self.get_worker().request("apply_edits", hip=file_path, edits=edits)
+    
+    def edits_committed(self, count):
+        self.commit_edits_btn.setEnabled(True)
+        self.clear_pending_edits()
+        if self.houdini_file_input.text() == self.pending_hip:
+            self.load_parameters()
+        QMessageBox.information(self, "Success", f"{count} parameter edits applied and file saved.")
+    
+    def edits_failed(self, error):
+        self.commit_edits_btn.setEnabled(True)
+        QMessageBox.warning(self, "Error", f"No changes were saved, the edits were rolled back:\n{error}")
 
 
     def closeEvent(self, event):
@@ -390,120 +1401,168 @@ class GetNodeWindow(QWidget):
             QMessageBox.warning(self, "Error", "Please select a Houdini file.")
             return
         
-        config = load_config()
-        houdini_path = config['Paths'].get('houdini', '')
-        houdini_bin_dir = os.path.dirname(houdini_path)
-        hython_path = os.path.join(houdini_bin_dir, "hython.exe")
-        
-        temp_script = tempfile.NamedTemporaryFile(delete=False, suffix=".py", mode="w", encoding="utf-8")
-        temp_script.write("import hou\n")
-        temp_script.write(f"hou.hipFile.load(r'{file_path}')\n")
-        temp_script.write("nodes = [node.path() for node in hou.node('/') .allSubChildren()]\n")
-        temp_script.write("print('NODE_LIST_START')\n")
-        temp_script.write("for node in nodes:\n")
-        temp_script.write("    print(node)\n")
-        temp_script.write("print('NODE_LIST_END')\n")
-        temp_script.close()
-        
-        command = f'"{hython_path}" "{temp_script.name}"'
-        result = subprocess.run(command, shell=True, capture_output=True, text=True)
-        os.unlink(temp_script.name)
-        
-        output = result.stdout.strip()
-        if "NODE_LIST_START" in output and "NODE_LIST_END" in output:
-            nodes_section = output.split("NODE_LIST_START")[1].split("NODE_LIST_END")[0].strip()
-            nodes = nodes_section.split("\n") if nodes_section else []
-        else:
-            nodes = []
+        self.load_nodes_btn.setEnabled(False)
+        self.node_model.set_nodes({})
+        self.node_count_label.setText("Nodes: 0")
+        self.node_index = NodeIndex()
+        self.node_search_results.clear()
+        task = self.runner.submit(f"Load nodes: {os.path.basename(file_path)}", self.fetch_nodes,
+                                  file_path, self.node_index, pool="hython")
+        task.chunk.connect(self.add_node_chunk)
+        task.finished.connect(self.nodes_loaded)
+        task.failed.connect(self.nodes_failed)
+    
+    def fetch_nodes(self, task, file_path, node_index):
+        node_types = self.cache.get_nodes(file_path)
+        if node_types is not None:
+            node_index.add(node_types)
+            task.send_chunk(node_types)
+            return len(node_types)
         
-        self.node_list.clear()
-        self.node_list.addItems(nodes)
-        if nodes:
-            self.node_list.setCurrentRow(0)  # Select the first node automatically
-            self.load_parameters()  # Manually trigger loading parameters
+        try:
+            with HipArchive(file_path) as archive:
+                node_types = archive.node_types()
+            self.cache.put_nodes(file_path, node_types)
+            node_index.add(node_types)
+            task.send_chunk(node_types)
+            return len(node_types)
+        except (OSError, HipArchiveError):
+            pass
+        
+        # Not a plain cpio archive (e.g. .hipnc): let Houdini walk the scene and
+        # hand each chunk of paths to the tree as soon as it arrives
+        task.report(0, 0, "Loading scene in hython")
+        node_types = {}
+        def deliver(pairs):
+            chunk = dict(pairs)
+            node_types.update(chunk)
+            node_index.add(chunk)
+            task.send_chunk(chunk)
+            task.report(len(node_types), 0, f"{len(node_types)} nodes")
+        deliver(self.get_worker().request("nodes", hip=file_path, chunk=NODE_CHUNK, on_partial=deliver))
+        if node_types:
+            self.cache.put_nodes(file_path, node_types)
+        return len(node_types)
+    
+    def add_node_chunk(self, node_types):
+        self.node_model.add_nodes(node_types)
+        self.node_count_label.setText(f"Nodes: {len(self.node_model.node_types)}")
+        if not self.node_tree.currentIndex().isValid():
+            first = self.node_model.index(0, 0)
+            if first.isValid():
+                self.node_tree.setCurrentIndex(first)  # Selecting the first node triggers load_parameters
+    
+    def nodes_loaded(self, count):
+        self.load_nodes_btn.setEnabled(True)
+        self.node_count_label.setText(f"Nodes: {len(self.node_model.node_types)}")
+        self.search_nodes(self.node_search_input.text())
+    
+    def search_nodes(self, query):
+        results = self.node_index.search(query)
+        self.node_search_results.clear()
+        self.node_search_results.addItems(results)
+        if query.strip():
+            more = "+" if len(results) >= MAX_RESULTS else ""
+            self.node_count_label.setText(f"Nodes: {len(self.node_model.node_types)} ({len(results)}{more} matches)")
+    
+    def select_node_path(self, node_path):
+        index = self.node_model.index_for_path(node_path)
+        if index.isValid():
+            self.node_tree.setCurrentIndex(index)
+            self.node_tree.scrollTo(index)
+    
+    def selected_node_path(self):
+        return self.node_model.path(self.node_tree.currentIndex())
+    
+    def node_selection_changed(self, current, previous):
+        self.load_parameters()
+    
+    def nodes_failed(self, error):
+        self.load_nodes_btn.setEnabled(True)
+        QMessageBox.warning(self, "Error", f"Houdini execution failed:\n{error}")
 
     
     def load_parameters(self):
-        selected_node = self.node_list.currentItem()
-        if not selected_node:
+        node_path = self.selected_node_path()
+        if not node_path:
             return
         
-        node_path = selected_node.text()
         file_path = self.houdini_file_input.text()
         
-        config = load_config()
-        houdini_path = config['Paths'].get('houdini', '')
-        houdini_bin_dir = os.path.dirname(houdini_path)
-        hython_path = os.path.join(houdini_bin_dir, "hython.exe")
-        
-        temp_script = tempfile.NamedTemporaryFile(delete=False, suffix=".py", mode="w", encoding="utf-8")
-        temp_script.write("import hou\n")
-        temp_script.write(f"hou.hipFile.load(r'{file_path}')\n")
-        temp_script.write(f"node = hou.node(r'{node_path}')\n")
-        temp_script.write("params = [parm.name() for parm in node.parms()] if node else []\n")
-        temp_script.write("print('PARAM_LIST_START')\n")
-        temp_script.write("print('\\n'.join(params))\n")
-        temp_script.write("print('PARAM_LIST_END')\n")
-        temp_script.close()
-        
-        command = f'"{hython_path}" "{temp_script.name}"'
-        result = subprocess.run(command, shell=True, capture_output=True, text=True)
-        os.unlink(temp_script.name)
-        
-        output = result.stdout.strip()
-        
-        # Remove debug popup
-        # QMessageBox.information(self, "Houdini Output", output)  # Removed to prevent duplicate popups
-
-        if "PARAM_LIST_START" in output and "PARAM_LIST_END" in output:
-            params_section = output.split("PARAM_LIST_START")[1].split("PARAM_LIST_END")[0].strip()
-            params = params_section.split("\n") if params_section else []
-        else:
-            params = []
+        # Only the latest selection matters, drop a load that has not started yet
+        if self.parm_task is not None and not self.parm_task.is_finished():
+            self.runner.cancel(self.parm_task)
+        self.parm_task = self.runner.submit(f"Load parameters: {node_path}", self.fetch_parm_table,
+                                            file_path, node_path, pool="hython")
+        self.parm_task.finished.connect(self.show_parameters)
+        self.parm_task.failed.connect(self.parameters_failed)
+    
+    def fetch_parm_table(self, task, file_path, node_path):
+        rows = self.cache.get_parm_table(file_path, node_path)
+        if rows is None:
+            rows = self.get_worker().request("parm_table", hip=file_path, node=node_path)
+            self.cache.put_parm_table(file_path, node_path, rows)
+        return node_path, rows
+    
+    def show_parameters(self, result):
+        node_path, rows = result
+        if self.selected_node_path() != node_path:
+            return
 
+        self.parm_rows = {row["name"]: row for row in rows}
         self.parm_dropdown.clear()
-        self.parm_dropdown.addItems(params)
+        self.parm_dropdown.addItems(list(self.parm_rows))
+        self.fill_parm_table(rows)
+    
+    def parameters_failed(self, error):
+        self.parm_rows = {}
+        self.parm_dropdown.clear()
+        self.fill_parm_table([])
+
+    def fill_parm_table(self, rows):
+        self.parm_table.setSortingEnabled(False)
+        self.parm_model.removeRows(0, self.parm_model.rowCount())
+        for row in rows:
+            items = []
+            for column in PARM_TABLE_COLUMNS:
+                value = row.get(column, "")
+                item = QStandardItem("yes" if value is True else "" if value is False else str(value))
+                items.append(item)
+            self.parm_model.appendRow(items)
+        self.parm_table.setSortingEnabled(True)
 
-        # # Only show error message if no parameters exist
-        # if not params:
-        #     QMessageBox.warning(self, "Error", f"No parameters found for {node_path}.")
+    def select_parm_from_table(self, index):
+        name = self.parm_proxy.index(index.row(), 0).data()
+        self.parm_dropdown.setCurrentText(name)
+        self.parm_value_label.setText(f"Parameter Value: {self.parm_rows[name]['value']}")
 
     
     def get_parm_value(self):
-        selected_node = self.node_list.currentItem()
-        if not selected_node:
+        node_path = self.selected_node_path()
+        if not node_path:
             return
         
-        node_path = selected_node.text()
         parm_name = self.parm_dropdown.currentText()
         file_path = self.houdini_file_input.text()
         
-        config = load_config()
-        houdini_path = config['Paths'].get('houdini', '')
-        houdini_bin_dir = os.path.dirname(houdini_path)
-        hython_path = os.path.join(houdini_bin_dir, "hython.exe")
-        
-        temp_script = tempfile.NamedTemporaryFile(delete=False, suffix=".py", mode="w", encoding="utf-8")
-        temp_script.write("import hou\n")
-        temp_script.write(f"hou.hipFile.load(r'{file_path}')\n")
-        temp_script.write(f"node = hou.node(r'{node_path}')\n")
-        temp_script.write(f"parm_value = node.parm(r'{parm_name}').eval()\n")
-        temp_script.write("print('PARM_VALUE_START')\n")
-        temp_script.write("print(parm_value)\n")
-        temp_script.write("print('PARM_VALUE_END')\n")
-        temp_script.close()
-        
-        command = f'"{hython_path}" "{temp_script.name}"'
-        result = subprocess.run(command, shell=True, capture_output=True, text=True)
-        os.unlink(temp_script.name)
-        
-        output = result.stdout.strip()
-        if "PARM_VALUE_START" in output and "PARM_VALUE_END" in output:
-            parm_value = output.split("PARM_VALUE_START")[1].split("PARM_VALUE_END")[0].strip()
-        else:
-            parm_value = "N/A"
+        row = self.parm_rows.get(parm_name)
+        if row is not None:
+            self.parm_value_label.setText(f"Parameter Value: {row['value']}")
+            return
         
+        task = self.runner.submit(f"Get {node_path}/{parm_name}", self.fetch_parm_value,
+                                  file_path, node_path, parm_name, pool="hython")
+        task.finished.connect(self.show_parm_value)
+        task.failed.connect(self.parm_value_failed)
+    
+    def fetch_parm_value(self, task, file_path, node_path, parm_name):
+        return self.get_worker().request("parm_value", hip=file_path, node=node_path, parm=parm_name)
+    
+    def show_parm_value(self, parm_value):
         self.parm_value_label.setText(f"Parameter Value: {parm_value}")
+    
+    def parm_value_failed(self, error):
+        self.show_parm_value("N/A")
 
 
 if __name__ == "__main__":